@@ -9,15 +9,21 @@ FastAPI integration for GraphQL schema
 This file integrates the GraphQL schema with FastAPI using Strawberry.
 """
 
+from fastapi import Depends
 from strawberry.fastapi import GraphQLRouter
 
 # Import schema and connection setter
-from graphql_schema import schema, set_database_connections
+from graphql_schema import schema, set_database_connections, create_loaders
+from mysql_implement import get_db, RequestConnection
 
 # This function will be called from api_implement.py to set up connections
 def init_graphql(db_pool_conn, redis_conn, mongo_conn):
     """Initialize GraphQL with database connections."""
     set_database_connections(db_pool_conn, redis_conn, mongo_conn)
 
+async def get_context(cnx: RequestConnection = Depends(get_db)):
+    """Per-request GraphQL context: one MySQL connection and one set of DataLoaders shared by all resolvers."""
+    return {"cnx": cnx, "loaders": create_loaders(cnx)}
+
 # Create GraphQL router
-graphql_app = GraphQLRouter(schema)
\ No newline at end of file
+graphql_app = GraphQLRouter(schema, context_getter=get_context)
\ No newline at end of file
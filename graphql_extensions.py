@@ -0,0 +1,393 @@
+# Westmont College CS 125 Database Design Fall 2025
+# Final Project
+# Assistant Professor Mike Ryu
+# Caleb Song & David Oyebade
+
+"""
+Strawberry extensions for the GraphQL endpoint.
+
+QueryCostLimiter: nested fields let one request fan out into a very large
+number of backend lookups, all sharing the MySQL pool that check-in uses.
+Before a query runs, this extension works out a static cost and a depth
+from the query text and rejects it if either is over the limit:
+
+- every field that returns an object costs its weight (default 1),
+  and scalar fields cost nothing
+- a list field multiplies the cost of its selection by the expected list
+  size, which is the `first`/`limit` argument if given (on the list field
+  or, for connections, on the field just above it), else the size
+  configured for that field
+
+The computed cost is returned in the response under extensions.cost.
+
+PersistedQueryCache: automatic persisted queries plus a Redis cache of
+read-only results. See the class docstring.
+
+ResolverTracing: per-resolver wall time and MySQL/Redis/MongoDB call counts,
+returned under extensions.tracing on request and totalled per field for
+GET /metrics/graphql.
+"""
+
+import hashlib
+import os
+import threading
+import time
+import redis
+from inspect import isawaitable
+from graphql import ExecutionResult, GraphQLError, ValidationRule
+from graphql import get_named_type, is_composite_type, is_list_type
+from graphql.language import FieldNode, FragmentSpreadNode, InlineFragmentNode, OperationDefinitionNode, VariableNode
+from graphql.type import GraphQLNonNull
+from strawberry.extensions import SchemaExtension
+from strawberry.extensions.tracing.utils import should_skip_tracing
+from strawberry.types.graphql import OperationType
+from redis_implement import get_async_redis_client, async_invalidate_query_cache
+from redis_implement import async_get_persisted_query, async_save_persisted_query
+from redis_implement import async_get_cached_result, async_cache_result
+from tracing import ResolverSpan, current_span
+
+MAX_QUERY_DEPTH = int(os.getenv("GRAPHQL_MAX_DEPTH", "6"))
+MAX_QUERY_COST = int(os.getenv("GRAPHQL_MAX_COST", "2000"))
+DEFAULT_LIST_SIZE = 20
+LIST_SIZE_ARGUMENTS = ("first", "limit")
+
+
+class QueryCostLimiter(SchemaExtension):
+    """
+    Rejects queries deeper than max_depth or costlier than max_cost before
+    they execute. field_weights and list_sizes are keyed "Type.field".
+    """
+
+    def __init__(self, field_weights=None, list_sizes=None, max_depth=MAX_QUERY_DEPTH, max_cost=MAX_QUERY_COST):
+        self.field_weights = field_weights or {}
+        self.list_sizes = list_sizes or {}
+        self.max_depth = max_depth
+        self.max_cost = max_cost
+        self.cost = None
+        self.depth = None
+
+    def on_operation(self):
+        limiter = self
+
+        class CostRule(ValidationRule):
+            def enter_operation_definition(self, node, *args):
+                if not limiter._is_executed_operation(node):
+                    return
+                root_type = self.context.schema.get_root_type(node.operation)
+                if root_type is None:
+                    return
+                limiter.cost, limiter.depth = limiter._selection_cost(
+                    self.context, root_type, node.selection_set, set())
+                if limiter.depth > limiter.max_depth:
+                    self.report_error(GraphQLError(
+                        f"Query depth {limiter.depth} exceeds the maximum of {limiter.max_depth}", node))
+                elif limiter.cost > limiter.max_cost:
+                    self.report_error(GraphQLError(
+                        f"Query cost {limiter.cost} exceeds the maximum of {limiter.max_cost}", node))
+
+        self.execution_context.validation_rules = self.execution_context.validation_rules + (CostRule,)
+        yield
+
+    def get_results(self):
+        if self.cost is None:
+            return {}
+        return {
+            "cost": {
+                "requested": self.cost,
+                "maximum": self.max_cost,
+                "depth": self.depth,
+                "maxDepth": self.max_depth
+            }
+        }
+
+    def _is_executed_operation(self, node: OperationDefinitionNode):
+        """Only the operation that will run is costed (a document may hold several)."""
+        operation_name = self.execution_context.operation_name
+        if operation_name is None:
+            return True
+        return node.name is not None and node.name.value == operation_name
+
+    def _size_argument(self, field_node):
+        """The field's first/limit argument, or None."""
+        variables = self.execution_context.variables or {}
+        for argument in field_node.arguments or ():
+            if argument.name.value in LIST_SIZE_ARGUMENTS:
+                value = argument.value
+                if isinstance(value, VariableNode):
+                    size = variables.get(value.name.value)
+                else:
+                    size = getattr(value, "value", None)
+                if size is not None:
+                    return max(int(size), 0)
+        return None
+
+    def _list_size(self, type_name, field_node, page_size=None):
+        size = self._size_argument(field_node)
+        if size is not None:
+            return size
+        if page_size is not None:
+            return page_size  # edges of a connection fetched with first: N
+        return self.list_sizes.get(f"{type_name}.{field_node.name.value}", DEFAULT_LIST_SIZE)
+
+    def _selection_cost(self, context, parent_type, selection_set, visited_fragments, page_size=None):
+        """
+        Returns (cost, depth) of a selection set on parent_type. page_size is
+        the first/limit of the field that selected it, if any.
+        """
+        cost = 0
+        depth = 0
+        if selection_set is None:
+            return cost, depth
+
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                name = selection.name.value
+                if name.startswith("__"):
+                    continue  # introspection is not charged
+                field = getattr(parent_type, "fields", {}).get(name)
+                if field is None:
+                    continue  # unknown field; normal validation reports it
+                field_type = field.type
+                if isinstance(field_type, GraphQLNonNull):
+                    field_type = field_type.of_type
+                named_type = get_named_type(field_type)
+
+                child_cost, child_depth = self._selection_cost(
+                    context, named_type, selection.selection_set, visited_fragments,
+                    None if is_list_type(field_type) else self._size_argument(selection))
+                weight = self.field_weights.get(
+                    f"{parent_type.name}.{name}", 1 if is_composite_type(named_type) else 0)
+                multiplier = self._list_size(parent_type.name, selection, page_size) if is_list_type(field_type) else 1
+                cost += weight + multiplier * child_cost
+                depth = max(depth, child_depth + 1)
+
+            elif isinstance(selection, InlineFragmentNode):
+                fragment_type = parent_type
+                if selection.type_condition is not None:
+                    fragment_type = context.schema.get_type(selection.type_condition.name.value) or parent_type
+                child_cost, child_depth = self._selection_cost(
+                    context, fragment_type, selection.selection_set, visited_fragments, page_size)
+                cost += child_cost
+                depth = max(depth, child_depth)
+
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment_name = selection.name.value
+                fragment = context.get_fragment(fragment_name)
+                if fragment is None or fragment_name in visited_fragments:
+                    continue  # missing or cyclic fragments are reported by normal validation
+                fragment_type = context.schema.get_type(fragment.type_condition.name.value) or parent_type
+                child_cost, child_depth = self._selection_cost(
+                    context, fragment_type, fragment.selection_set, visited_fragments | {fragment_name}, page_size)
+                cost += child_cost
+                depth = max(depth, child_depth)
+
+        return cost, depth
+
+
+def query_hash(query):
+    """SHA-256 of a query's text, as used by persisted-query clients."""
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+class PersistedQueryCache(SchemaExtension):
+    """
+    Persisted queries: a request may carry
+    extensions: {"persistedQuery": {"version": 1, "sha256Hash": "..."}}
+    and leave out the query text. If the hash is unknown the response is a
+    PersistedQueryNotFound error, and the client resends the request with the
+    text, which is stored under its hash for next time.
+
+    Result cache: successful query (not mutation) results are kept in Redis
+    for GRAPHQL_CACHE_TTL seconds, keyed by query hash, operation name and
+    variables. Check-ins, check-outs and every GraphQL mutation retire all
+    cached results. Other REST writes are picked up when the entry expires.
+
+    The response reports whether the result came from the cache under
+    extensions.cache.
+    """
+
+    def __init__(self):
+        self.cache_status = None
+
+    async def on_operation(self):
+        context = self.execution_context
+        persisted = (context.operation_extensions or {}).get("persistedQuery")
+        if persisted:
+            sha256 = persisted.get("sha256Hash")
+            client = get_async_redis_client()
+            if context.query is None:
+                context.query = await async_get_persisted_query(client, sha256)
+                if context.query is None:
+                    raise GraphQLError("PersistedQueryNotFound",
+                                       extensions={"code": "PERSISTED_QUERY_NOT_FOUND"})
+            elif query_hash(context.query) != sha256:
+                raise GraphQLError("provided sha does not match query",
+                                   extensions={"code": "PERSISTED_QUERY_HASH_MISMATCH"})
+            else:
+                await async_save_persisted_query(client, sha256, context.query)
+
+        yield
+
+        if context.operation_type == OperationType.MUTATION:
+            try:
+                await async_invalidate_query_cache(get_async_redis_client())
+            except redis.RedisError:
+                pass
+
+    async def on_execute(self):
+        context = self.execution_context
+        key = None
+        if context.operation_type == OperationType.QUERY:
+            try:
+                key, data = await async_get_cached_result(
+                    get_async_redis_client(), query_hash(context.query),
+                    context.operation_name, context.variables)
+                if data is not None:
+                    # Strawberry skips execution when a result is already set
+                    context.result = ExecutionResult(data=data)
+                    self.cache_status = "hit"
+                    key = None
+                else:
+                    self.cache_status = "miss"
+            except redis.RedisError:
+                key = None  # cache unavailable: just run the query
+
+        yield
+
+        result = context.result
+        if key and result is not None and not result.errors:
+            try:
+                await async_cache_result(get_async_redis_client(), key, result.data)
+            except redis.RedisError:
+                pass
+
+    def get_results(self):
+        if self.cache_status is None:
+            return {}
+        return {"cache": self.cache_status}
+
+
+class ResolverStats:
+    """Running per-field totals of resolver time and backend calls, across all requests."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operations = 0
+        self._fields = {}
+
+    def add(self, spans):
+        with self._lock:
+            self._operations += 1
+            for span in spans:
+                stats = self._fields.setdefault(span.field, {
+                    "resolves": 0, "total": 0.0, "max": 0.0, "calls": {}, "backend_time": {}})
+                stats["resolves"] += 1
+                stats["total"] += span.duration
+                stats["max"] = max(stats["max"], span.duration)
+                for backend, count in span.calls.items():
+                    stats["calls"][backend] = stats["calls"].get(backend, 0) + count
+                    stats["backend_time"][backend] = stats["backend_time"].get(backend, 0.0) + span.backend_time[backend]
+
+    def snapshot(self):
+        """Per-field totals, the fields with the most total time first."""
+        with self._lock:
+            fields = sorted(self._fields.items(), key=lambda item: item[1]["total"], reverse=True)
+            return {
+                "operations": self._operations,
+                "fields": {
+                    field: {
+                        "resolves": stats["resolves"],
+                        "ms_total": round(stats["total"] * 1000, 2),
+                        "ms_avg": round(stats["total"] * 1000 / stats["resolves"], 2),
+                        "ms_max": round(stats["max"] * 1000, 2),
+                        # more than ~1 call per resolve on a nested field is an N+1
+                        "backend_calls": dict(stats["calls"]),
+                        "backend_calls_per_resolve": {
+                            backend: round(count / stats["resolves"], 2) for backend, count in stats["calls"].items()},
+                        "backend_ms": {
+                            backend: round(seconds * 1000, 2) for backend, seconds in stats["backend_time"].items()}
+                    }
+                    for field, stats in fields
+                }
+            }
+
+
+resolver_stats = ResolverStats()
+
+
+def resolver_metrics():
+    """Per-field resolver totals since the process started (GET /metrics/graphql)."""
+    return resolver_stats.snapshot()
+
+
+class ResolverTracing(SchemaExtension):
+    """
+    Times every resolver that does work (plain attribute fields are skipped)
+    and counts the MySQL, Redis and MongoDB calls it makes; see tracing.py.
+    Calls made by a batched DataLoader are charged to the resolver whose load
+    started the batch. A request sending extensions: {"tracing": true} gets
+    its resolvers back under extensions.tracing.
+    """
+
+    def __init__(self):
+        self.spans = []
+        self.start = None
+
+    def on_operation(self):
+        self.start = time.perf_counter()
+        yield
+        if self.spans:
+            resolver_stats.add(self.spans)
+
+    def resolve(self, _next, root, info, *args, **kwargs):
+        if should_skip_tracing(_next, info):
+            return _next(root, info, *args, **kwargs)
+
+        span = ResolverSpan(info.path.as_list(), f"{info.parent_type.name}.{info.field_name}")
+        self.spans.append(span)
+        token = current_span.set(span)
+        try:
+            result = _next(root, info, *args, **kwargs)
+        except Exception:
+            span.finish()
+            raise
+        finally:
+            current_span.reset(token)
+
+        if isawaitable(result):
+            return self._finish_async(span, result)
+        span.finish()
+        return result
+
+    async def _finish_async(self, span, result):
+        token = current_span.set(span)
+        try:
+            return await result
+        finally:
+            current_span.reset(token)
+            span.finish()
+
+    def get_results(self):
+        if not (self.execution_context.operation_extensions or {}).get("tracing"):
+            return {}
+        spans = [span for span in self.spans if span.duration is not None]
+        calls = {}
+        for span in spans:
+            for backend, count in span.calls.items():
+                calls[backend] = calls.get(backend, 0) + count
+        return {
+            "tracing": {
+                "ms": round((time.perf_counter() - self.start) * 1000, 2),
+                "backend_calls": calls,
+                "resolvers": [
+                    {
+                        "path": span.path,
+                        "field": span.field,
+                        "ms": round(span.duration * 1000, 2),
+                        "backend_calls": span.calls,
+                        "backend_ms": {backend: round(seconds * 1000, 2) for backend, seconds in span.backend_time.items()}
+                    }
+                    for span in spans
+                ]
+            }
+        }
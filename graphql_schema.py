@@ -21,11 +21,28 @@ Key Concepts:
 5. Resolver: A function that "resolves" a value for a field in a query or mutation.
 """
 
+import asyncio
 import strawberry
+from contextlib import aclosing
+from strawberry.dataloader import DataLoader
+from strawberry.extensions import ParserCache
 from strawberry.scalars import JSON
-from typing import List, Optional
+from strawberry.types.nodes import SelectedField
+from typing import AsyncGenerator, Generic, List, Optional, TypeVar
 from datetime import datetime
 from fastapi import HTTPException
+from graphql_extensions import QueryCostLimiter, PersistedQueryCache, ResolverTracing
+from redis_implement import check_in as redis_check_in, check_out as redis_check_out
+from redis_implement import NOT_REGISTERED, REGISTRATIONS_NOT_CACHED, CHECKED_IN_ELSEWHERE
+from redis_implement import get_check_in_count, get_check_in_counts, get_checked_in_ids, get_check_in_times
+from redis_implement import get_async_redis_client, async_get_check_in_count
+from redis_implement import listen_check_in_activity, listen_events_activity
+from mysql_implement import find_person, list_events, find_event, find_events, find_registration_id, event_fields
+from mysql_implement import load_live_roster
+from mysql_implement import find_registrations_for_events, find_workers_for_events, find_parents_for_students
+from mysql_implement import find_small_groups_for_people, find_members_for_small_groups, find_event_ids_for_type
+from mysql_implement import fetch_page, encode_cursor, MAX_PAGE_SIZE
+from mysql_implement import PEOPLE_PAGE, STUDENTS_PAGE, PARENTS_PAGE, EVENTS_PAGE, SMALL_GROUPS_PAGE
 
 # Database connections will be set at runtime to avoid circular imports
 # These will be initialized in graphql_app.py
@@ -44,6 +61,10 @@ def set_database_connections(db_pool_conn, redis_conn, mongo_conn):
 
 # --- Strawberry Types ---
 
+# Relationship fields (smallGroups, members, parents, roster, workers) are
+# resolved through the request's batching loaders, so asking for them on a
+# list of N items costs one query, not N.
+
 @strawberry.type
 class Person:
     """GraphQL type representing a person."""
@@ -51,6 +72,43 @@ class Person:
     firstName: str
     lastName: str
 
+    @strawberry.field(description="Small groups this person belongs to.")
+    async def smallGroups(self, info: strawberry.Info) -> List["SmallGroup"]:
+        rows = await get_loaders(info)["small_groups_by_person"].load(self.id)
+        return [SmallGroup(id=sg["id"], name=sg["name"]) for sg in rows]
+
+
+@strawberry.type
+class Student:
+    """GraphQL type representing a student."""
+    id: int
+    firstName: str
+    lastName: str
+    grade: Optional[int] = None
+
+    @strawberry.field(description="The student's parents.")
+    async def parents(self, info: strawberry.Info) -> List[Person]:
+        rows = await get_loaders(info)["parents_by_student"].load(self.id)
+        return [Person(id=p["id"], firstName=p["firstName"], lastName=p["lastName"]) for p in rows]
+
+
+@strawberry.type
+class Registration:
+    """GraphQL type for a student's registration for an event."""
+    id: int
+    student: Student
+
+
+@strawberry.type
+class Worker:
+    """GraphQL type for a volunteer or leader scheduled on an event."""
+    shift_id: int
+    role: str
+    task_id: int
+    task_description: Optional[str]
+    person: Person
+    leader_title: Optional[str] = None
+
 
 @strawberry.type
 class Event:
@@ -58,6 +116,14 @@ class Event:
     id: int
     name: str
 
+    @strawberry.field(description="Students registered for this event.")
+    async def roster(self, info: strawberry.Info) -> List[Registration]:
+        return await load_event_roster(info, self.id)
+
+    @strawberry.field(description="Volunteers and leaders scheduled on this event.")
+    async def workers(self, info: strawberry.Info) -> List[Worker]:
+        return await load_event_workers(info, self.id)
+
 
 @strawberry.type
 class SmallGroup:
@@ -65,6 +131,11 @@ class SmallGroup:
     id: int
     name: str
 
+    @strawberry.field(description="People in this small group.")
+    async def members(self, info: strawberry.Info) -> List[Person]:
+        rows = await get_loaders(info)["members_by_small_group"].load(self.id)
+        return [Person(id=p["id"], firstName=p["firstName"], lastName=p["lastName"]) for p in rows]
+
 
 @strawberry.type
 class CustomFieldDefinition:
@@ -93,6 +164,14 @@ class EventWithCustomData:
     end_date_time: Optional[str] = None
     custom_field_values: Optional[JSON] = None
 
+    @strawberry.field(description="Students registered for this event.")
+    async def roster(self, info: strawberry.Info) -> List[Registration]:
+        return await load_event_roster(info, self.id)
+
+    @strawberry.field(description="Volunteers and leaders scheduled on this event.")
+    async def workers(self, info: strawberry.Info) -> List[Worker]:
+        return await load_event_workers(info, self.id)
+
 
 @strawberry.type
 class CheckedInStudent:
@@ -110,6 +189,26 @@ class CheckedInResponse:
     count: int
 
 
+@strawberry.type
+class LiveRosterStudent:
+    """GraphQL type for one student on an event's live roster."""
+    student_id: int
+    name: Optional[str]
+    registered: bool
+    checked_in: bool
+    check_in_time: Optional[str] = None
+
+
+@strawberry.type
+class LiveRoster:
+    """GraphQL type for an event's roster merged with live check-in state."""
+    event_id: int
+    event_name: str
+    registered_count: int
+    checked_in_count: int
+    students: List[LiveRosterStudent]
+
+
 @strawberry.type
 class CheckInCount:
     """GraphQL type for check-in count."""
@@ -118,6 +217,45 @@ class CheckInCount:
     checked_in_count: int
 
 
+@strawberry.type
+class CheckInActivity:
+    """GraphQL type for a single live check-in or check-out on an event."""
+    type: str
+    event_id: int
+    student_id: int
+    time: str
+    count: int
+
+
+# --- Connections ---
+# Relay-style pages for the long lists, e.g. peopleConnection(first: 50, after: $cursor)
+# returns edges (each node with its cursor) and pageInfo. They run the same
+# keyset queries as the paginated REST list endpoints.
+
+T = TypeVar("T")
+
+
+@strawberry.type
+class PageInfo:
+    """Where a page ends, and whether there is another one after it."""
+    has_next_page: bool
+    end_cursor: Optional[str] = None
+
+
+@strawberry.type
+class Edge(Generic[T]):
+    """One item on a page, with the cursor that pages on from it."""
+    cursor: str
+    node: T
+
+
+@strawberry.type
+class Connection(Generic[T]):
+    """One page of a list."""
+    edges: List[Edge[T]]
+    page_info: PageInfo
+
+
 # --- Strawberry Input Types ---
 
 @strawberry.input
@@ -154,11 +292,12 @@ class EventCustomDataUpdateInput:
 # --- Helper Functions to Access Database ---
 # Use the imported connections from api_implement
 
-def get_db_connection():
-    """Get a MySQL database connection from the pool."""
-    if db_pool is None:
-        raise HTTPException(status_code=500, detail="Database pool not available")
-    return db_pool.get_connection()
+def get_db_connection(info: strawberry.Info):
+    """
+    Get the request's MySQL connection. It is shared by every resolver in the
+    request and only checked out of the pool the first time it is used.
+    """
+    return info.context["cnx"]
 
 
 def get_redis_client():
@@ -173,14 +312,198 @@ def get_mongo_client():
     return mongoDBclient
 
 
+# --- Projections ---
+# Resolvers look at which fields the query selected so they only read the
+# columns and stores those fields need: `event(eventId: 1) { id name }` is
+# one narrow MySQL query, with no MongoDB or Redis call.
+
+# GraphQL field -> event row key (see EVENT_FIELDS in mysql_implement.py)
+EVENT_ROW_KEYS = {
+    "name": "name",
+    "eventTypeId": "EventTypeID",
+    "placeId": "PlaceID",
+    "startDateTime": "StartDateTime",
+    "endDateTime": "EndDateTime"
+}
+
+
+def requested_fields(info: strawberry.Info):
+    """Names of the fields selected on the current field's result, including those in fragments."""
+    names = set()
+
+    def collect(selections):
+        for selection in selections:
+            if isinstance(selection, SelectedField):
+                names.add(selection.name)
+            else:
+                collect(selection.selections)  # fragment spread or inline fragment
+
+    for field in info.selected_fields:
+        collect(field.selections)
+    return names
+
+
+def requested_event_fields(requested):
+    """The event row keys needed for a set of requested GraphQL fields."""
+    return event_fields({EVENT_ROW_KEYS[name] for name in requested if name in EVENT_ROW_KEYS})
+
+
+# --- DataLoaders ---
+# Created once per request (see get_context in graphql_app.py) and shared by
+# every resolver in it. Loads made while a query is resolving are batched
+# into one backend call per loader, and repeated keys come from its cache.
+
+def create_loaders(cnx):
+    """Returns the request's DataLoaders, all using the request's MySQL connection."""
+
+    async def load_events(keys):
+        # keys are (event_id, fields); one query per distinct projection
+        events = {}
+        projections = {}
+        for event_id, fields in keys:
+            projections.setdefault(fields, []).append(event_id)
+        for fields, event_ids in projections.items():
+            for event in find_events(cnx, event_ids, fields):
+                events[(event["id"], fields)] = event
+        return [events.get(key) for key in keys]
+
+    async def load_custom_field_values(event_ids):
+        values = {}
+        try:
+            mongo_collection = get_mongo_client()["FP_YG_app"]["eventCustomData"]
+            for custom_data in mongo_collection.find({"eventId": {"$in": list(event_ids)}},
+                                                     {"eventId": 1, "custom_field_values": 1}):
+                values[custom_data["eventId"]] = custom_data.get("custom_field_values")
+        except Exception:
+            pass  # Don't fail if MongoDB lookup fails
+        return [values.get(event_id) for event_id in event_ids]
+
+    def grouped_loader(fetch):
+        """DataLoader for a one-to-many relationship: one query for all keys, [] for keys with no rows."""
+        async def load(keys):
+            groups = fetch(cnx, keys)
+            return [groups.get(key, []) for key in keys]
+        return DataLoader(load_fn=load)
+
+    async def load_check_in_counts(event_ids):
+        counts = {}
+        try:
+            redis_client = get_redis_client()
+            if redis_client:
+                counts = get_check_in_counts(redis_client, event_ids)
+        except Exception:
+            pass  # Don't fail if Redis lookup fails
+        return [counts.get(event_id, 0) for event_id in event_ids]
+
+    return {
+        "event": DataLoader(load_fn=load_events),
+        "custom_field_values": DataLoader(load_fn=load_custom_field_values),
+        "check_in_count": DataLoader(load_fn=load_check_in_counts),
+        "registrations_by_event": grouped_loader(find_registrations_for_events),
+        "workers_by_event": grouped_loader(find_workers_for_events),
+        "parents_by_student": grouped_loader(find_parents_for_students),
+        "small_groups_by_person": grouped_loader(find_small_groups_for_people),
+        "members_by_small_group": grouped_loader(find_members_for_small_groups)
+    }
+
+
+def get_loaders(info: strawberry.Info):
+    """Get the request's DataLoaders."""
+    return info.context["loaders"]
+
+
+async def load_event_roster(info: strawberry.Info, event_id: int) -> List[Registration]:
+    """Returns an event's registrations, batched with every other roster in the request."""
+    rows = await get_loaders(info)["registrations_by_event"].load(event_id)
+    return [
+        Registration(
+            id=r["id"],
+            student=Student(id=r["studentID"], firstName=r["firstName"], lastName=r["lastName"], grade=r["grade"])
+        )
+        for r in rows
+    ]
+
+
+async def load_event_workers(info: strawberry.Info, event_id: int) -> List[Worker]:
+    """Returns an event's volunteers and leaders, batched with every other event in the request."""
+    rows = await get_loaders(info)["workers_by_event"].load(event_id)
+    return [
+        Worker(
+            shift_id=w["shiftID"],
+            role=w["role"],
+            task_id=w["taskID"],
+            task_description=w["taskDescription"],
+            person=Person(id=w["personID"], firstName=w["firstName"], lastName=w["lastName"]),
+            leader_title=w["leaderTitle"]
+        )
+        for w in rows
+    ]
+
+
+async def load_event_extras(info: strawberry.Info, requested, event_ids):
+    """
+    Returns ([custom_field_values], [checked_in]) for event_ids, batched
+    through the request's loaders. A store whose field was not requested is
+    not called, and its list is all None.
+    """
+    loaders = get_loaders(info)
+
+    async def load(loader, field):
+        if field not in requested:
+            return [None] * len(event_ids)
+        return await loaders[loader].load_many(event_ids)
+
+    return await asyncio.gather(
+        load("custom_field_values", "customFieldValues"),
+        load("check_in_count", "checkedIn")
+    )
+
+
+def build_event_with_custom_data(event, checked_in_count, custom_field_values) -> EventWithCustomData:
+    """
+    Builds the GraphQL type from an event row and its Redis/MongoDB values.
+    Columns left out of a projected row are left as None; they were not requested.
+    """
+    start_dt = event["StartDateTime"].isoformat() if event.get("StartDateTime") else None
+    end_dt = event["EndDateTime"].isoformat() if event.get("EndDateTime") else None
+    return EventWithCustomData(
+        id=event["id"],
+        name=event.get("name"),
+        event_type_id=event.get("EventTypeID"),
+        place_id=event.get("PlaceID"),
+        checked_in=checked_in_count,
+        start_date_time=start_dt,
+        end_date_time=end_dt,
+        custom_field_values=custom_field_values
+    )
+
+
+def load_connection(info: strawberry.Info, page_query, first, after, build_node) -> Connection:
+    """Fetches one keyset page of a list (see mysql_implement.py) and wraps its rows with build_node."""
+    if not 1 <= first <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"first must be between 1 and {MAX_PAGE_SIZE}")
+    query, order = page_query
+    try:
+        rows, next_cursor = fetch_page(get_db_connection(info), query, order, first, after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+
+    edges = [Edge(cursor=encode_cursor(row, order), node=build_node(row)) for row in rows]
+    return Connection(
+        edges=edges,
+        page_info=PageInfo(has_next_page=next_cursor is not None, end_cursor=edges[-1].cursor if edges else after)
+    )
+
+
 # --- Query Resolvers ---
 
-def get_all_people_resolver() -> List[Person]:
+def get_all_people_resolver(info: strawberry.Info) -> List[Person]:
     """Resolver to fetch all people."""
-    cnx = None
     cursor = None
     try:
-        cnx = get_db_connection()
+        cnx = get_db_connection(info)
         cursor = cnx.cursor(dictionary=True)
         cursor.execute("SELECT id, firstName, lastName FROM Person ORDER BY lastName, firstName;")
         people = cursor.fetchall()
@@ -190,179 +513,104 @@ def get_all_people_resolver() -> List[Person]:
     finally:
         if cursor:
             cursor.close()
-        if cnx and cnx.is_connected():
-            cnx.close()
 
 
-def get_person_by_id_resolver(person_id: int) -> Optional[Person]:
+def get_person_by_id_resolver(info: strawberry.Info, person_id: int) -> Optional[Person]:
     """Resolver to fetch a person by ID."""
-    cnx = None
-    cursor = None
     try:
-        cnx = get_db_connection()
-        cursor = cnx.cursor(dictionary=True)
-        cursor.execute("SELECT id, firstName, lastName FROM Person WHERE id = %s;", (person_id,))
-        person = cursor.fetchone()
+        person = find_person(get_db_connection(info), person_id)
         if not person:
             return None
         return Person(id=person["id"], firstName=person["firstName"], lastName=person["lastName"])
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
-    finally:
-        if cursor:
-            cursor.close()
-        if cnx and cnx.is_connected():
-            cnx.close()
 
 
-def get_all_events_resolver() -> List[Event]:
+def get_all_events_resolver(info: strawberry.Info) -> List[Event]:
     """Resolver to fetch all events (basic info only)."""
-    cnx = None
-    cursor = None
     try:
-        cnx = get_db_connection()
-        cursor = cnx.cursor(dictionary=True)
-        cursor.execute("SELECT id, Name FROM Event ORDER BY Name;")
-        events = cursor.fetchall()
-        return [Event(id=e["id"], name=e["Name"]) for e in events]
+        events = list_events(get_db_connection(info), requested_event_fields(requested_fields(info)))
+        return [Event(id=e["id"], name=e.get("name")) for e in events]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
-    finally:
-        if cursor:
-            cursor.close()
-        if cnx and cnx.is_connected():
-            cnx.close()
 
 
-def get_all_events_with_counts_resolver() -> List[EventWithCustomData]:
-    """Resolver to fetch all events with their check-in counts from Redis."""
-    cnx = None
-    cursor = None
+async def get_all_events_with_counts_resolver(info: strawberry.Info) -> List[EventWithCustomData]:
+    """
+    Resolver to fetch all events with their check-in counts from Redis.
+    Costs one MySQL query, one MongoDB query and one Redis pipeline in total,
+    less any store whose fields the query did not ask for.
+    """
+    requested = requested_fields(info)
+    fields = requested_event_fields(requested)
     try:
-        cnx = get_db_connection()
-        cursor = cnx.cursor(dictionary=True)
-        cursor.execute("""
-                       SELECT id, Name, EventTypeID, PlaceID, StartDateTime, EndDateTime
-                       FROM Event
-                       ORDER BY Name;
-                       """)
-        events = cursor.fetchall()
-
-        result = []
-        redis_client = get_redis_client()
-
-        for event in events:
-            event_id = event["id"]
-
-            # Get custom field values from MongoDB
-            custom_field_values = None
-            try:
-                mongo_client = get_mongo_client()
-                mongo_collection = mongo_client["FP_YG_app"]["eventCustomData"]
-                custom_data = mongo_collection.find_one({"eventId": event_id})
-                if custom_data:
-                    custom_field_values = custom_data.get("custom_field_values")
-            except Exception:
-                pass
-
-            # Get check-in count from Redis
-            checked_in_count = 0
-            try:
-                if redis_client:
-                    checked_in_key = f"event:{event_id}:checkedIn"
-                    checked_in_count = redis_client.scard(checked_in_key)
-            except Exception:
-                pass
-
-            start_dt = event["StartDateTime"].isoformat() if event["StartDateTime"] else None
-            end_dt = event["EndDateTime"].isoformat() if event["EndDateTime"] else None
-
-            result.append(EventWithCustomData(
-                id=event["id"],
-                name=event["Name"],
-                event_type_id=event["EventTypeID"],
-                place_id=event["PlaceID"],
-                checked_in=checked_in_count,
-                start_date_time=start_dt,
-                end_date_time=end_dt,
-                custom_field_values=custom_field_values
-            ))
+        events = list_events(get_db_connection(info), fields)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
 
-        return result
+    loaders = get_loaders(info)
+    event_ids = [event["id"] for event in events]
+    for event in events:
+        loaders["event"].prime((event["id"], fields), event)
+
+    custom_field_values, checked_in_counts = await load_event_extras(info, requested, event_ids)
+    return [
+        build_event_with_custom_data(event, count, values)
+        for event, count, values in zip(events, checked_in_counts, custom_field_values)
+    ]
+
+
+async def get_event_by_id_resolver(info: strawberry.Info, event_id: int) -> Optional[EventWithCustomData]:
+    """
+    Resolver to fetch an event with custom data and check-in count.
+    Goes through the request's loaders, so several event(...) fields in one
+    query share one lookup per store.
+    """
+    requested = requested_fields(info)
+    try:
+        event = await get_loaders(info)["event"].load((event_id, requested_event_fields(requested)))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
-    finally:
-        if cursor:
-            cursor.close()
-        if cnx and cnx.is_connected():
-            cnx.close()
+    if not event:
+        return None
 
+    (custom_field_values,), (checked_in_count,) = await load_event_extras(info, requested, [event_id])
+    return build_event_with_custom_data(event, checked_in_count, custom_field_values)
 
-def get_event_by_id_resolver(event_id: int) -> Optional[EventWithCustomData]:
-    """Resolver to fetch an event with custom data and check-in count."""
-    cnx = None
-    cursor = None
-    try:
-        cnx = get_db_connection()
-        cursor = cnx.cursor(dictionary=True)
-        cursor.execute("""
-                       SELECT id, Name, EventTypeID, PlaceID, StartDateTime, EndDateTime
-                       FROM Event
-                       WHERE id = %s;
-                       """, (event_id,))
-        event = cursor.fetchone()
-        if not event:
-            return None
 
-        # Get custom field values from MongoDB
-        custom_field_values = None
-        try:
-            mongo_client = get_mongo_client()
-            mongo_collection = mongo_client["FP_YG_app"]["eventCustomData"]
-            custom_data = mongo_collection.find_one({"eventId": event_id})
-            if custom_data:
-                custom_field_values = custom_data.get("custom_field_values")
-        except Exception:
-            pass  # Don't fail if MongoDB lookup fails
+def people_connection_resolver(info: strawberry.Info, first: int = 20, after: Optional[str] = None) -> Connection[Person]:
+    """Resolver for one page of people, by last then first name."""
+    return load_connection(info, PEOPLE_PAGE, first, after,
+                           lambda p: Person(id=p["id"], firstName=p["firstName"], lastName=p["lastName"]))
 
-        # Get check-in count from Redis
-        checked_in_count = 0
-        try:
-            redis_client = get_redis_client()
-            if redis_client:
-                checked_in_key = f"event:{event_id}:checkedIn"
-                checked_in_count = redis_client.scard(checked_in_key)
-        except Exception:
-            pass  # Don't fail if Redis lookup fails
 
-        start_dt = event["StartDateTime"].isoformat() if event["StartDateTime"] else None
-        end_dt = event["EndDateTime"].isoformat() if event["EndDateTime"] else None
-
-        return EventWithCustomData(
-            id=event["id"],
-            name=event["Name"],
-            event_type_id=event["EventTypeID"],
-            place_id=event["PlaceID"],
-            checked_in=checked_in_count,
-            start_date_time=start_dt,
-            end_date_time=end_dt,
-            custom_field_values=custom_field_values
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {e}")
-    finally:
-        if cursor:
-            cursor.close()
-        if cnx and cnx.is_connected():
-            cnx.close()
+def students_connection_resolver(info: strawberry.Info, first: int = 20, after: Optional[str] = None) -> Connection[Student]:
+    """Resolver for one page of students, by last then first name."""
+    return load_connection(info, STUDENTS_PAGE, first, after,
+                           lambda s: Student(id=s["id"], firstName=s["firstName"], lastName=s["lastName"], grade=s["grade"]))
 
 
-def get_all_smallgroups_resolver() -> List[SmallGroup]:
+def parents_connection_resolver(info: strawberry.Info, first: int = 20, after: Optional[str] = None) -> Connection[Person]:
+    """Resolver for one page of parents, by last then first name."""
+    return load_connection(info, PARENTS_PAGE, first, after,
+                           lambda p: Person(id=p["parentID"], firstName=p["firstName"], lastName=p["lastName"]))
+
+
+def events_connection_resolver(info: strawberry.Info, first: int = 20, after: Optional[str] = None) -> Connection[Event]:
+    """Resolver for one page of events, by name."""
+    return load_connection(info, EVENTS_PAGE, first, after, lambda e: Event(id=e["id"], name=e["name"]))
+
+
+def small_groups_connection_resolver(info: strawberry.Info, first: int = 20, after: Optional[str] = None) -> Connection[SmallGroup]:
+    """Resolver for one page of small groups, by name."""
+    return load_connection(info, SMALL_GROUPS_PAGE, first, after, lambda sg: SmallGroup(id=sg["id"], name=sg["name"]))
+
+
+def get_all_smallgroups_resolver(info: strawberry.Info) -> List[SmallGroup]:
     """Resolver to fetch all small groups."""
-    cnx = None
     cursor = None
     try:
-        cnx = get_db_connection()
+        cnx = get_db_connection(info)
         cursor = cnx.cursor(dictionary=True)
         cursor.execute("SELECT id, Name FROM SmallGroup ORDER BY Name;")
         smallgroups = cursor.fetchall()
@@ -372,16 +620,13 @@ def get_all_smallgroups_resolver() -> List[SmallGroup]:
     finally:
         if cursor:
             cursor.close()
-        if cnx and cnx.is_connected():
-            cnx.close()
 
 
-def get_smallgroup_by_id_resolver(smallgroup_id: int) -> Optional[SmallGroup]:
+def get_smallgroup_by_id_resolver(info: strawberry.Info, smallgroup_id: int) -> Optional[SmallGroup]:
     """Resolver to fetch a small group by ID."""
-    cnx = None
     cursor = None
     try:
-        cnx = get_db_connection()
+        cnx = get_db_connection(info)
         cursor = cnx.cursor(dictionary=True)
         cursor.execute("SELECT id, Name FROM SmallGroup WHERE id = %s;", (smallgroup_id,))
         smallgroup = cursor.fetchone()
@@ -393,8 +638,6 @@ def get_smallgroup_by_id_resolver(smallgroup_id: int) -> Optional[SmallGroup]:
     finally:
         if cursor:
             cursor.close()
-        if cnx and cnx.is_connected():
-            cnx.close()
 
 
 def get_all_event_types_resolver() -> List[EventType]:
@@ -447,26 +690,16 @@ def get_event_type_by_id_resolver(type_id: int) -> Optional[EventType]:
         raise HTTPException(status_code=500, detail=f"MongoDB error: {e}")
 
 
-def get_checked_in_students_resolver(event_id: int) -> Optional[CheckedInResponse]:
+def get_checked_in_students_resolver(info: strawberry.Info, event_id: int) -> Optional[CheckedInResponse]:
     """Resolver to get all checked-in students for an event."""
     # Validate event exists
-    cnx = None
-    cursor = None
     try:
-        cnx = get_db_connection()
-        cursor = cnx.cursor(dictionary=True)
-        cursor.execute("SELECT ID, Name FROM Event WHERE ID = %s;", (event_id,))
-        event = cursor.fetchone()
+        event = find_event(get_db_connection(info), event_id)
         if not event:
             return None
-        event_name = event.get("Name") or event.get("name") or "Unknown"
+        event_name = event["name"] or "Unknown"
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"MySQL error: {e}")
-    finally:
-        if cursor:
-            cursor.close()
-        if cnx and cnx.is_connected():
-            cnx.close()
 
     # Get from Redis
     redis_client = get_redis_client()
@@ -474,24 +707,13 @@ def get_checked_in_students_resolver(event_id: int) -> Optional[CheckedInRespons
         raise HTTPException(status_code=503, detail="Redis connection not available")
 
     try:
-        checked_in_key = f"event:{event_id}:checkedIn"
-        check_in_times_key = f"event:{event_id}:checkInTimes"
-
-        student_ids = redis_client.smembers(checked_in_key)
-        if student_ids is None:
-            student_ids = set()
-
-        checked_in_list = []
-        for student_id in student_ids:
-            try:
-                student_id_int = int(student_id)
-                check_in_time = redis_client.hget(check_in_times_key, student_id)
-                checked_in_list.append(CheckedInStudent(
-                    student_id=student_id_int,
-                    check_in_time=check_in_time
-                ))
-            except (ValueError, TypeError):
-                continue
+        student_ids = get_checked_in_ids(redis_client, event_id)
+        check_in_times = get_check_in_times(redis_client, event_id, student_ids)
+
+        checked_in_list = [
+            CheckedInStudent(student_id=student_id, check_in_time=check_in_time)
+            for student_id, check_in_time in check_in_times.items()
+        ]
 
         return CheckedInResponse(
             event_id=event_id,
@@ -503,33 +725,50 @@ def get_checked_in_students_resolver(event_id: int) -> Optional[CheckedInRespons
         raise HTTPException(status_code=500, detail=f"Redis error: {e}")
 
 
-def get_check_in_count_resolver(event_id: int) -> Optional[CheckInCount]:
+def get_live_roster_resolver(info: strawberry.Info, event_id: int) -> Optional[LiveRoster]:
+    """
+    Resolver for an event's registered students with names and live check-in
+    state, from the Redis registration cache, presence, times and name hash.
+    MySQL is only used for the event name and anything not cached yet.
+    """
+    redis_client = get_redis_client()
+    if redis_client is None:
+        raise HTTPException(status_code=503, detail="Redis connection not available")
+
+    try:
+        cnx = get_db_connection(info)
+        event = find_event(cnx, event_id)
+        if not event:
+            return None
+        roster = load_live_roster(cnx, redis_client, event_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading live roster: {e}")
+
+    return LiveRoster(
+        event_id=event_id,
+        event_name=event["name"],
+        registered_count=roster["registered_count"],
+        checked_in_count=roster["checked_in_count"],
+        students=[LiveRosterStudent(**student) for student in roster["students"]]
+    )
+
+
+def get_check_in_count_resolver(info: strawberry.Info, event_id: int) -> Optional[CheckInCount]:
     """Resolver to get the check-in count for an event."""
-    cnx = None
-    cursor = None
     try:
-        cnx = get_db_connection()
-        cursor = cnx.cursor(dictionary=True)
-        cursor.execute("SELECT ID, Name FROM Event WHERE ID = %s;", (event_id,))
-        event = cursor.fetchone()
+        event = find_event(get_db_connection(info), event_id)
         if not event:
             return None
-        event_name = event.get("Name") or event.get("name") or "Unknown"
+        event_name = event["name"] or "Unknown"
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"MySQL error: {e}")
-    finally:
-        if cursor:
-            cursor.close()
-        if cnx and cnx.is_connected():
-            cnx.close()
 
     redis_client = get_redis_client()
     if redis_client is None:
         raise HTTPException(status_code=503, detail="Redis connection not available")
 
     try:
-        checked_in_key = f"event:{event_id}:checkedIn"
-        count = redis_client.scard(checked_in_key)
+        count = get_check_in_count(redis_client, event_id)
 
         return CheckInCount(
             event_id=event_id,
@@ -542,28 +781,24 @@ def get_check_in_count_resolver(event_id: int) -> Optional[CheckInCount]:
 
 # --- Mutation Resolvers ---
 
-def create_event_type_resolver(event_type_data: EventTypeCreateInput) -> EventType:
+def create_event_type_resolver(info: strawberry.Info, event_type_data: EventTypeCreateInput) -> EventType:
     """Resolver to create a new event type."""
     if not event_type_data.custom_fields:
         raise HTTPException(status_code=400, detail="You must provide at least one custom field.")
 
-    cnx = None
     cursor = None
     try:
-        cnx = get_db_connection()
+        cnx = get_db_connection(info)
         cursor = cnx.cursor()
         cursor.execute("INSERT INTO EventType (Name) VALUES (%s);", (event_type_data.name,))
         cnx.commit()
         event_type_id = cursor.lastrowid
     except Exception as e:
-        if cnx:
-            cnx.rollback()
+        cnx.rollback()
         raise HTTPException(status_code=500, detail=f"MySQL error: {e}")
     finally:
         if cursor:
             cursor.close()
-        if cnx and cnx.is_connected():
-            cnx.close()
 
     # Store in MongoDB
     try:
@@ -591,98 +826,141 @@ def create_event_type_resolver(event_type_data: EventTypeCreateInput) -> EventTy
     )
 
 
-def check_in_student_resolver(event_id: int, student_id: int) -> bool:
+def check_in_student_resolver(info: strawberry.Info, event_id: int, student_id: int) -> bool:
     """Resolver to check in a student. Returns true if successful."""
-    # Validate event and registration
-    cnx = None
-    cursor = None
-    try:
-        cnx = get_db_connection()
-        cursor = cnx.cursor(dictionary=True)
-        cursor.execute("SELECT ID FROM Event WHERE ID = %s;", (event_id,))
-        event = cursor.fetchone()
-        if not event:
-            raise HTTPException(status_code=404, detail="Event not found")
-
-        cursor.execute("""
-                       SELECT r.ID
-                       FROM Registration r
-                       WHERE r.StudentID = %s
-                         AND r.EventID = %s;
-                       """, (student_id, event_id))
-        registration = cursor.fetchone()
-        if not registration:
-            raise HTTPException(status_code=404, detail="Student not registered for this event")
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"MySQL error: {e}")
-    finally:
-        if cursor:
-            cursor.close()
-        if cnx and cnx.is_connected():
-            cnx.close()
-
-    # Add to Redis
     redis_client = get_redis_client()
     if redis_client is None:
         raise HTTPException(status_code=503, detail="Redis connection not available")
 
+    # Try the Redis registration cache first (set when the event is opened)
+    timestamp = datetime.now().isoformat()
     try:
-        checked_in_key = f"event:{event_id}:checkedIn"
-        check_in_times_key = f"event:{event_id}:checkInTimes"
-
-        if redis_client.sismember(checked_in_key, str(student_id)):
-            return True  # Already checked in
-
-        redis_client.sadd(checked_in_key, str(student_id))
-        timestamp = datetime.now().isoformat()
-        redis_client.hset(check_in_times_key, str(student_id), timestamp)
-        return True
+        status, count = redis_check_in(redis_client, event_id, student_id, timestamp,
+                                       use_registration_cache=True)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Redis error: {e}")
 
+    if status == REGISTRATIONS_NOT_CACHED:
+        # Validate event and registration in MySQL
+        try:
+            cnx = get_db_connection(info)
+            if not find_event(cnx, event_id):
+                raise HTTPException(status_code=404, detail="Event not found")
+
+            if find_registration_id(cnx, event_id, student_id) is None:
+                raise HTTPException(status_code=404, detail="Student not registered for this event")
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"MySQL error: {e}")
 
-def check_out_student_resolver(event_id: int, student_id: int) -> bool:
+        try:
+            status, count = redis_check_in(redis_client, event_id, student_id, timestamp)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Redis error: {e}")
+
+    if status == NOT_REGISTERED:
+        raise HTTPException(status_code=404, detail="Student not registered for this event")
+
+    if status == CHECKED_IN_ELSEWHERE:
+        raise HTTPException(status_code=409, detail=f"Student is already checked in to event {count}")
+
+    return True  # Also true if already checked in
+
+
+def check_out_student_resolver(info: strawberry.Info, event_id: int, student_id: int) -> bool:
     """Resolver to check out a student. Returns true if successful."""
-    cnx = None
-    cursor = None
     try:
-        cnx = get_db_connection()
-        cursor = cnx.cursor(dictionary=True)
-        cursor.execute("SELECT ID FROM Event WHERE ID = %s;", (event_id,))
-        event = cursor.fetchone()
-        if not event:
+        if not find_event(get_db_connection(info), event_id):
             raise HTTPException(status_code=404, detail="Event not found")
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"MySQL error: {e}")
-    finally:
-        if cursor:
-            cursor.close()
-        if cnx and cnx.is_connected():
-            cnx.close()
 
     redis_client = get_redis_client()
     if redis_client is None:
         raise HTTPException(status_code=503, detail="Redis connection not available")
 
     try:
-        checked_in_key = f"event:{event_id}:checkedIn"
-        check_out_times_key = f"event:{event_id}:checkOutTimes"
-
-        if not redis_client.sismember(checked_in_key, str(student_id)):
-            return False  # Not checked in
-
-        redis_client.srem(checked_in_key, str(student_id))
         timestamp = datetime.now().isoformat()
-        redis_client.hset(check_out_times_key, str(student_id), timestamp)
-        return True
+        removed, _ = redis_check_out(redis_client, event_id, student_id, timestamp)
+        return removed  # False if not checked in
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Redis error: {e}")
 
 
+# --- Subscription Resolvers ---
+
+async def check_in_feed_resolver(event_id: int) -> AsyncGenerator[CheckInActivity, None]:
+    """
+    Streams every check-in and check-out on an event as it happens, straight
+    from the Redis pub/sub channel the check-in scripts publish to.
+    """
+    # aclosing: unsubscribe as soon as the client stops the subscription
+    async with aclosing(listen_check_in_activity(event_id)) as activities:
+        async for activity in activities:
+            if activity is None:
+                continue  # idle tick, nothing to send
+            yield CheckInActivity(
+                type=activity["type"],
+                event_id=activity["event_id"],
+                student_id=activity["student_id"],
+                time=activity["time"],
+                count=activity["count"],
+            )
+
+
+async def check_in_count_resolver(info: strawberry.Info, event_id: int) -> AsyncGenerator[CheckInCount, None]:
+    """
+    Streams an event's checked-in count: the current count first, then the new
+    count after every check-in or check-out. The count comes with each pub/sub
+    message, so updates cost no extra Redis calls.
+    """
+    cnx = get_db_connection(info)
+    try:
+        event = find_event(cnx, event_id)
+    finally:
+        cnx.release()  # a subscription stays open for hours; don't hold a pooled connection
+    if event is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    yield CheckInCount(event_id=event_id, event_name=event["name"],
+                       checked_in_count=await async_get_check_in_count(get_async_redis_client(), event_id))
+    async with aclosing(listen_check_in_activity(event_id)) as activities:
+        async for activity in activities:
+            if activity is None:
+                continue
+            yield CheckInCount(event_id=event_id, event_name=event["name"], checked_in_count=activity["count"])
+
+
+async def check_in_activity_resolver(info: strawberry.Info, event_type_id: int) -> AsyncGenerator[CheckInActivity, None]:
+    """
+    Streams check-ins and check-outs on every event of a type. The events are
+    looked up when the subscription starts; events created later are not
+    included until the client resubscribes.
+    """
+    cnx = get_db_connection(info)
+    try:
+        event_ids = find_event_ids_for_type(cnx, event_type_id)
+    finally:
+        cnx.release()
+    if event_ids is None:
+        raise HTTPException(status_code=404, detail="Event type not found")
+
+    async with aclosing(listen_events_activity(event_ids)) as activities:
+        async for activity in activities:
+            if activity is None:
+                continue
+            yield CheckInActivity(
+                type=activity["type"],
+                event_id=activity["event_id"],
+                student_id=activity["student_id"],
+                time=activity["time"],
+                count=activity["count"],
+            )
+
+
 # --- Query Type ---
 
 @strawberry.type
@@ -724,6 +1002,31 @@ class Query:
         description="Retrieves a specific small group by ID from MySQL."
     )
 
+    peopleConnection: Connection[Person] = strawberry.field(
+        resolver=people_connection_resolver,
+        description="One page of people (first, after), by last then first name."
+    )
+
+    studentsConnection: Connection[Student] = strawberry.field(
+        resolver=students_connection_resolver,
+        description="One page of students (first, after), by last then first name."
+    )
+
+    parentsConnection: Connection[Person] = strawberry.field(
+        resolver=parents_connection_resolver,
+        description="One page of parents (first, after), by last then first name."
+    )
+
+    eventsConnection: Connection[Event] = strawberry.field(
+        resolver=events_connection_resolver,
+        description="One page of events (first, after), by name."
+    )
+
+    smallGroupsConnection: Connection[SmallGroup] = strawberry.field(
+        resolver=small_groups_connection_resolver,
+        description="One page of small groups (first, after), by name."
+    )
+
     eventTypes: List[EventType] = strawberry.field(
         resolver=get_all_event_types_resolver,
         description="Retrieves all event types with their custom field schemas from MongoDB."
@@ -739,6 +1042,11 @@ class Query:
         description="Gets all students currently checked in to an event from Redis."
     )
 
+    liveRoster: Optional[LiveRoster] = strawberry.field(
+        resolver=get_live_roster_resolver,
+        description="Gets an event's registered students with names and live check-in state in one call."
+    )
+
     checkInCount: Optional[CheckInCount] = strawberry.field(
         resolver=get_check_in_count_resolver,
         description="Gets the current count of students checked in to an event from Redis."
@@ -767,6 +1075,65 @@ class Mutation:
     )
 
 
+# --- Subscription Type ---
+
+@strawberry.type
+class Subscription:
+    """Defines all the subscriptions (live updates) available in the Youth Group GraphQL API."""
+
+    checkInFeed: CheckInActivity = strawberry.subscription(
+        resolver=check_in_feed_resolver,
+        description="Streams check-ins and check-outs for an event as they happen, via Redis pub/sub."
+    )
+
+    checkInCount: CheckInCount = strawberry.subscription(
+        resolver=check_in_count_resolver,
+        description="Streams an event's checked-in count: the current value, then every change."
+    )
+
+    checkInActivity: CheckInActivity = strawberry.subscription(
+        resolver=check_in_activity_resolver,
+        description="Streams check-ins and check-outs for every event of an event type."
+    )
+
+
+# --- Query Cost Limits ---
+# Weights for fields that cost more than one lookup, and the expected size of
+# list fields (anything not listed is assumed to return DEFAULT_LIST_SIZE items).
+
+FIELD_WEIGHTS = {
+    "Query.eventsWithCounts": 3,  # MySQL + MongoDB + Redis
+    "Query.event": 3,
+    "Query.liveRoster": 3,
+    "Query.checkedInStudents": 2,
+    "Query.checkInCount": 2,
+}
+
+LIST_SIZES = {
+    "Query.people": 200,
+    "Query.events": 100,
+    "Query.eventsWithCounts": 100,
+    "Query.smallGroups": 20,
+    "Person.smallGroups": 3,
+    "Student.parents": 2,
+    "SmallGroup.members": 25,
+    "Event.roster": 40,
+    "EventWithCustomData.roster": 40,
+    "Event.workers": 10,
+    "EventWithCustomData.workers": 10,
+}
+
+
 # --- Schema ---
 
-schema = strawberry.Schema(query=Query, mutation=Mutation)
+schema = strawberry.Schema(
+    query=Query,
+    mutation=Mutation,
+    subscription=Subscription,
+    extensions=[
+        lambda: ParserCache(maxsize=200),
+        PersistedQueryCache,
+        lambda: QueryCostLimiter(FIELD_WEIGHTS, LIST_SIZES),
+        ResolverTracing
+    ]
+)
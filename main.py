@@ -5,46 +5,64 @@
 
 
 import mysql.connector
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Response, Depends, Query
 from pydantic import BaseModel
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 import os
 import redis
-from datetime import datetime
-from typing import Optional, Dict, Any
+from datetime import date, datetime, timedelta
+from typing import Annotated, Optional, Dict, Any
 import traceback
 import logging
+import json
+import csv
+import io
+import asyncio
+import socket
+import threading
+import time
+import uuid
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from mongodb_implement import get_mongo_client, get_mongo_db
-from redis_implement import get_redis_client, get_redis_conn
+from mongodb_implement import get_mongo_client, get_mongo_db, get_async_mongo_client
+from mysql_implement import get_mysql_pool, get_db, RequestConnection
+from mysql_implement import get_async_mysql_pool, get_async_db, AsyncRequestConnection
+from mysql_implement import find_person, find_event, load_live_roster
+from mysql_implement import async_count_totals, async_find_event, async_find_registration_id
+from mysql_implement import fetch_page, async_fetch_page, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from mysql_implement import PEOPLE_PAGE, STUDENTS_PAGE, PARENTS_PAGE, VOLUNTEERS_PAGE, LEADERS_PAGE, EVENTS_PAGE, SMALL_GROUPS_PAGE
+from redis_implement import get_redis_client, get_redis_conn, get_async_redis_client
+from redis_implement import async_check_in, async_get_checked_in_ids, async_get_check_in_times
+from redis_implement import check_out as redis_check_out
+from redis_implement import check_in_many as redis_check_in_many, check_out_many as redis_check_out_many
+from redis_implement import get_check_in_count as redis_get_check_in_count
+from redis_implement import invalidate_query_cache
+from redis_implement import (
+    CHECKED_IN, ALREADY_CHECKED_IN, NOT_REGISTERED, REGISTRATIONS_NOT_CACHED, CHECKED_IN_ELSEWHERE,
+    open_event, close_event, cache_registration, uncache_registration, cache_student_names,
+    check_in_state_keys, get_checked_in_for_events,
+    get_attendance_times, clear_check_in_state, get_arrivals, get_arrival_histogram, get_student_location,
+    create_job, update_job, get_job, claim_finalize, renew_finalize, get_finalize_owner, release_finalize,
+    FINALIZE_LOCK_TTL,
+    ensure_attendance_group, read_attendance, claim_stale_attendance, ack_attendance, attendance_backlog,
+    dead_letter_attendance, has_dead_lettered_attendance, forget_dead_lettered_attendance,
+    listen_check_in_activity
+)
 
 # Load environment variables FIRST before using them
 load_dotenv("env")
 
-# --- Database Configuration ---
-DB_USER = "root"
-DB_PASSWORD = os.getenv("DB_PASS")
-DB_HOST = os.getenv("DB_HOST")
-DB_NAME = "FP_YG_app"
-
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 # --- Connection Pooling ---
-try:
-    db_pool = mysql.connector.pooling.MySQLConnectionPool(
-        pool_name="fastapi_pool",
-        pool_size=5,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        host=DB_HOST,
-        database=DB_NAME
-    )
-    print("Database connection pool created successfully.")
-except mysql.connector.Error as err:
-    print(f"Error creating connection pool: {err}")
-    exit()
+db_pool = get_mysql_pool()
 mongoDBclient = get_mongo_client()
 redisClient = get_redis_client()
+# asyncio clients for the async endpoints; they connect on first use
+asyncRedisClient = get_async_redis_client()
+asyncMongoClient = get_async_mongo_client()
 
 
 # --- FastAPI App ---
@@ -170,6 +188,31 @@ class EventUpdate(BaseModel):
     end_date_time: Optional[str] = None
 
 
+# Model for one scan in a kiosk batch; timestamp is the time the kiosk scanned
+class CheckInBatchItem(BaseModel):
+    student_id: int
+    timestamp: Optional[datetime] = None  # defaults to the server time
+
+# Model for a batch of check-ins or check-outs synced from a kiosk
+class CheckInBatch(BaseModel):
+    students: list[CheckInBatchItem]
+
+# --- Pagination ---
+# List endpoints return one page at a time: the first DEFAULT_PAGE_SIZE rows,
+# or ?limit=N rows (up to MAX_PAGE_SIZE). The X-Next-Cursor response header
+# (left out on the last page) is passed back as ?after=... to get the next page.
+
+PageLimit = Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)]
+
+
+def send_page(response: Response, page):
+    """Returns a page's rows, putting its next cursor in the X-Next-Cursor header."""
+    rows, next_cursor = page
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
+
+
 # --- API Endpoints ---
 @app.get("/")
 async def read_root():
@@ -182,31 +225,37 @@ async def read_root():
     return {"message": "Welcome to the Youth Group API! Visit /demo for the frontend."}
 
 
+@app.get("/counts")
+async def get_counts(cnx: AsyncRequestConnection = Depends(get_async_db)):
+    """
+    How many events, people and small groups there are, for the dashboard.
+    """
+    try:
+        return await async_count_totals(cnx)
+    except mysql.connector.Error as err:
+        raise HTTPException(status_code=500, detail=f"Database error: {err}")
+
+
 @app.get("/people", response_model=list[Person])
-def get_all_people():
+async def get_all_people(response: Response, limit: PageLimit = DEFAULT_PAGE_SIZE, after: Optional[str] = None,
+                         cnx: AsyncRequestConnection = Depends(get_async_db)):
     """
-    Retrieves a list of all people.
+    Retrieves a list of all people, by last then first name.
+    Returns one page at a time; see Pagination above.
     """
     try:
-        cnx = db_pool.get_connection()
-        cursor = cnx.cursor(dictionary=True)
-        cursor.execute("SELECT id, firstName, lastName FROM Person ORDER BY lastName, firstName;")
-        people = cursor.fetchall()
-        return people
+        return send_page(response, await async_fetch_page(cnx, *PEOPLE_PAGE, limit, after))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except mysql.connector.Error as err:
         raise HTTPException(status_code=500, detail=f"Database error: {err}")
-    finally:
-        if 'cnx' in locals() and cnx.is_connected():
-            cursor.close()
-            cnx.close()
 
 @app.get("/people/search", response_model=list[Person])
-def search_people_by_name(name: str):
+def search_people_by_name(name: str, cnx: RequestConnection = Depends(get_db)):
     """
     Search for people by first or last name (partial, case-insensitive match)
     """
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor(dictionary=True)
 
         query = """
@@ -227,39 +276,28 @@ def search_people_by_name(name: str):
         raise HTTPException(status_code=500, detail=f"Database error: {err}")
 
     finally:
-        if 'cnx' in locals() and cnx.is_connected():
+        if 'cursor' in locals():
             cursor.close()
-            cnx.close()
 
 @app.get("/people/{person_id}", response_model=Person)
-def get_person_by_id(person_id: int):
+def get_person_by_id(person_id: int, cnx: RequestConnection = Depends(get_db)):
     """
     Retrieves a specific person by their ID.
     """
     try:
-        cnx = db_pool.get_connection()
-        cursor = cnx.cursor(dictionary=True)
-        # Use parameterized query to prevent SQL injection
-        query = "SELECT id, firstName, lastName FROM Person WHERE id = %s;"
-        cursor.execute(query, (person_id,))
-        person = cursor.fetchone()
+        person = find_person(cnx, person_id)
         if not person:
             raise HTTPException(status_code=404, detail="Person not found")
         return person
     except mysql.connector.Error as err:
         raise HTTPException(status_code=500, detail=f"Database error: {err}")
-    finally:
-        if 'cnx' in locals() and cnx.is_connected():
-            cursor.close()
-            cnx.close()
 
 @app.get("/people/{person_id}/smallgroups")
-def get_smallgroups_for_person(person_id: int):
+def get_smallgroups_for_person(person_id: int, cnx: RequestConnection = Depends(get_db)):
     """
        Retrieves a specific person's small groups
        """
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor(dictionary=True)
         query = """
             SELECT SmallGroup.id, SmallGroup.name
@@ -271,35 +309,28 @@ def get_smallgroups_for_person(person_id: int):
         return cursor.fetchall()
     finally:
         cursor.close()
-        cnx.close()
 
 
 @app.get("/parents", response_model=list[Parent])
-def get_all_parents():
+def get_all_parents(response: Response, limit: PageLimit = DEFAULT_PAGE_SIZE, after: Optional[str] = None,
+                    cnx: RequestConnection = Depends(get_db)):
     """
-       Gets all parents.
+       Gets all parents, by last then first name.
+       Returns one page at a time; see Pagination above.
        """
     try:
-        cnx = db_pool.get_connection()
-        cursor = cnx.cursor(dictionary=True)
-        query = """
-            SELECT Parent.parentID, firstName, lastName
-            FROM Parent 
-            JOIN Person ON Parent.parentID = Person.id;
-        """
-        cursor.execute(query)
-        return cursor.fetchall()
-    finally:
-        cursor.close()
-        cnx.close()
+        return send_page(response, fetch_page(cnx, *PARENTS_PAGE, limit, after))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except mysql.connector.Error as err:
+        raise HTTPException(status_code=500, detail=f"Database error: {err}")
 
 @app.get("/parents/search", response_model=list[Parent])
-def search_parents_by_name(name: str):
+def search_parents_by_name(name: str, cnx: RequestConnection = Depends(get_db)):
     """
     Search for parents by first or last name (partial, case-insensitive match)
     """
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor(dictionary=True)
 
         query = """
@@ -321,18 +352,16 @@ def search_parents_by_name(name: str):
         raise HTTPException(status_code=500, detail=f"Database error: {err}")
 
     finally:
-        if 'cnx' in locals() and cnx.is_connected():
+        if 'cursor' in locals():
             cursor.close()
-            cnx.close()
 
 @app.get("/parents/{parent_id}", response_model=Parent)
-def get_parent_by_id(parent_id: int):
+def get_parent_by_id(parent_id: int, cnx: RequestConnection = Depends(get_db)):
     """
        Retrieves a specific parent by their ID.
        """
 
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor(dictionary=True)
         query = """
             SELECT parentID, firstName, lastName
@@ -346,15 +375,13 @@ def get_parent_by_id(parent_id: int):
         return parent
     finally:
         cursor.close()
-        cnx.close()
 
 @app.get("/parents/{parent_id}/students", response_model=list[Student])
-def get_students_of_parent(parent_id: int):
+def get_students_of_parent(parent_id: int, cnx: RequestConnection = Depends(get_db)):
     """
     Retrieves all students associated with a given parent
     """
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor(dictionary=True)
 
         query = """
@@ -374,39 +401,33 @@ def get_students_of_parent(parent_id: int):
         raise HTTPException(status_code=500, detail=f"Database error: {err}")
 
     finally:
-        if 'cnx' in locals() and cnx.is_connected():
+        if 'cursor' in locals():
             cursor.close()
-            cnx.close()
 
 
 
 
 
 @app.get("/students", response_model=list[Student])
-def get_all_students():
+def get_all_students(response: Response, limit: PageLimit = DEFAULT_PAGE_SIZE, after: Optional[str] = None,
+                     cnx: RequestConnection = Depends(get_db)):
     """
-    Retrieves a list of all students
+    Retrieves a list of all students, by last then first name.
+    Returns one page at a time; see Pagination above.
     """
     try:
-        cnx = db_pool.get_connection()
-        cursor = cnx.cursor(dictionary=True)
-        cursor.execute("SELECT id, firstName, lastName, grade FROM Person JOIN Student ON Student.studentID = Person.id  ORDER BY lastName, firstName;")
-        students = cursor.fetchall()
-        return students
+        return send_page(response, fetch_page(cnx, *STUDENTS_PAGE, limit, after))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except mysql.connector.Error as err:
         raise HTTPException(status_code=500, detail=f"Database error: {err}")
-    finally:
-        if 'cnx' in locals() and cnx.is_connected():
-            cursor.close()
-            cnx.close()
 
 @app.get("/students/search", response_model=list[Student])
-def search_students_by_name(name: str):
+def search_students_by_name(name: str, cnx: RequestConnection = Depends(get_db)):
     """
     Search for students by first or last name (partial, case-insensitive match)
     """
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor(dictionary=True)
 
         query = """
@@ -429,16 +450,15 @@ def search_students_by_name(name: str):
         raise HTTPException(status_code=500, detail=f"Database error: {err}")
 
     finally:
-        if 'cnx' in locals() and cnx.is_connected():
+        if 'cursor' in locals():
             cursor.close()
 
 @app.get("/students/grade/{student_grade}", response_model=list[Student])
-def get_students_by_grade(student_grade: int):
+def get_students_by_grade(student_grade: int, cnx: RequestConnection = Depends(get_db)):
     """
     Retrieve students by grade
     """
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor(dictionary=True)
         # Use parameterized query to prevent SQL injection
         query = "SELECT id, firstName, lastName, grade FROM Person JOIN Student ON Student.studentID = Person.id WHERE Grade = %s ORDER BY lastName, firstName;"
@@ -450,17 +470,15 @@ def get_students_by_grade(student_grade: int):
     except mysql.connector.Error as err:
         raise HTTPException(status_code=500, detail=f"Database error: {err}")
     finally:
-        if 'cnx' in locals() and cnx.is_connected():
+        if 'cursor' in locals():
             cursor.close()
-            cnx.close()
 
 @app.get("/students/{student_id}", response_model=Student)
-def get_student_by_id(student_id: int):
+def get_student_by_id(student_id: int, cnx: RequestConnection = Depends(get_db)):
     """
     Retrieves a specific student by their ID.
     """
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor(dictionary=True)
         # Use parameterized query to prevent SQL injection
         query = "SELECT id, firstName, lastName, grade FROM Person JOIN Student ON Student.studentID = Person.id WHERE id = %s;"
@@ -472,17 +490,15 @@ def get_student_by_id(student_id: int):
     except mysql.connector.Error as err:
         raise HTTPException(status_code=500, detail=f"Database error: {err}")
     finally:
-        if 'cnx' in locals() and cnx.is_connected():
+        if 'cursor' in locals():
             cursor.close()
-            cnx.close()
 
 @app.get("/students/{student_id}/parents", response_model=list[Parent])
-def get_parents_of_student(student_id: int):
+def get_parents_of_student(student_id: int, cnx: RequestConnection = Depends(get_db)):
     """
        Retrieves the parents of a specific student
        """
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor(dictionary=True)
 
         query = """
@@ -496,34 +512,49 @@ def get_parents_of_student(student_id: int):
         return cursor.fetchall()
     finally:
         cursor.close()
-        cnx.close()
+
+
+@app.get("/students/{student_id}/location")
+def get_student_current_location(student_id: int):
+    """
+    Returns the event a student is checked in to right now, if any.
+    Answered from a single Redis hash lookup.
+    """
+    if redisClient is None:
+        raise HTTPException(status_code=503, detail="Redis connection not available")
+
+    try:
+        event_id = get_student_location(redisClient, student_id)
+    except redis.RedisError as e:
+        raise HTTPException(status_code=500, detail=f"Redis error: {e}")
+
+    return {
+        "student_id": student_id,
+        "checked_in": event_id is not None,
+        "event_id": event_id
+    }
 
 
 @app.get("/events", response_model=list[Event])
-def get_all_events():
+async def get_all_events(response: Response, limit: PageLimit = DEFAULT_PAGE_SIZE, after: Optional[str] = None,
+                         cnx: AsyncRequestConnection = Depends(get_async_db)):
     """
-    Retrieves a list of all events
+    Retrieves a list of all events, by name.
+    Returns one page at a time; see Pagination above.
     """
     try:
-        cnx = db_pool.get_connection()
-        cursor = cnx.cursor(dictionary=True)
-        cursor.execute("SELECT id, name FROM Event ORDER BY name;")
-        events = cursor.fetchall()
-        return events
+        return send_page(response, await async_fetch_page(cnx, *EVENTS_PAGE, limit, after))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except mysql.connector.Error as err:
         raise HTTPException(status_code=500, detail=f"Database error: {err}")
-    finally:
-        if 'cnx' in locals() and cnx.is_connected():
-            cursor.close()
-            cnx.close()
 
 @app.get("/events/search", response_model=list[Event])
-def search_events_by_name(name: str):
+def search_events_by_name(name: str, cnx: RequestConnection = Depends(get_db)):
     """
     Search for events by name (partial, case-insensitive match)
     """
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor(dictionary=True)
 
         query = """
@@ -543,34 +574,24 @@ def search_events_by_name(name: str):
         raise HTTPException(status_code=500, detail=f"Database error: {err}")
 
     finally:
-        if 'cnx' in locals() and cnx.is_connected():
+        if 'cursor' in locals():
             cursor.close()
-            cnx.close()
 
 @app.get("/events/{event_id}", response_model=Event)
-def get_event_by_id(event_id: int):
+async def get_event_by_id(event_id: int, cnx: AsyncRequestConnection = Depends(get_async_db)):
     """
        Retrieves a specific event by its ID.
        """
     try:
-        cnx = db_pool.get_connection()
-        cursor = cnx.cursor(dictionary=True)
-        # Use parameterized query to prevent SQL injection
-        query = "SELECT id, name FROM Event WHERE id = %s;"
-        cursor.execute(query, (event_id,))
-        event = cursor.fetchone()
+        event = await async_find_event(cnx, event_id)
         if not event:
             raise HTTPException(status_code=404, detail="Event not found")
         return event
     except mysql.connector.Error as err:
         raise HTTPException(status_code=500, detail=f"Database error: {err}")
-    finally:
-        if 'cnx' in locals() and cnx.is_connected():
-            cursor.close()
-            cnx.close()
 
 @app.post("/events/{event_id}/assign", status_code=201)
-def assign_to_event(event_id: int, data: ShiftAssign):
+def assign_to_event(event_id: int, data: ShiftAssign, cnx: RequestConnection = Depends(get_db)):
     """
     Assign a volunteer or leader to an event with a specific task.
     Exactly one of volunteerID or leaderID must be provided.
@@ -579,7 +600,6 @@ def assign_to_event(event_id: int, data: ShiftAssign):
         raise HTTPException(400, "Provide either volunteerID OR leaderID, not both")
 
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor()
 
         cursor.execute("""
@@ -593,15 +613,13 @@ def assign_to_event(event_id: int, data: ShiftAssign):
 
     finally:
         cursor.close()
-        cnx.close()
 
 @app.get("/events/{event_id}/workers")
-def get_event_workers(event_id: int):
+def get_event_workers(event_id: int, cnx: RequestConnection = Depends(get_db)):
     """
     Returns all volunteers and leaders assigned to an event, with task info.
     """
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor(dictionary=True)
 
         # ---- GET VOLUNTEERS ----
@@ -648,15 +666,13 @@ def get_event_workers(event_id: int):
 
     finally:
         cursor.close()
-        cnx.close()
 
 @app.get("/events/{event_id}/roster")
-def get_event_roster(event_id: int):
+def get_event_roster(event_id: int, cnx: RequestConnection = Depends(get_db)):
     """
        Retrieves the registration for a specific event.
     """
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor(dictionary=True)
         query = """
             SELECT Registration.id AS RegistrationID, Student.studentID, firstName, lastName
@@ -669,22 +685,143 @@ def get_event_roster(event_id: int):
         return cursor.fetchall()
     finally:
         cursor.close()
-        cnx.close()
+
+
+@app.post("/events/{event_id}/register/{student_id}", status_code=201)
+def register_student_for_event(event_id: int, student_id: int, cnx: RequestConnection = Depends(get_db)):
+    """
+    Registers a student for an event.
+    Keeps the Redis registration cache in sync if the event is open.
+    """
+    cursor = None
+    try:
+        cursor = cnx.cursor()
+
+        cursor.execute(
+            "INSERT INTO Registration (StudentID, EventID) VALUES (%s, %s);",
+            (student_id, event_id)
+        )
+        cnx.commit()
+        registration_id = cursor.lastrowid
+    except mysql.connector.Error as err:
+        raise HTTPException(400, str(err))
+    finally:
+        if cursor:
+            cursor.close()
+
+    if redisClient is not None:
+        try:
+            cache_registration(redisClient, event_id, student_id, registration_id)
+        except redis.RedisError as e:
+            logger.error(f"Redis error caching registration for event {event_id}: {e}")
+
+    return {"message": "Student registered for event", "registration_id": registration_id}
+
+
+@app.delete("/events/{event_id}/register/{student_id}")
+def unregister_student_from_event(event_id: int, student_id: int, cnx: RequestConnection = Depends(get_db)):
+    """
+    Removes a student's registration for an event.
+    Keeps the Redis registration cache in sync if the event is open.
+    """
+    cursor = None
+    try:
+        cursor = cnx.cursor()
+
+        cursor.execute(
+            "DELETE FROM Registration WHERE StudentID = %s AND EventID = %s;",
+            (student_id, event_id)
+        )
+        cnx.commit()
+    except mysql.connector.Error as err:
+        raise HTTPException(status_code=500, detail=f"Database error: {err}")
+    finally:
+        if cursor:
+            cursor.close()
+
+    if redisClient is not None:
+        try:
+            uncache_registration(redisClient, event_id, student_id)
+        except redis.RedisError as e:
+            logger.error(f"Redis error removing cached registration for event {event_id}: {e}")
+
+    return {"message": "Student unregistered from event"}
+
+
+@app.post("/events/{event_id}/open", status_code=200)
+def open_event_for_check_in(event_id: int, cnx: RequestConnection = Depends(get_db)):
+    """
+    Opens an event for check-in by loading its registrations into Redis.
+    While an event is open, check-in validates students from Redis only
+    and does not touch MySQL.
+    """
+    cursor = None
+    try:
+        if not find_event(cnx, event_id):
+            raise HTTPException(status_code=404, detail="Event not found")
+
+        cursor = cnx.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT Registration.ID, Registration.StudentID, Person.firstName, Person.lastName
+            FROM Registration
+            JOIN Person ON Registration.StudentID = Person.id
+            WHERE Registration.EventID = %s;
+        """, (event_id,))
+        rows = cursor.fetchall()
+        registrations = {row["StudentID"]: row["ID"] for row in rows}
+        names = {row["StudentID"]: f"{row['firstName']} {row['lastName']}" for row in rows}
+    except HTTPException:
+        raise
+    except mysql.connector.Error as err:
+        raise HTTPException(status_code=500, detail=f"MySQL error: {err}")
+    finally:
+        if cursor:
+            cursor.close()
+
+    if redisClient is None:
+        raise HTTPException(status_code=503, detail="Redis connection not available")
+
+    try:
+        count = open_event(redisClient, event_id, registrations)
+        cache_student_names(redisClient, names)  # warm names for the live roster
+    except redis.RedisError as e:
+        raise HTTPException(status_code=500, detail=f"Redis error: {e}")
+
+    return {
+        "message": "Event opened for check-in",
+        "event_id": event_id,
+        "registrations_cached": count
+    }
+
+
+@app.delete("/events/{event_id}/open", status_code=200)
+def close_event_for_check_in(event_id: int):
+    """
+    Drops the cached registrations for an event.
+    Check-in keeps working but validates against MySQL again.
+    """
+    if redisClient is None:
+        raise HTTPException(status_code=503, detail="Redis connection not available")
+
+    try:
+        close_event(redisClient, event_id)
+    except redis.RedisError as e:
+        raise HTTPException(status_code=500, detail=f"Redis error: {e}")
+
+    return {"message": "Event registration cache cleared", "event_id": event_id}
 
 
 @app.post("/events", status_code=201)
-def create_event_with_custom_data(event_data: EventCreate):
+def create_event_with_custom_data(event_data: EventCreate, cnx: RequestConnection = Depends(get_db)):
     """
     Creates a new event with custom field values.
     - Stores base event in MySQL
     - Stores custom field values in MongoDB
     """
     # --- VALIDATE EVENT TYPE EXISTS ---
-    cnx = None
     cursor = None
     event_id = None
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor(dictionary=True)
         cursor.execute("SELECT id FROM EventType WHERE id = %s;", (event_data.event_type_id,))
         event_type = cursor.fetchone()
@@ -716,12 +853,10 @@ def create_event_with_custom_data(event_data: EventCreate):
         event_id = cursor.lastrowid
 
     except HTTPException:
-        if cnx and hasattr(cnx, 'is_connected') and cnx.is_connected():
-            cnx.rollback()
+        cnx.rollback()
         raise
     except mysql.connector.Error as err:
-        if cnx and hasattr(cnx, 'is_connected') and cnx.is_connected():
-            cnx.rollback()
+        cnx.rollback()
         error_msg = str(err)
         if hasattr(err, 'msg'):
             error_msg = err.msg
@@ -732,8 +867,7 @@ def create_event_with_custom_data(event_data: EventCreate):
         logger.error(f"Dates: start={event_data.start_date_time}, end={event_data.end_date_time}")
         raise HTTPException(status_code=500, detail=f"MySQL error: {error_msg}")
     except Exception as e:
-        if cnx and hasattr(cnx, 'is_connected') and cnx.is_connected():
-            cnx.rollback()
+        cnx.rollback()
         logger.error(f"Unexpected error in create_event: {type(e).__name__}: {e}")
         import traceback
         logger.error(traceback.format_exc())
@@ -744,12 +878,6 @@ def create_event_with_custom_data(event_data: EventCreate):
                 cursor.close()
             except Exception:
                 pass
-        if cnx:
-            try:
-                if hasattr(cnx, 'is_connected') and cnx.is_connected():
-                    cnx.close()
-            except Exception:
-                pass
 
     # --- STORE CUSTOM FIELD VALUES IN MONGO (if provided) ---
     if event_data.custom_field_values and event_id:
@@ -794,55 +922,33 @@ def create_event_with_custom_data(event_data: EventCreate):
 
 
 @app.get("/events/{event_id}/view-custom", response_model=EventWithCustomData)
-def get_event_with_custom_data(event_id: int):
+async def get_event_with_custom_data(event_id: int, cnx: AsyncRequestConnection = Depends(get_async_db)):
     """
     Retrieves an event with its custom field values from both MySQL and MongoDB.
+    The two lookups run concurrently.
     """
-    # --- GET BASE EVENT FROM MYSQL ---
-    try:
-        cnx = db_pool.get_connection()
-        cursor = cnx.cursor(dictionary=True)
-
-        query = """
-                SELECT id, name, eventTypeID, placeID, StartDateTime, EndDateTime
-                FROM Event
-                WHERE id = %s; \
-                """
-        cursor.execute(query, (event_id,))
-        event = cursor.fetchone()
-
-        if not event:
-            raise HTTPException(status_code=404, detail="Event not found")
-
-    except HTTPException:
-        raise
-
-    except mysql.connector.Error as err:
-        raise HTTPException(status_code=500, detail=f"MySQL error: {err}")
-
-    finally:
+    async def fetch_event():
+        # --- GET BASE EVENT FROM MYSQL ---
         try:
-            if cursor is not None:
-                cursor.close()
-        except:
-            pass
+            return await async_find_event(cnx, event_id)
+        except mysql.connector.Error as err:
+            raise HTTPException(status_code=500, detail=f"MySQL error: {err}")
 
+    async def fetch_custom_field_values():
+        # --- GET CUSTOM FIELD VALUES FROM MONGO ---
         try:
-            if cnx is not None:
-                cnx.close()
-        except:
+            mongo_collection = asyncMongoClient["FP_YG_app"]["eventCustomData"]
+            custom_data = await mongo_collection.find_one({"eventId": event_id})
+            if custom_data:
+                return custom_data.get("custom_field_values")
+        except Exception as e:
+            # Don't fail if MongoDB lookup fails, just return None for custom data
             pass
+        return None
 
-    # --- GET CUSTOM FIELD VALUES FROM MONGO ---
-    custom_field_values = None
-    try:
-        mongo_collection = mongoDBclient["FP_YG_app"]["eventCustomData"]
-        custom_data = mongo_collection.find_one({"eventId": event_id})
-        if custom_data:
-            custom_field_values = custom_data.get("custom_field_values")
-    except Exception as e:
-        # Don't fail if MongoDB lookup fails, just return None for custom data
-        pass
+    event, custom_field_values = await asyncio.gather(fetch_event(), fetch_custom_field_values())
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
 
     # Format datetime for response
     start_dt = event["StartDateTime"].isoformat() if event["StartDateTime"] else None
@@ -851,8 +957,8 @@ def get_event_with_custom_data(event_id: int):
     return EventWithCustomData(
         id=event["id"],
         name=event["name"],
-        event_type_id=event["eventTypeID"],
-        place_id=event["placeID"],
+        event_type_id=event["EventTypeID"],
+        place_id=event["PlaceID"],
         start_date_time=start_dt,
         end_date_time=end_dt,
         custom_field_values=custom_field_values
@@ -860,7 +966,7 @@ def get_event_with_custom_data(event_id: int):
 
 
 @app.put("/events/{event_id}/custom-data", status_code=200)
-def update_event_custom_data(event_id: int, custom_data_update: EventCustomDataUpdate):
+def update_event_custom_data(event_id: int, custom_data_update: EventCustomDataUpdate, cnx: RequestConnection = Depends(get_db)):
     """
     Updates the custom field values for an existing event.
     - Validates event exists
@@ -869,29 +975,14 @@ def update_event_custom_data(event_id: int, custom_data_update: EventCustomDataU
     """
     # --- VALIDATE EVENT EXISTS AND GET EVENT TYPE ---
     try:
-        cnx = db_pool.get_connection()
-        cursor = cnx.cursor(dictionary=True)
-        query = """
-                SELECT id, Name, EventTypeID
-                FROM Event \
-                WHERE id = %s; \
-                """
-        cursor.execute(query, (event_id,))
-        event = cursor.fetchone()
+        event = find_event(cnx, event_id)
         if not event:
             raise HTTPException(status_code=404, detail="Event not found")
         event_type_id = event["EventTypeID"]
-        cursor.close()
-        cnx.close()
     except HTTPException:
         raise
     except mysql.connector.Error as err:
         raise HTTPException(status_code=500, detail=f"MySQL error: {err}")
-    finally:
-        if cursor:
-            cursor.close()
-        if cnx and cnx.is_connected():
-            cnx.close()
 
     # --- VALIDATE CUSTOM FIELDS MATCH EVENT TYPE SCHEMA ---
     try:
@@ -972,7 +1063,7 @@ def update_event_custom_data(event_id: int, custom_data_update: EventCustomDataU
         return {
             "message": f"Event custom data {action} successfully",
             "event_id": event_id,
-            "event_name": event["Name"],
+            "event_name": event["name"],
             "event_type_id": event_type_id,
             "custom_field_values": custom_data_update.custom_field_values,
             "action": action
@@ -983,24 +1074,20 @@ def update_event_custom_data(event_id: int, custom_data_update: EventCustomDataU
 
 
 @app.put("/events/{event_id}", status_code=200)
-def update_event(event_id: int, event_update: EventUpdate):
+def update_event(event_id: int, event_update: EventUpdate, cnx: RequestConnection = Depends(get_db)):
     """
     Updates an event's base fields (name, event_type_id, place_id, dates).
     Only provided fields will be updated.
     """
-    cnx = None
     cursor = None
     try:
-        cnx = db_pool.get_connection()
-        cursor = cnx.cursor(dictionary=True)
-
         # Check if event exists
-        cursor.execute("SELECT id, Name, EventTypeID, PlaceID, StartDateTime, EndDateTime FROM Event WHERE id = %s;",
-                       (event_id,))
-        event = cursor.fetchone()
+        event = find_event(cnx, event_id)
         if not event:
             raise HTTPException(status_code=404, detail="Event not found")
 
+        cursor = cnx.cursor(dictionary=True)
+
         # Build update query dynamically based on provided fields
         updates = []
         params = []
@@ -1053,40 +1140,32 @@ def update_event(event_id: int, event_update: EventUpdate):
     except HTTPException:
         raise
     except mysql.connector.Error as err:
-        if cnx:
-            cnx.rollback()
+        cnx.rollback()
         raise HTTPException(status_code=500, detail=f"MySQL error: {err}")
     finally:
         if cursor:
             cursor.close()
-        if cnx and cnx.is_connected():
-            cnx.close()
 
 @app.get("/smallgroups", response_model=list[SmallGroup])
-def get_all_smallgroups():
+async def get_all_smallgroups(response: Response, limit: PageLimit = DEFAULT_PAGE_SIZE, after: Optional[str] = None,
+                              cnx: AsyncRequestConnection = Depends(get_async_db)):
     """
-    Retrieves a list of all small groups
+    Retrieves a list of all small groups, by name.
+    Returns one page at a time; see Pagination above.
     """
     try:
-        cnx = db_pool.get_connection()
-        cursor = cnx.cursor(dictionary=True)
-        cursor.execute("SELECT id, name FROM SmallGroup ORDER BY name;")
-        smallgroups = cursor.fetchall()
-        return smallgroups
+        return send_page(response, await async_fetch_page(cnx, *SMALL_GROUPS_PAGE, limit, after))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except mysql.connector.Error as err:
         raise HTTPException(status_code=500, detail=f"Database error: {err}")
-    finally:
-        if 'cnx' in locals() and cnx.is_connected():
-            cursor.close()
-            cnx.close()
 
 @app.get("/smallgroups/search", response_model=list[SmallGroup])
-def search_smallgroups_by_name(name: str):
+def search_smallgroups_by_name(name: str, cnx: RequestConnection = Depends(get_db)):
     """
     Search for small groups by name (partial, case-insensitive match)
     """
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor(dictionary=True)
 
         query = """
@@ -1106,16 +1185,14 @@ def search_smallgroups_by_name(name: str):
         raise HTTPException(status_code=500, detail=f"Database error: {err}")
 
     finally:
-        if 'cnx' in locals() and cnx.is_connected():
+        if 'cursor' in locals():
             cursor.close()
-            cnx.close()
 @app.get("/smallgroups/{smallgroup_id}", response_model=SmallGroup)
-def get_smallgroup_by_id(smallgroup_id: int):
+def get_smallgroup_by_id(smallgroup_id: int, cnx: RequestConnection = Depends(get_db)):
     """
        Retrieves a specific small group by their ID.
        """
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor(dictionary=True)
         # Use parameterized query to prevent SQL injection
         query = "SELECT id, name FROM SmallGroup WHERE id = %s;"
@@ -1127,17 +1204,15 @@ def get_smallgroup_by_id(smallgroup_id: int):
     except mysql.connector.Error as err:
         raise HTTPException(status_code=500, detail=f"Database error: {err}")
     finally:
-        if 'cnx' in locals() and cnx.is_connected():
+        if 'cursor' in locals():
             cursor.close()
-            cnx.close()
 
 @app.get("/smallgroups/{group_id}/roster")
-def get_small_group_roster(group_id: int):
+def get_small_group_roster(group_id: int, cnx: RequestConnection = Depends(get_db)):
     """
        Retrieves the roster for a small group
        """
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor(dictionary=True)
 
         cursor.execute("""
@@ -1151,15 +1226,13 @@ def get_small_group_roster(group_id: int):
         return cursor.fetchall()
     finally:
         cursor.close()
-        cnx.close()
 
 @app.post("/smallgroups/{group_id}/add/{person_id}")
-def add_person_to_small_group(group_id: int, person_id: int):
+def add_person_to_small_group(group_id: int, person_id: int, cnx: RequestConnection = Depends(get_db)):
     """
        Adds a person to a small group
        """
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor()
 
         cursor.execute(
@@ -1172,15 +1245,13 @@ def add_person_to_small_group(group_id: int, person_id: int):
         raise HTTPException(400, str(err))
     finally:
         cursor.close()
-        cnx.close()
 
 @app.delete("/smallgroups/{group_id}/remove/{person_id}")
-def remove_person_from_small_group(group_id: int, person_id: int):
+def remove_person_from_small_group(group_id: int, person_id: int, cnx: RequestConnection = Depends(get_db)):
     """
        Removes a person from a small group
        """
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor()
 
         cursor.execute(
@@ -1191,32 +1262,27 @@ def remove_person_from_small_group(group_id: int, person_id: int):
         return {"message": "Person removed from group"}
     finally:
         cursor.close()
-        cnx.close()
 
 @app.get("/volunteers", response_model=list[VolunteerOutput])
-def get_volunteers():
+def get_volunteers(response: Response, limit: PageLimit = DEFAULT_PAGE_SIZE, after: Optional[str] = None,
+                   cnx: RequestConnection = Depends(get_db)):
     """
-       Retrieves the list of all volunteers
+       Retrieves the list of all volunteers, by last then first name.
+       Returns one page at a time; see Pagination above.
        """
     try:
-        cnx = db_pool.get_connection()
-        cursor = cnx.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT volunteerID, firstName, lastName
-            FROM Volunteer JOIN Person ON volunteerID = id;
-        """)
-        return cursor.fetchall()
-    finally:
-        cursor.close()
-        cnx.close()
+        return send_page(response, fetch_page(cnx, *VOLUNTEERS_PAGE, limit, after))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except mysql.connector.Error as err:
+        raise HTTPException(status_code=500, detail=f"Database error: {err}")
 
 @app.get("/volunteers/search", response_model=list[VolunteerOutput])
-def search_volunteers_by_name(name: str):
+def search_volunteers_by_name(name: str, cnx: RequestConnection = Depends(get_db)):
     """
     Search for volunteers by first or last name (partial, case-insensitive match)
     """
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor(dictionary=True)
 
         query = """
@@ -1237,18 +1303,16 @@ def search_volunteers_by_name(name: str):
         raise HTTPException(status_code=500, detail=f"Database error: {err}")
 
     finally:
-        if 'cnx' in locals() and cnx.is_connected():
+        if 'cursor' in locals():
             cursor.close()
-            cnx.close()
 
 
 @app.get("/volunteers/{volunteer_id}", response_model=VolunteerOutput)
-def get_volunteer_by_id(volunteer_id: int):
+def get_volunteer_by_id(volunteer_id: int, cnx: RequestConnection = Depends(get_db)):
     """
     Retrieve a volunteer by exact ID
     """
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor(dictionary=True)
 
         query = """
@@ -1270,18 +1334,16 @@ def get_volunteer_by_id(volunteer_id: int):
         raise HTTPException(status_code=500, detail=f"Database error: {err}")
 
     finally:
-        if 'cnx' in locals() and cnx.is_connected():
+        if 'cursor' in locals():
             cursor.close()
-            cnx.close()
 
 
 @app.get("/volunteers/{volunteer_id}/tasks")
-def get_volunteer_tasks(volunteer_id: int):
+def get_volunteer_tasks(volunteer_id: int, cnx: RequestConnection = Depends(get_db)):
     """
     Returns all tasks a volunteer is assigned, across all events.
     """
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor(dictionary=True)
 
         cursor.execute("""
@@ -1303,44 +1365,28 @@ def get_volunteer_tasks(volunteer_id: int):
 
     finally:
         cursor.close()
-        cnx.close()
 
 
 @app.get("/leaders", response_model=list[LeaderOutput])
-def get_all_leaders():
+def get_all_leaders(response: Response, limit: PageLimit = DEFAULT_PAGE_SIZE, after: Optional[str] = None,
+                    cnx: RequestConnection = Depends(get_db)):
     """
-    Retrieve a list of all leaders.
+    Retrieve a list of all leaders, by last then first name.
+    Returns one page at a time; see Pagination above.
     """
     try:
-        cnx = db_pool.get_connection()
-        cursor = cnx.cursor(dictionary=True)
-
-        query = """
-            SELECT Leader.leaderID, Person.firstName, Person.lastName, Leader.title
-            FROM Leader
-            JOIN Person ON Leader.leaderID = Person.id
-            ORDER BY Person.lastName, Person.firstName;
-        """
-
-        cursor.execute(query)
-        leaders = cursor.fetchall()
-        return leaders
-
+        return send_page(response, fetch_page(cnx, *LEADERS_PAGE, limit, after))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except mysql.connector.Error as err:
         raise HTTPException(status_code=500, detail=f"Database error: {err}")
 
-    finally:
-        if 'cnx' in locals() and cnx.is_connected():
-            cursor.close()
-            cnx.close()
-
 @app.get("/leaders/search", response_model=list[LeaderOutput])
-def search_leaders_by_name(name: str):
+def search_leaders_by_name(name: str, cnx: RequestConnection = Depends(get_db)):
     """
     Search for leaders by first or last name (partial, case-insensitive match)
     """
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor(dictionary=True)
 
         query = """
@@ -1362,17 +1408,15 @@ def search_leaders_by_name(name: str):
         raise HTTPException(status_code=500, detail=f"Database error: {err}")
 
     finally:
-        if 'cnx' in locals() and cnx.is_connected():
+        if 'cursor' in locals():
             cursor.close()
-            cnx.close()
 
 @app.get("/leaders/{leader_id}", response_model=LeaderOutput)
-def get_leader_by_id(leader_id: int):
+def get_leader_by_id(leader_id: int, cnx: RequestConnection = Depends(get_db)):
     """
        Retrieves a specific leader by their ID.
        """
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor(dictionary=True)
         cursor.execute("""
             SELECT leaderID, firstName, lastName, title
@@ -1386,15 +1430,13 @@ def get_leader_by_id(leader_id: int):
         return leader
     finally:
         cursor.close()
-        cnx.close()
 
 @app.get("/leaders/{leader_id}/tasks")
-def get_leader_tasks(leader_id: int):
+def get_leader_tasks(leader_id: int, cnx: RequestConnection = Depends(get_db)):
     """
     Returns all tasks a leader is assigned, across all events.
     """
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor(dictionary=True)
 
         cursor.execute("""
@@ -1418,11 +1460,10 @@ def get_leader_tasks(leader_id: int):
 
     finally:
         cursor.close()
-        cnx.close()
 
 
 @app.post("/event-types", status_code=201)
-def create_new_event_type(event_type_data: EventTypeCreate):
+def create_new_event_type(event_type_data: EventTypeCreate, cnx: RequestConnection = Depends(get_db)):
     """
     Creates a new event type with custom fields.
     - Stores event type name in MySQL
@@ -1438,7 +1479,6 @@ def create_new_event_type(event_type_data: EventTypeCreate):
 
     # --- INSERT INTO MYSQL ---
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor()
 
         insert_query = "INSERT INTO EventType (name) VALUES (%s);"
@@ -1453,8 +1493,6 @@ def create_new_event_type(event_type_data: EventTypeCreate):
     finally:
         if cursor:
             cursor.close()
-        if cnx and cnx.is_connected():
-            cnx.close()
 
     # --- INSERT CUSTOM FIELDS INTO MONGO ---
     try:
@@ -1474,6 +1512,13 @@ def create_new_event_type(event_type_data: EventTypeCreate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"MongoDB error: {e}")
 
+    # New types must show up in cached GraphQL eventTypes results
+    try:
+        if redisClient is not None:
+            invalidate_query_cache(redisClient)
+    except redis.RedisError:
+        pass
+
     # --- RESPONSE ---
     return {
         "message": "Event type created successfully",
@@ -1540,26 +1585,85 @@ def get_event_type_by_id(type_id: int):
         raise HTTPException(status_code=500, detail=f"MongoDB error: {e}")
 
 
+# Runs the independent MySQL and MongoDB lookups of one request side by side
+lookup_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lookup")
+
+
+def _fetch_student_details(cnx, student_ids):
+    """Returns {student_id: {id, firstName, lastName, grade}} from MySQL in one query."""
+    student_details = {}
+    if not student_ids:
+        return student_details
+    cursor = None
+    try:
+        cursor = cnx.cursor(dictionary=True)
+
+        format_strings = ",".join(["%s"] * len(student_ids))
+        cursor.execute(f"""
+            SELECT p.id, p.firstName, p.lastName, s.grade
+            FROM Person p
+            JOIN Student s ON s.studentID = p.id
+            WHERE p.id IN ({format_strings});
+        """, tuple(student_ids))
+
+        for row in cursor.fetchall():
+            student_details[row["id"]] = row
+        return student_details
+
+    except mysql.connector.Error as err:
+        raise HTTPException(status_code=500, detail=f"MySQL error: {err}")
+    finally:
+        if cursor: cursor.close()
+
+
+def _fetch_event_custom_fields(event_ids):
+    """Returns {event_id: custom_field_values} from MongoDB with a single $in query."""
+    try:
+        mongo_collection = mongoDBclient["FP_YG_app"]["eventCustomData"]
+        mongo_docs = mongo_collection.find(
+            {"eventId": {"$in": event_ids}},
+            {"_id": 0, "eventId": 1, "custom_field_values": 1}
+        )
+        return {doc["eventId"]: doc.get("custom_field_values") for doc in mongo_docs}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"MongoDB error: {e}")
+
+
 @app.get("/event-types/{type_id}/checked-in")
-def get_checked_in_for_event_type(type_id: int):
+def get_checked_in_for_event_type(type_id: int, limit: Optional[int] = None, since: Optional[datetime] = None, cnx: RequestConnection = Depends(get_db)):
     """
     Returns all checked-in students for all events of a given event type.
+    - limit: only the N most recent events of the type
+    - since: only events starting at or after this time
     Uses:
     - MySQL to get events & student base info
-    - Redis to detect live check-ins
+    - Redis to detect live check-ins (one pipeline for all events)
     - MongoDB to enrich event data with custom fields
+    The MongoDB lookup runs alongside the Redis and MySQL student reads.
     """
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1")
 
-    # ---------- 1) MYSQL: Get all events of this type ----------
+    # ---------- 1) MYSQL: Get the events of this type, newest first ----------
+    cursor = None
     try:
-        cnx = db_pool.get_connection()
         cursor = cnx.cursor(dictionary=True)
 
-        cursor.execute("""
+        query = """
             SELECT id, name
             FROM Event
-            WHERE EventTypeID = %s;
-        """, (type_id,))
+            WHERE EventTypeID = %s
+        """
+        params = [type_id]
+        if since is not None:
+            query += " AND StartDateTime >= %s"
+            params.append(since)
+        query += " ORDER BY StartDateTime DESC, id DESC"
+        if limit is not None:
+            query += " LIMIT %s"
+            params.append(limit)
+
+        cursor.execute(query, tuple(params))
         events = cursor.fetchall()
 
         if not events:
@@ -1571,74 +1675,31 @@ def get_checked_in_for_event_type(type_id: int):
         raise HTTPException(status_code=500, detail=f"MySQL error: {err}")
     finally:
         if cursor: cursor.close()
-        if cnx and cnx.is_connected(): cnx.close()
 
-    # ---------- 2) REDIS: Find checked-in students per event ----------
+    # ---------- 2) MONGODB: Fetch event custom data (in the background) ----------
+    custom_future = lookup_executor.submit(_fetch_event_custom_fields, event_ids)
+
+    # ---------- 3) REDIS: Find checked-in students for every event at once ----------
     if redisClient is None:
         raise HTTPException(status_code=503, detail="Redis not available")
 
-    checked_in_map = {}  # event_id -> set(student_ids)
-    check_in_times_map = {}  # event_id -> {student_id: time}
-
     try:
-        for event_id in event_ids:
-            set_key = f"event:{event_id}:checkedIn"
-            time_key = f"event:{event_id}:checkInTimes"
-
-            student_ids = redisClient.smembers(set_key)
-            times = redisClient.hgetall(time_key)
-
-            checked_in_map[event_id] = {int(s) for s in student_ids} if student_ids else set()
-            check_in_times_map[event_id] = times
-
+        checked_in_map = get_checked_in_for_events(redisClient, event_ids)  # event_id -> {student_id: time}
     except redis.RedisError as e:
         raise HTTPException(status_code=500, detail=f"Redis error: {e}")
 
     # Flatten all student IDs from all events
     all_checked_in_ids = set().union(*checked_in_map.values())
 
-    # ---------- 3) MYSQL: Fetch student details ----------
-    student_details = {}
-    if all_checked_in_ids:
-        try:
-            cnx = db_pool.get_connection()
-            cursor = cnx.cursor(dictionary=True)
-
-            format_strings = ",".join(["%s"] * len(all_checked_in_ids))
-            cursor.execute(f"""
-                SELECT p.id, p.firstName, p.lastName, s.grade
-                FROM Person p
-                JOIN Student s ON s.studentID = p.id
-                WHERE p.id IN ({format_strings});
-            """, tuple(all_checked_in_ids))
+    # ---------- 4) MYSQL: Fetch student details while MongoDB finishes ----------
+    student_details = _fetch_student_details(cnx, all_checked_in_ids)
+    custom_by_event = custom_future.result()
 
-            for row in cursor.fetchall():
-                student_details[row["id"]] = row
+    # ---------- 5) Build final combined response ----------
+    result = []
 
-        except mysql.connector.Error as err:
-            raise HTTPException(status_code=500, detail=f"MySQL error: {err}")
-        finally:
-            if cursor: cursor.close()
-            if cnx and cnx.is_connected(): cnx.close()
-
-    # ---------- 4) MONGODB: Fetch event custom data ----------
-    try:
-        mongo_collection = mongoDBclient["FP_YG_app"]["eventCustomData"]
-        mongo_docs = list(mongo_collection.find(
-            {"eventId": {"$in": event_ids}},
-            {"_id": 0}
-        ))
-
-        custom_by_event = {doc["eventId"]: doc.get("custom_field_values") for doc in mongo_docs}
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"MongoDB error: {e}")
-
-    # ---------- 5) Build final combined response ----------
-    result = []
-
-    for event in events:
-        event_id = event["id"]
+    for event in events:
+        event_id = event["id"]
 
         event_entry = {
             "event_id": event_id,
@@ -1647,12 +1708,12 @@ def get_checked_in_for_event_type(type_id: int):
             "checked_in_students": []
         }
 
-        for student_id in checked_in_map[event_id]:
+        for student_id, check_in_time in checked_in_map[event_id].items():
             event_entry["checked_in_students"].append({
                 "student_id": student_id,
                 "name": f"{student_details[student_id]['firstName']} {student_details[student_id]['lastName']}",
                 "grade": student_details[student_id]["grade"],
-                "check_in_time": check_in_times_map[event_id].get(str(student_id))
+                "check_in_time": check_in_time
             })
 
         result.append(event_entry)
@@ -1665,6 +1726,215 @@ def get_checked_in_for_event_type(type_id: int):
     }
 
 
+# ========== EXPORTS ==========
+# Whole-table exports are streamed rather than built in memory. Rows come
+# from an unbuffered cursor (mysql-connector's default, which leaves the
+# result on the server connection until it is fetched) EXPORT_BATCH_SIZE at a
+# time and are written to the response straight away, so memory use stays
+# flat however large the table. Each download holds one pooled connection
+# while it runs.
+
+EXPORT_BATCH_SIZE = 500
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+ExportFormat = Annotated[str, Query(pattern="^(ndjson|csv)$")]
+
+
+def _export_value(value):
+    """A column value as it should appear in an export."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, timedelta):  # TIME columns
+        seconds = int(value.total_seconds())
+        return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return value
+
+
+def _export_rows(cnx, cursor, export_format):
+    """
+    Yields the rows of a query already run on cursor as NDJSON lines or CSV,
+    a batch at a time, then gives cnx back to the pool. If the generator is
+    never started, stream_export's finalizer discards cnx instead.
+    """
+    finished = False
+    try:
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(cursor.column_names)
+
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            if export_format == "csv":
+                writer.writerows([_export_value(value) for value in row.values()] for row in rows)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            else:
+                yield "".join(json.dumps({k: _export_value(v) for k, v in row.items()}) + "\n" for row in rows)
+
+        if export_format == "csv" and buffer.tell():
+            yield buffer.getvalue()  # header of an empty export
+        cursor.close()
+        finished = True
+    except mysql.connector.Error as err:
+        # Headers are already sent; re-raising aborts the transfer so the
+        # client can't mistake a truncated download for a complete one
+        logger.error(f"Export failed mid-stream: {err}")
+        raise
+    finally:
+        if finished:
+            cnx.release()
+        else:
+            cnx.discard()  # the rest of the result is still on the connection
+
+
+def stream_export(name, query, params, export_format):
+    """
+    StreamingResponse downloading a query's rows as name.ndjson or name.csv.
+    The connection is checked out and the query run before the response
+    starts, so an exhausted pool or a failing query still gets a 503/500.
+    """
+    cnx = RequestConnection(db_pool)
+    try:
+        cursor = cnx.cursor(dictionary=True)
+        cursor.execute(query, params)
+    except mysql.connector.errors.PoolError as err:
+        raise HTTPException(status_code=503, detail=f"Database busy: {err}")
+    except mysql.connector.Error as err:
+        cnx.discard()
+        raise HTTPException(status_code=500, detail=f"Database error: {err}")
+
+    # A client that disconnects before the body starts means the generator
+    # is dropped without ever running, so its finally never gives cnx back.
+    # The finalizer covers that: it discards cnx when the generator is
+    # garbage collected, and does nothing if the generator already let it go.
+    rows = _export_rows(cnx, cursor, export_format)
+    weakref.finalize(rows, cnx.discard)
+    return StreamingResponse(
+        rows,
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format}"'}
+    )
+
+
+@app.get("/export/people")
+def export_people(format: ExportFormat = "ndjson"):
+    """
+    Streams every person, by last then first name.
+    - format: ndjson (one JSON object per line, default) or csv
+    """
+    return stream_export("people", """
+        SELECT id, firstName, lastName
+        FROM Person
+        ORDER BY lastName, firstName, id;
+    """, (), format)
+
+
+@app.get("/export/students")
+def export_students(format: ExportFormat = "ndjson"):
+    """
+    Streams every student, by last then first name.
+    - format: ndjson (one JSON object per line, default) or csv
+    """
+    return stream_export("students", """
+        SELECT Person.id, firstName, lastName, grade
+        FROM Person
+        JOIN Student ON Student.studentID = Person.id
+        ORDER BY lastName, firstName, Person.id;
+    """, (), format)
+
+
+@app.get("/export/registrations")
+def export_registrations(event_id: Optional[int] = None, format: ExportFormat = "ndjson"):
+    """
+    Streams registrations with the event and student names, by event.
+    - event_id: only this event's registrations
+    - format: ndjson (one JSON object per line, default) or csv
+    """
+    where = "WHERE r.EventID = %s" if event_id is not None else ""
+    return stream_export("registrations", f"""
+        SELECT r.ID AS registrationID,
+               r.EventID AS eventID,
+               e.Name AS eventName,
+               r.StudentID AS studentID,
+               p.firstName,
+               p.lastName,
+               r.RegistrantID AS registrantID
+        FROM Registration r
+        JOIN Event e ON r.EventID = e.ID
+        JOIN Person p ON r.StudentID = p.id
+        {where}
+        ORDER BY r.EventID, p.lastName, p.firstName, r.ID;
+    """, (event_id,) if event_id is not None else (), format)
+
+
+@app.get("/export/attendance")
+def export_attendance(event_id: Optional[int] = None, student_id: Optional[int] = None,
+                      format: ExportFormat = "ndjson"):
+    """
+    Streams attendance history (finalized check-in and check-out times),
+    oldest event first.
+    - event_id: only this event
+    - student_id: only this student
+    - format: ndjson (one JSON object per line, default) or csv
+    """
+    conditions = []
+    params = []
+    if event_id is not None:
+        conditions.append("r.EventID = %s")
+        params.append(event_id)
+    if student_id is not None:
+        conditions.append("r.StudentID = %s")
+        params.append(student_id)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return stream_export("attendance", f"""
+        SELECT r.EventID AS eventID,
+               e.Name AS eventName,
+               e.StartDateTime AS eventStart,
+               r.StudentID AS studentID,
+               p.firstName,
+               p.lastName,
+               a.CheckInTime AS checkInTime,
+               a.CheckOutTime AS checkOutTime
+        FROM Attendee a
+        JOIN Registration r ON a.RegistrationID = r.ID
+        JOIN Event e ON r.EventID = e.ID
+        JOIN Person p ON r.StudentID = p.id
+        {where}
+        ORDER BY e.StartDateTime, r.EventID, p.lastName, p.firstName;
+    """, tuple(params), format)
+
+
+# ========== DIAGNOSTICS ==========
+
+@app.get("/metrics/mysql-pool")
+def get_mysql_pool_metrics():
+    """
+    MySQL connection pool usage: size, connections in use, peak in use,
+    how often requests had to wait (or timed out) and checkout wait times,
+    for the pool used by sync endpoints and the one used by async endpoints.
+    Use this to size MYSQL_POOL_MIN / MYSQL_POOL_MAX and MYSQL_ASYNC_POOL_MIN / MYSQL_ASYNC_POOL_MAX.
+    """
+    return {"sync": db_pool.metrics(), "async": get_async_mysql_pool().metrics()}
+
+
+@app.get("/metrics/graphql")
+def get_graphql_metrics():
+    """
+    Per-field GraphQL resolver totals since startup: how often each field was
+    resolved, its average and max time, and its MySQL/Redis/MongoDB calls.
+    A nested field averaging one or more backend calls per resolve is an N+1.
+    Send extensions: {"tracing": true} with a query to see one request's breakdown.
+    """
+    try:
+        from graphql_extensions import resolver_metrics
+    except ImportError:
+        raise HTTPException(status_code=503, detail="GraphQL not available")
+    return resolver_metrics()
+
+
 # ========== REDIS CHECK-IN ENDPOINTS ==========
 
 @app.get("/redis/test")
@@ -1733,123 +2003,99 @@ def test_redis_connection():
 
 
 @app.post("/events/{event_id}/check-in/{student_id}", status_code=200)
-def check_in_student(event_id: int, student_id: int):
+async def check_in_student(event_id: int, student_id: int, cnx: AsyncRequestConnection = Depends(get_async_db)):
     """
     Checks a student into an event using Redis.
+    - Validates the registration from the Redis cache if the event is open,
+      otherwise from MySQL
     - Adds student to Redis set for real-time tracking
     - Records check-in timestamp
     """
-    # --- VALIDATE EVENT EXISTS ---
-    cnx = None
-    cursor = None
-    try:
-        cnx = db_pool.get_connection()
-        cursor = cnx.cursor(dictionary=True)
-        cursor.execute("SELECT ID FROM Event WHERE ID = %s;", (event_id,))
-        event = cursor.fetchone()
-        if not event:
-            raise HTTPException(status_code=404, detail="Event not found")
-
-        # Validate student exists and is registered for event
-        cursor.execute("""
-                       SELECT r.ID
-                       FROM Registration r
-                       WHERE r.StudentID = %s
-                         AND r.EventID = %s;
-                       """, (student_id, event_id))
-        registration = cursor.fetchone()
-        if not registration:
-            raise HTTPException(
-                status_code=404,
-                detail="Student not registered for this event"
-            )
-    except HTTPException:
-        raise
-    except mysql.connector.Error as err:
-        raise HTTPException(status_code=500, detail=f"MySQL error: {err}")
-    finally:
-        if cursor:
-            cursor.close()
-        if cnx and cnx.is_connected():
-            cnx.close()
-
-    # --- ADD TO REDIS SET ---
-    if redisClient is None:
+    if asyncRedisClient is None:
         raise HTTPException(status_code=503, detail="Redis connection not available")
 
+    timestamp = datetime.now().isoformat()
     try:
-        checked_in_key = f"event:{event_id}:checkedIn"
-        check_in_times_key = f"event:{event_id}:checkInTimes"
+        # Registration check, set add, timestamp and count in one atomic call
+        status, count = await async_check_in(asyncRedisClient, event_id, student_id, timestamp,
+                                             use_registration_cache=True)
+    except redis.RedisError as e:
+        raise HTTPException(status_code=500, detail=f"Redis error: {e}")
 
-        # Check if already checked in
-        if redisClient.sismember(checked_in_key, str(student_id)):
-            return {
-                "message": "Student already checked in",
-                "event_id": event_id,
-                "student_id": student_id,
-                "already_checked_in": True
-            }
+    if status == REGISTRATIONS_NOT_CACHED:
+        # --- EVENT NOT OPEN: VALIDATE IN MYSQL ---
+        try:
+            if not await async_find_event(cnx, event_id):
+                raise HTTPException(status_code=404, detail="Event not found")
+
+            # Validate student exists and is registered for event
+            if await async_find_registration_id(cnx, event_id, student_id) is None:
+                raise HTTPException(
+                    status_code=404,
+                    detail="Student not registered for this event"
+                )
+        except HTTPException:
+            raise
+        except mysql.connector.Error as err:
+            raise HTTPException(status_code=500, detail=f"MySQL error: {err}")
 
-        # Add to set
-        redisClient.sadd(checked_in_key, str(student_id))
+        try:
+            status, count = await async_check_in(asyncRedisClient, event_id, student_id, timestamp)
+        except redis.RedisError as e:
+            raise HTTPException(status_code=500, detail=f"Redis error: {e}")
 
-        # Record check-in time
-        timestamp = datetime.now().isoformat()
-        redisClient.hset(check_in_times_key, str(student_id), timestamp)
+    if status == NOT_REGISTERED:
+        raise HTTPException(status_code=404, detail="Student not registered for this event")
 
-        # Get current count
-        count = redisClient.scard(checked_in_key)
+    if status == CHECKED_IN_ELSEWHERE:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Student is already checked in to event {count}; check them out there first"
+        )
 
+    if status == ALREADY_CHECKED_IN:
         return {
-            "message": "Student checked in successfully",
+            "message": "Student already checked in",
             "event_id": event_id,
             "student_id": student_id,
-            "check_in_time": timestamp,
-            "current_count": count
+            "already_checked_in": True
         }
-    except redis.RedisError as e:
-        raise HTTPException(status_code=500, detail=f"Redis error: {e}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {type(e).__name__}: {e}")
+
+    return {
+        "message": "Student checked in successfully",
+        "event_id": event_id,
+        "student_id": student_id,
+        "check_in_time": timestamp,
+        "current_count": count
+    }
 
 
 @app.post("/events/{event_id}/check-out/{student_id}", status_code=200)
-def check_out_student(event_id: int, student_id: int):
+def check_out_student(event_id: int, student_id: int, cnx: RequestConnection = Depends(get_db)):
     """
     Checks a student out of an event using Redis.
     - Removes student from Redis set
     - Records check-out timestamp
     """
     # --- VALIDATE EVENT EXISTS ---
-    cnx = None
-    cursor = None
     try:
-        cnx = db_pool.get_connection()
-        cursor = cnx.cursor(dictionary=True)
-        cursor.execute("SELECT ID FROM Event WHERE ID = %s;", (event_id,))
-        event = cursor.fetchone()
-        if not event:
+        if not find_event(cnx, event_id):
             raise HTTPException(status_code=404, detail="Event not found")
     except HTTPException:
         raise
     except mysql.connector.Error as err:
         raise HTTPException(status_code=500, detail=f"MySQL error: {err}")
-    finally:
-        if cursor:
-            cursor.close()
-        if cnx and cnx.is_connected():
-            cnx.close()
 
     # --- REMOVE FROM REDIS SET ---
     if redisClient is None:
         raise HTTPException(status_code=503, detail="Redis connection not available")
 
     try:
-        checked_in_key = f"event:{event_id}:checkedIn"
-        check_out_times_key = f"event:{event_id}:checkOutTimes"
+        # Membership test, set removal, timestamp and count in one atomic call
+        timestamp = datetime.now().isoformat()
+        removed, count = redis_check_out(redisClient, event_id, student_id, timestamp)
 
-        # Check if checked in
-        if not redisClient.sismember(checked_in_key, str(student_id)):
+        if not removed:
             return {
                 "message": "Student not currently checked in",
                 "event_id": event_id,
@@ -1857,16 +2103,6 @@ def check_out_student(event_id: int, student_id: int):
                 "was_checked_in": False
             }
 
-        # Remove from set
-        redisClient.srem(checked_in_key, str(student_id))
-
-        # Record check-out time
-        timestamp = datetime.now().isoformat()
-        redisClient.hset(check_out_times_key, str(student_id), timestamp)
-
-        # Get current count
-        count = redisClient.scard(checked_in_key)
-
         return {
             "message": "Student checked out successfully",
             "event_id": event_id,
@@ -1880,8 +2116,147 @@ def check_out_student(event_id: int, student_id: int):
         raise HTTPException(status_code=500, detail=f"Unexpected error: {type(e).__name__}: {e}")
 
 
+# Result labels for batch check-in, keyed by redis_implement status code
+CHECK_IN_STATUS_LABELS = {
+    CHECKED_IN: "checked_in",
+    ALREADY_CHECKED_IN: "already_checked_in",
+    NOT_REGISTERED: "not_registered",
+    CHECKED_IN_ELSEWHERE: "checked_in_elsewhere",
+}
+
+
+@app.post("/events/{event_id}/check-in:batch", status_code=200)
+def check_in_students_batch(event_id: int, batch: CheckInBatch, cnx: RequestConnection = Depends(get_db)):
+    """
+    Checks in a batch of students scanned by a kiosk.
+    - Validates all registrations with one Redis call if the event is open,
+      otherwise with one MySQL query
+    - Writes all check-ins to Redis in one pipeline
+    - Returns a result for each student in the batch
+    """
+    if not batch.students:
+        raise HTTPException(status_code=400, detail="You must provide at least one student.")
+    if redisClient is None:
+        raise HTTPException(status_code=503, detail="Redis connection not available")
+
+    now = datetime.now().isoformat()
+    entries = [
+        (item.student_id, item.timestamp.isoformat() if item.timestamp else now)
+        for item in batch.students
+    ]
+
+    try:
+        results = redis_check_in_many(redisClient, event_id, entries, use_registration_cache=True)
+    except redis.RedisError as e:
+        raise HTTPException(status_code=500, detail=f"Redis error: {e}")
+
+    if any(status == REGISTRATIONS_NOT_CACHED for status, _ in results):
+        # --- EVENT NOT OPEN: VALIDATE ALL REGISTRATIONS IN MYSQL ---
+        cursor = None
+        try:
+            if not find_event(cnx, event_id):
+                raise HTTPException(status_code=404, detail="Event not found")
+
+            cursor = cnx.cursor(dictionary=True)
+            student_ids = list({student_id for student_id, _ in entries})
+            format_strings = ",".join(["%s"] * len(student_ids))
+            cursor.execute(f"""
+                SELECT StudentID
+                FROM Registration
+                WHERE EventID = %s
+                  AND StudentID IN ({format_strings});
+            """, (event_id, *student_ids))
+            registered = {row["StudentID"] for row in cursor.fetchall()}
+        except HTTPException:
+            raise
+        except mysql.connector.Error as err:
+            raise HTTPException(status_code=500, detail=f"MySQL error: {err}")
+        finally:
+            if cursor:
+                cursor.close()
+
+        try:
+            registered_entries = [e for e in entries if e[0] in registered]
+            written = iter(redis_check_in_many(redisClient, event_id, registered_entries))
+        except redis.RedisError as e:
+            raise HTTPException(status_code=500, detail=f"Redis error: {e}")
+        results = [next(written) if student_id in registered else (NOT_REGISTERED, None)
+                   for student_id, _ in entries]
+
+    response = []
+    current_count = None
+    for (student_id, timestamp), (status, value) in zip(entries, results):
+        result = {
+            "student_id": student_id,
+            "status": CHECK_IN_STATUS_LABELS[status],
+            "check_in_time": timestamp if status == CHECKED_IN else None
+        }
+        if status in (CHECKED_IN, ALREADY_CHECKED_IN):
+            current_count = value
+        elif status == CHECKED_IN_ELSEWHERE:
+            result["current_event_id"] = value
+        response.append(result)
+
+    return {
+        "event_id": event_id,
+        "results": response,
+        "checked_in": sum(1 for r in response if r["status"] == "checked_in"),
+        "current_count": current_count
+    }
+
+
+@app.post("/events/{event_id}/check-out:batch", status_code=200)
+def check_out_students_batch(event_id: int, batch: CheckInBatch, cnx: RequestConnection = Depends(get_db)):
+    """
+    Checks out a batch of students scanned by a kiosk.
+    - Writes all check-outs to Redis in one pipeline
+    - Returns a result for each student in the batch
+    """
+    if not batch.students:
+        raise HTTPException(status_code=400, detail="You must provide at least one student.")
+
+    # --- VALIDATE EVENT EXISTS ---
+    try:
+        if not find_event(cnx, event_id):
+            raise HTTPException(status_code=404, detail="Event not found")
+    except HTTPException:
+        raise
+    except mysql.connector.Error as err:
+        raise HTTPException(status_code=500, detail=f"MySQL error: {err}")
+
+    if redisClient is None:
+        raise HTTPException(status_code=503, detail="Redis connection not available")
+
+    now = datetime.now().isoformat()
+    entries = [
+        (item.student_id, item.timestamp.isoformat() if item.timestamp else now)
+        for item in batch.students
+    ]
+
+    try:
+        results = redis_check_out_many(redisClient, event_id, entries)
+    except redis.RedisError as e:
+        raise HTTPException(status_code=500, detail=f"Redis error: {e}")
+
+    response = [
+        {
+            "student_id": student_id,
+            "status": "checked_out" if removed else "not_checked_in",
+            "check_out_time": timestamp if removed else None
+        }
+        for (student_id, timestamp), (removed, _) in zip(entries, results)
+    ]
+
+    return {
+        "event_id": event_id,
+        "results": response,
+        "checked_out": sum(1 for r in response if r["status"] == "checked_out"),
+        "current_count": results[-1][1]
+    }
+
+
 @app.get("/events/{event_id}/checked-in")
-def get_checked_in_students(event_id: int):
+async def get_checked_in_students(event_id: int, cnx: AsyncRequestConnection = Depends(get_async_db)):
     """
     Gets all students currently checked in to an event from Redis.
     Returns list of student IDs and their check-in times.
@@ -1889,62 +2264,34 @@ def get_checked_in_students(event_id: int):
     try:
         # --- VALIDATE EVENT EXISTS ---
         logger.info(f"Getting checked-in students for event {event_id}")
-        cnx = None
-        cursor = None
         try:
-            cnx = db_pool.get_connection()
-            cursor = cnx.cursor(dictionary=True)
-            cursor.execute("SELECT ID, Name FROM Event WHERE ID = %s;", (event_id,))
-            event = cursor.fetchone()
+            event = await async_find_event(cnx, event_id)
             if not event:
                 logger.warning(f"Event {event_id} not found")
                 raise HTTPException(status_code=404, detail="Event not found")
-            event_name = event.get("Name") or event.get("name") or "Unknown"
+            event_name = event["name"] or "Unknown"
             logger.info(f"Event found: {event_name}")
         except HTTPException:
             raise
         except mysql.connector.Error as err:
             logger.error(f"MySQL error: {err}")
             raise HTTPException(status_code=500, detail=f"MySQL error: {err}")
-        finally:
-            if cursor:
-                cursor.close()
-            if cnx and cnx.is_connected():
-                cnx.close()
 
         # --- GET FROM REDIS ---
-        if redisClient is None:
+        if asyncRedisClient is None:
             logger.error("Redis client is None")
             raise HTTPException(status_code=503, detail="Redis connection not available")
 
         logger.info("Accessing Redis for checked-in students")
-        checked_in_key = f"event:{event_id}:checkedIn"
-        check_in_times_key = f"event:{event_id}:checkInTimes"
+        # Get all checked-in student IDs, then all their check-in times in one call
+        student_ids = await async_get_checked_in_ids(asyncRedisClient, event_id)
+        logger.info(f"Found {len(student_ids)} checked-in students")
+        check_in_times = await async_get_check_in_times(asyncRedisClient, event_id, student_ids)
 
-        # Get all checked-in student IDs (returns a set)
-        student_ids = redisClient.smembers(checked_in_key)
-        logger.info(f"Found {len(student_ids) if student_ids else 0} checked-in students")
-
-        # Handle case where set might be None or empty
-        if student_ids is None:
-            student_ids = set()
-
-        # Get check-in times for each student
-        checked_in_list = []
-        for student_id in student_ids:
-            try:
-                # Convert to int for response
-                student_id_int = int(student_id)
-                # Get check-in time from hash (may be None if not set)
-                check_in_time = redisClient.hget(check_in_times_key, student_id)
-                checked_in_list.append({
-                    "student_id": student_id_int,
-                    "check_in_time": check_in_time
-                })
-            except (ValueError, TypeError) as e:
-                logger.warning(f"Invalid student_id format: {student_id}, error: {e}")
-                # Skip invalid student IDs
-                continue
+        checked_in_list = [
+            {"student_id": student_id, "check_in_time": check_in_time}
+            for student_id, check_in_time in check_in_times.items()
+        ]
 
         result = {
             "event_id": event_id,
@@ -1976,20 +2323,42 @@ def get_checked_in_students(event_id: int):
         )
 
 
+@app.get("/events/{event_id}/live-roster")
+def get_live_roster(event_id: int, cnx: RequestConnection = Depends(get_db)):
+    """
+    Returns every registered student for an event with their name and live
+    check-in state, merged from the registration cache, Redis presence and
+    check-in times, and the cached student-name hash. Replaces calling both
+    /roster and /checked-in. MySQL is only used for the event name and for
+    anything Redis does not have cached yet.
+    """
+    try:
+        event = find_event(cnx, event_id)
+        if not event:
+            raise HTTPException(status_code=404, detail="Event not found")
+
+        if redisClient is None:
+            raise HTTPException(status_code=503, detail="Redis connection not available")
+
+        roster = load_live_roster(cnx, redisClient, event_id)
+    except HTTPException:
+        raise
+    except mysql.connector.Error as err:
+        raise HTTPException(status_code=500, detail=f"MySQL error: {err}")
+    except redis.RedisError as e:
+        raise HTTPException(status_code=500, detail=f"Redis error: {e}")
+
+    return {"event_id": event_id, "event_name": event["name"], **roster}
+
+
 @app.get("/events/{event_id}/check-in-count")
-def get_check_in_count(event_id: int):
+def get_check_in_count(event_id: int, cnx: RequestConnection = Depends(get_db)):
     """
     Gets the current count of students checked in to an event from Redis.
     """
     # --- VALIDATE EVENT EXISTS ---
-    cnx = None
-    cursor = None
     try:
-        cnx = db_pool.get_connection()
-        cursor = cnx.cursor(dictionary=True)
-
-        cursor.execute("SELECT ID, Name FROM Event WHERE ID = %s;", (event_id,))
-        event = cursor.fetchone()
+        event = find_event(cnx, event_id)
         if not event:
             raise HTTPException(status_code=404, detail="Event not found")
 
@@ -1997,30 +2366,17 @@ def get_check_in_count(event_id: int):
         raise
     except mysql.connector.Error as err:
         raise HTTPException(status_code=500, detail=f"MySQL error: {err}")
-    finally:
-        # Cleanup safely (no is_connected())
-        try:
-            if cursor is not None:
-                cursor.close()
-        except:
-            pass
-        try:
-            if cnx is not None:
-                cnx.close()
-        except:
-            pass
 
     # --- GET COUNT FROM REDIS ---
     if redisClient is None:
         raise HTTPException(status_code=503, detail="Redis connection not available")
 
     try:
-        checked_in_key = f"event:{event_id}:checkedIn"
-        count = redisClient.scard(checked_in_key)
+        count = redis_get_check_in_count(redisClient, event_id)
 
         return {
             "event_id": event_id,
-            "event_name": event["Name"],
+            "event_name": event["name"],
             "checked_in_count": count
         }
     except redis.RedisError as e:
@@ -2029,157 +2385,577 @@ def get_check_in_count(event_id: int):
         raise HTTPException(status_code=500, detail=f"Unexpected error: {type(e).__name__}: {e}")
 
 
-@app.post("/events/{event_id}/finalize", status_code=200)
-def finalize_event_check_ins(event_id: int):
+@app.get("/events/{event_id}/live")
+async def stream_event_activity(event_id: int):
+    """
+    Server-Sent Events stream of check-ins and check-outs for an event.
+    Sends a "snapshot" event with the current count first, then one "activity"
+    event per check-in/check-out as published on the event's Redis channel,
+    so the check-in tab can update without refetching the roster.
     """
-    Finalizes an event by persisting Redis check-ins to MySQL and cleaning up Redis keys.
-    - Reads all checked-in students from Redis
-    - Creates/updates Attendee records in MySQL
+    if redisClient is None:
+        raise HTTPException(status_code=503, detail="Redis connection not available")
+
+    try:
+        count = await run_in_threadpool(redis_get_check_in_count, redisClient, event_id)
+    except redis.RedisError as e:
+        raise HTTPException(status_code=500, detail=f"Redis error: {e}")
+
+    async def event_stream():
+        yield f"event: snapshot\ndata: {json.dumps({'event_id': event_id, 'count': count})}\n\n"
+        async for activity in listen_check_in_activity(event_id):
+            if activity is None:
+                yield ": keepalive\n\n"  # keeps proxies from closing an idle stream
+            else:
+                yield f"event: activity\ndata: {json.dumps(activity)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/events/{event_id}/arrivals")
+def get_event_arrivals(event_id: int, since: Optional[datetime] = None, minutes: Optional[int] = None):
+    """
+    Lists students who checked in to an event within a time window, oldest first.
+    - since: only arrivals at or after this time
+    - minutes: only arrivals in the last N minutes (ignored if since is given)
+    Served from the Redis arrivals timeline with a single call.
+    """
+    if redisClient is None:
+        raise HTTPException(status_code=503, detail="Redis connection not available")
+
+    if since is None and minutes is not None:
+        since_epoch = int(time.time()) - minutes * 60
+    else:
+        since_epoch = int(since.timestamp()) if since else None
+
+    try:
+        arrivals = get_arrivals(redisClient, event_id, since_epoch)
+    except redis.RedisError as e:
+        raise HTTPException(status_code=500, detail=f"Redis error: {e}")
+
+    return {
+        "event_id": event_id,
+        "since": datetime.fromtimestamp(since_epoch).isoformat() if since_epoch is not None else None,
+        "arrivals": [
+            {"student_id": student_id, "check_in_time": datetime.fromtimestamp(epoch).isoformat()}
+            for student_id, epoch in arrivals
+        ],
+        "count": len(arrivals)
+    }
+
+
+@app.get("/events/{event_id}/arrivals/histogram")
+def get_event_arrival_histogram(event_id: int, bucket_minutes: int = 5,
+                                since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """
+    Counts check-ins to an event per time bucket (default 5 minutes).
+    Served from the Redis arrivals timeline with a single call.
+    """
+    if bucket_minutes < 1:
+        raise HTTPException(status_code=400, detail="bucket_minutes must be at least 1")
+    if redisClient is None:
+        raise HTTPException(status_code=503, detail="Redis connection not available")
+
+    try:
+        buckets = get_arrival_histogram(
+            redisClient, event_id, bucket_minutes * 60,
+            int(since.timestamp()) if since else None,
+            int(until.timestamp()) if until else None
+        )
+    except redis.RedisError as e:
+        raise HTTPException(status_code=500, detail=f"Redis error: {e}")
+
+    return {
+        "event_id": event_id,
+        "bucket_minutes": bucket_minutes,
+        "buckets": [
+            {"bucket_start": datetime.fromtimestamp(start).isoformat(), "count": count}
+            for start, count in buckets
+        ],
+        "total": sum(count for _, count in buckets)
+    }
+
+
+# Rows per multi-row INSERT when persisting attendance
+ATTENDEE_UPSERT_BATCH_SIZE = 500
+
+
+def _to_time_of_day(timestamp):
+    """Converts an ISO timestamp from Redis to TIME format (HH:MM:SS)."""
+    if not timestamp:
+        return None
+    return datetime.fromisoformat(timestamp).strftime("%H:%M:%S")
+
+
+def upsert_attendees(cursor, rows, on_chunk=None):
+    """
+    Writes (registration_id, check_in_time, check_out_time) rows into Attendee
+    with multi-row INSERT ... ON DUPLICATE KEY UPDATE statements.
+    A None time leaves the stored time unchanged.
+    Relies on the unique key on Attendee.RegistrationID.
+    on_chunk, if given, is called with the number of rows written so far.
+    """
+    for i in range(0, len(rows), ATTENDEE_UPSERT_BATCH_SIZE):
+        chunk = rows[i:i + ATTENDEE_UPSERT_BATCH_SIZE]
+        values = ",".join(["(%s, %s, %s)"] * len(chunk))
+        cursor.execute(f"""
+            INSERT INTO Attendee (RegistrationID, CheckInTime, CheckOutTime)
+            VALUES {values} AS new
+            ON DUPLICATE KEY UPDATE CheckInTime  = COALESCE(new.CheckInTime, Attendee.CheckInTime),
+                                    CheckOutTime = COALESCE(new.CheckOutTime, Attendee.CheckOutTime);
+        """, [value for row in chunk for value in row])
+        if on_chunk:
+            on_chunk(i + len(chunk))
+
+
+def finalize_event(event_id, report_progress=None):
+    """
+    Persists an event's Redis check-ins to MySQL and cleans up its Redis keys.
+    - Reads all check-in and check-out times from Redis in one round trip
+    - Looks up every registration with one query
+    - Creates/updates Attendee records with bulk upserts
     - Cleans up Redis keys for the event
+    report_progress, if given, is called with (rows_written, total_rows).
     """
-    # --- VALIDATE EVENT EXISTS ---
-    cnx = None
+    # --- GET CHECK-IN TIMES FROM REDIS ---
+    if redisClient is None:
+        raise HTTPException(status_code=503, detail="Redis connection not available")
+
+    try:
+        check_in_times, check_out_times = get_attendance_times(redisClient, event_id)
+    except redis.RedisError as e:
+        raise HTTPException(status_code=500, detail=f"Redis error: {e}")
+
+    # Everyone who checked in, including students who have since checked out
+    student_ids = list(check_in_times)
+
+    if not student_ids:
+        # No one checked in, just clean up Redis keys
+        try:
+            clear_check_in_state(redisClient, event_id)
+        except redis.RedisError as e:
+            raise HTTPException(status_code=500, detail=f"Redis error: {e}")
+        return {
+            "message": "Event finalized - no check-ins to persist",
+            "event_id": event_id,
+            "students_persisted": 0
+        }
+
+    # --- CUTOVER: NOTHING TO DO IF THE WRITE-BEHIND WORKER HAS CAUGHT UP ---
+    try:
+        backlog = attendance_backlog(redisClient)
+        if backlog == 0 and has_dead_lettered_attendance(redisClient, event_id):
+            backlog = None  # some of its entries never reached MySQL; do the full write
+    except redis.RedisError:
+        backlog = None
+
+    if backlog == 0:
+        try:
+            clear_check_in_state(redisClient, event_id)
+        except redis.RedisError as e:
+            raise HTTPException(status_code=500, detail=f"Redis error: {e}")
+        return {
+            "message": "Event finalized - check-ins already persisted by the attendance stream",
+            "event_id": event_id,
+            "students_persisted": len(student_ids),
+            "redis_keys_cleaned": True
+        }
+
+    # --- PERSIST TO MYSQL ---
+    cnx = RequestConnection(db_pool)
     cursor = None
     try:
-        cnx = db_pool.get_connection()
-        cursor = cnx.cursor(dictionary=True)
-        cursor.execute("SELECT ID, Name FROM Event WHERE ID = %s;", (event_id,))
-        event = cursor.fetchone()
-        if not event:
-            raise HTTPException(status_code=404, detail="Event not found")
-        event_name = event.get("Name") or event.get("name") or "Unknown"
-    except HTTPException:
-        raise
+        cursor = cnx.cursor()
+
+        format_strings = ",".join(["%s"] * len(student_ids))
+        cursor.execute(f"""
+            SELECT r.StudentID, r.ID
+            FROM Registration r
+            WHERE r.EventID = %s
+              AND r.StudentID IN ({format_strings});
+        """, (event_id, *student_ids))
+        registration_ids = dict(cursor.fetchall())
+
+        rows = [
+            (
+                registration_ids[student_id],
+                _to_time_of_day(check_in_times.get(student_id)),
+                _to_time_of_day(check_out_times.get(student_id))
+            )
+            for student_id in student_ids
+            if student_id in registration_ids
+        ]
+        on_chunk = None
+        if report_progress:
+            report_progress(0, len(rows))
+            on_chunk = lambda done: report_progress(done, len(rows))
+        upsert_attendees(cursor, rows, on_chunk)
+        cnx.commit()
     except mysql.connector.Error as err:
+        cnx.rollback()
         raise HTTPException(status_code=500, detail=f"MySQL error: {err}")
+    except Exception as e:
+        cnx.rollback()
+        raise HTTPException(status_code=500, detail=f"Unexpected error in finalize: {type(e).__name__}: {e}")
     finally:
         if cursor:
             cursor.close()
-        if cnx and cnx.is_connected():
-            cnx.close()
+        cnx.release()
 
-    # --- GET CHECKED-IN STUDENTS FROM REDIS ---
-    if redisClient is None:
-        raise HTTPException(status_code=503, detail="Redis connection not available")
+    # --- CLEAN UP REDIS KEYS ---
+    try:
+        forget_dead_lettered_attendance(redisClient, event_id)
+        clear_check_in_state(redisClient, event_id)
+    except redis.RedisError as e:
+        raise HTTPException(status_code=500, detail=f"Redis error: {e}")
+
+    return {
+        "message": "Event finalized successfully",
+        "event_id": event_id,
+        "students_persisted": len(rows),
+        "redis_keys_cleaned": True
+    }
 
+
+# ========== ATTENDANCE WRITE-BEHIND ==========
+# Every check-in and check-out is appended to a Redis Stream by the check-in
+# scripts. This worker drains the stream into Attendee in small batches so
+# attendance reaches MySQL during the event instead of all at finalize.
+# Unacknowledged entries are re-claimed after a crash and the upsert is
+# idempotent, so replaying an entry is harmless. Entries that are malformed,
+# or that MySQL rejects even when written on their own, are moved to the
+# attendance:deadLetter stream so they cannot hold up the backlog forever.
+# Connection and other transient errors never dead-letter anything: the batch
+# stays pending and is retried. Finalize does the full write for any event
+# with dead-lettered entries.
+
+ATTENDANCE_BATCH_SIZE = 200
+ATTENDANCE_BLOCK_MS = 2000
+ATTENDANCE_CLAIM_IDLE_MS = 60000
+ATTENDANCE_CLAIM_INTERVAL = 60  # seconds between checks for abandoned entries
+ATTENDANCE_FIELDS = ("event", "student", "type", "time")
+# Errors caused by the entries themselves; anything else (lost connection,
+# exhausted pool, deadlock, Redis down, ...) is retried, never dead-lettered
+ATTENDANCE_ENTRY_ERRORS = (
+    mysql.connector.errors.DataError, mysql.connector.errors.IntegrityError,
+    mysql.connector.errors.ProgrammingError, mysql.connector.errors.NotSupportedError,
+    ValueError, KeyError, TypeError
+)
+
+attendance_consumer = f"{socket.gethostname()}-{os.getpid()}"
+
+
+def persist_attendance_entries(entries):
+    """Writes a batch of attendance stream entries to Attendee. Returns the number of rows written."""
+    # Latest check-in and check-out time per (event, student) in this batch
+    latest = {}
+    for _, fields in entries:
+        times = latest.setdefault((int(fields["event"]), int(fields["student"])), [None, None])
+        times[0 if fields["type"] == "in" else 1] = _to_time_of_day(fields["time"])
+
+    cnx = RequestConnection(db_pool)
+    cursor = None
     try:
-        checked_in_key = f"event:{event_id}:checkedIn"
-        check_in_times_key = f"event:{event_id}:checkInTimes"
-        check_out_times_key = f"event:{event_id}:checkOutTimes"
+        cursor = cnx.cursor()
 
-        student_ids = redisClient.smembers(checked_in_key)
+        format_strings = ",".join(["(%s, %s)"] * len(latest))
+        cursor.execute(f"""
+            SELECT r.EventID, r.StudentID, r.ID
+            FROM Registration r
+            WHERE (r.EventID, r.StudentID) IN ({format_strings});
+        """, [value for pair in latest for value in pair])
+        registration_ids = {(e, s): r for e, s, r in cursor.fetchall()}
+
+        rows = [
+            (registration_ids[pair], check_in, check_out)
+            for pair, (check_in, check_out) in latest.items()
+            if pair in registration_ids
+        ]
+        upsert_attendees(cursor, rows)
+        cnx.commit()
+        return len(rows)
+    except Exception:
+        cnx.rollback()
+        raise
+    finally:
+        if cursor:
+            cursor.close()
+        cnx.release()
 
-        if not student_ids:
-            # No one checked in, just clean up Redis keys
-            redisClient.delete(checked_in_key)
-            redisClient.delete(check_in_times_key)
-            redisClient.delete(check_out_times_key)
-            return {
-                "message": "Event finalized - no check-ins to persist",
-                "event_id": event_id,
-                "students_persisted": 0
-            }
 
-        # --- PERSIST TO MYSQL ---
-        cnx = None
-        cursor = None
+def _is_valid_attendance_entry(fields):
+    """Returns True if an attendance stream entry has everything persist_attendance_entries needs."""
+    if not fields or any(not fields.get(name) for name in ATTENDANCE_FIELDS):
+        return False
+    try:
+        int(fields["event"]), int(fields["student"]), _to_time_of_day(fields["time"])
+    except ValueError:
+        return False
+    return True
+
+
+def _persist_attendance_batch(entries):
+    """
+    Persists a batch of attendance entries and acknowledges them. If the batch
+    fails because of its data, each entry is retried on its own so only the
+    entries that fail alone are dead-lettered. Transient errors propagate and
+    leave the unacknowledged entries pending.
+    """
+    try:
+        persist_attendance_entries(entries)
+    except ATTENDANCE_ENTRY_ERRORS as e:
+        logger.warning(f"Attendance batch failed ({type(e).__name__}: {e}); retrying entries one at a time")
+    else:
+        ack_attendance(redisClient, [entry_id for entry_id, _ in entries])
+        return
+
+    for entry in entries:
         try:
-            cnx = db_pool.get_connection()
-            cursor = cnx.cursor()
-
-            persisted_count = 0
-            for student_id_str in student_ids:
-                student_id = int(student_id_str)
-
-                # Get registration ID for this student and event
-                cursor.execute("""
-                               SELECT r.ID
-                               FROM Registration r
-                               WHERE r.StudentID = %s
-                                 AND r.EventID = %s;
-                               """, (student_id, event_id))
-                registration = cursor.fetchone()
-
-                if registration:
-                    registration_id = registration[0]
-
-                    # Get check-in and check-out times from Redis
-                    check_in_time_str = redisClient.hget(check_in_times_key, student_id_str)
-                    check_out_time_str = redisClient.hget(check_out_times_key, student_id_str)
-
-                    # Convert ISO timestamps to TIME format (HH:MM:SS)
-                    check_in_time = None
-                    check_out_time = None
-
-                    if check_in_time_str:
-                        # Parse ISO format and extract time
-                        dt = datetime.fromisoformat(check_in_time_str)
-                        check_in_time = dt.strftime("%H:%M:%S")
-
-                    if check_out_time_str:
-                        dt = datetime.fromisoformat(check_out_time_str)
-                        check_out_time = dt.strftime("%H:%M:%S")
-
-                    # Check if Attendee record already exists
-                    cursor.execute("""
-                                   SELECT RegistrationID
-                                   FROM Attendee
-                                   WHERE RegistrationID = %s;
-                                   """, (registration_id,))
-                    existing = cursor.fetchone()
-
-                    if existing:
-                        # Update existing record
-                        cursor.execute("""
-                                       UPDATE Attendee
-                                       SET CheckInTime  = %s,
-                                           CheckOutTime = %s
-                                       WHERE RegistrationID = %s;
-                                       """, (check_in_time, check_out_time, registration_id))
-                    else:
-                        # Insert new record
-                        cursor.execute("""
-                                       INSERT INTO Attendee (RegistrationID, CheckInTime, CheckOutTime)
-                                       VALUES (%s, %s, %s);
-                                       """, (registration_id, check_in_time, check_out_time))
-
-                    persisted_count += 1
-
-            cnx.commit()
-
-            # --- CLEAN UP REDIS KEYS ---
-            redisClient.delete(checked_in_key)
-            redisClient.delete(check_in_times_key)
-            redisClient.delete(check_out_times_key)
+            persist_attendance_entries([entry])
+        except ATTENDANCE_ENTRY_ERRORS as e:
+            logger.error(f"Dead-lettering attendance entry {entry[0]}: {type(e).__name__}: {e}")
+            dead_letter_attendance(redisClient, [entry], f"{type(e).__name__}: {e}")
+        else:
+            ack_attendance(redisClient, [entry[0]])
 
-            return {
-                "message": "Event finalized successfully",
-                "event_id": event_id,
-                "students_persisted": persisted_count,
-                "redis_keys_cleaned": True
-            }
 
-        except HTTPException:
-            raise
-        except mysql.connector.Error as err:
-            if cnx:
-                cnx.rollback()
-            raise HTTPException(status_code=500, detail=f"MySQL error: {err}")
-        except redis.RedisError as e:
-            raise HTTPException(status_code=500, detail=f"Redis error: {e}")
+def _attendance_writer(stop):
+    """Background loop that drains the attendance stream into MySQL."""
+    next_claim = 0
+    while not stop.is_set():
+        try:
+            entries = []
+            if time.monotonic() >= next_claim:
+                entries = claim_stale_attendance(redisClient, attendance_consumer,
+                                                 ATTENDANCE_CLAIM_IDLE_MS, ATTENDANCE_BATCH_SIZE)
+                next_claim = time.monotonic() + ATTENDANCE_CLAIM_INTERVAL
+            if not entries:
+                entries = read_attendance(redisClient, attendance_consumer,
+                                          ATTENDANCE_BATCH_SIZE, ATTENDANCE_BLOCK_MS)
+            malformed = [entry for entry in entries if not _is_valid_attendance_entry(entry[1])]
+            if malformed:
+                logger.error(f"Dead-lettering {len(malformed)} malformed attendance entries")
+                dead_letter_attendance(redisClient, malformed, "malformed entry")
+                entries = [entry for entry in entries if _is_valid_attendance_entry(entry[1])]
+            if entries:
+                _persist_attendance_batch(entries)
         except Exception as e:
-            if cnx:
-                cnx.rollback()
-            raise HTTPException(status_code=500, detail=f"Unexpected error: {type(e).__name__}: {e}")
-        finally:
-            if cursor:
-                cursor.close()
-            if cnx and cnx.is_connected():
-                cnx.close()
+            logger.error(f"Attendance writer error: {type(e).__name__}: {e}")
+            stop.wait(5)
+
+
+attendance_writer_stop = threading.Event()
+
+
+@app.on_event("startup")
+def start_attendance_writer():
+    if redisClient is not None:
+        ensure_attendance_group(redisClient)
+        threading.Thread(target=_attendance_writer, args=(attendance_writer_stop,),
+                         name="attendance-writer", daemon=True).start()
+
+
+@app.on_event("shutdown")
+def stop_attendance_writer():
+    attendance_writer_stop.set()
+
+
+# ========== BACKGROUND FINALIZE JOBS ==========
+# Finalize runs on a small dedicated executor so a large event does not hold
+# a request thread, and at most FINALIZE_WORKERS pooled connections are used
+# for finalizing at any time.
+
+FINALIZE_WORKERS = 1
+FINALIZE_SCAN_INTERVAL = 60  # seconds between checks for events that have ended
+FINALIZE_HEARTBEAT_INTERVAL = FINALIZE_LOCK_TTL / 3
+
+# event ID -> ID of the queued or running finalize job this process holds it for
+finalize_claims = {}
+finalize_claims_lock = threading.Lock()
+
+finalize_executor = ThreadPoolExecutor(max_workers=FINALIZE_WORKERS, thread_name_prefix="finalize")
+
+
+def _run_finalize_job(job_id, event_id):
+    """Runs finalize_event for a job and records its progress and outcome in Redis."""
+    def report_progress(done, total):
+        update_job(redisClient, job_id, processed=done, total=total,
+                   progress=100 if total == 0 else int(done * 100 / total))
+
+    try:
+        update_job(redisClient, job_id, status="running", started_at=datetime.now().isoformat())
+        result = finalize_event(event_id, report_progress)
+        update_job(redisClient, job_id, status="completed", progress=100,
+                   result=json.dumps(result), finished_at=datetime.now().isoformat())
+    except Exception as e:
+        detail = e.detail if isinstance(e, HTTPException) else f"{type(e).__name__}: {e}"
+        logger.error(f"Finalize job {job_id} for event {event_id} failed: {detail}")
+        try:
+            update_job(redisClient, job_id, status="failed", error=detail,
+                       finished_at=datetime.now().isoformat())
+        except redis.RedisError:
+            pass
+    finally:
+        with finalize_claims_lock:
+            finalize_claims.pop(event_id, None)
+        try:
+            release_finalize(redisClient, event_id, job_id)
+        except redis.RedisError:
+            pass
+
+
+def enqueue_finalize(event_id):
+    """
+    Queues a finalize job for an event and returns its job ID.
+    If a finalize job for the event is already queued or running, that job's ID is returned.
+    """
+    job_id = uuid.uuid4().hex
+    owner = claim_finalize(redisClient, event_id, job_id)
+    if owner != job_id:
+        return owner
+    with finalize_claims_lock:
+        finalize_claims[event_id] = job_id
+    create_job(redisClient, job_id, "finalize", event_id=event_id)
+    finalize_executor.submit(_run_finalize_job, job_id, event_id)
+    return job_id
+
+
+def _schedule_ended_events():
+    """Queues finalize jobs for events that ended in the last day and still have live check-ins."""
+    cnx = RequestConnection(db_pool)
+    cursor = None
+    try:
+        cursor = cnx.cursor()
+        cursor.execute("""
+            SELECT ID
+            FROM Event
+            WHERE EndDateTime <= NOW()
+              AND EndDateTime > NOW() - INTERVAL 1 DAY;
+        """)
+        event_ids = [row[0] for row in cursor.fetchall()]
+    finally:
+        if cursor:
+            cursor.close()
+        cnx.release()
+
+    if not event_ids:
+        return
+
+    pipe = redisClient.pipeline(transaction=False)
+    for event_id in event_ids:
+        pipe.exists(*check_in_state_keys(event_id))
+    for event_id, has_check_ins in zip(event_ids, pipe.execute()):
+        if has_check_ins:
+            job_id = enqueue_finalize(event_id)
+            logger.info(f"Scheduled finalize job {job_id} for ended event {event_id}")
+
+
+def _finalize_scheduler(stop):
+    """Background loop that finalizes events automatically once their EndDateTime passes."""
+    while not stop.wait(FINALIZE_SCAN_INTERVAL):
+        try:
+            _schedule_ended_events()
+        except Exception as e:
+            logger.error(f"Finalize scheduler error: {type(e).__name__}: {e}")
+
+
+def _finalize_heartbeat(stop):
+    """Background loop that renews the finalize claims of this process's jobs."""
+    while not stop.wait(FINALIZE_HEARTBEAT_INTERVAL):
+        with finalize_claims_lock:
+            claims = list(finalize_claims.items())
+        for event_id, job_id in claims:
+            try:
+                if not renew_finalize(redisClient, event_id, job_id):
+                    logger.warning(f"Finalize job {job_id} lost its claim on event {event_id}")
+            except redis.RedisError as e:
+                logger.error(f"Finalize heartbeat error: {e}")
+
+
+finalize_scheduler_stop = threading.Event()
+
+
+@app.on_event("startup")
+def start_finalize_scheduler():
+    if redisClient is not None:
+        threading.Thread(target=_finalize_scheduler, args=(finalize_scheduler_stop,),
+                         name="finalize-scheduler", daemon=True).start()
+        threading.Thread(target=_finalize_heartbeat, args=(finalize_scheduler_stop,),
+                         name="finalize-heartbeat", daemon=True).start()
+
+
+@app.on_event("shutdown")
+def stop_finalize_scheduler():
+    finalize_scheduler_stop.set()
+    finalize_executor.shutdown(wait=False)
+    lookup_executor.shutdown(wait=False)
+
+
+@app.post("/events/{event_id}/finalize", status_code=202)
+def finalize_event_check_ins(event_id: int, cnx: RequestConnection = Depends(get_db)):
+    """
+    Starts a background job that persists an event's Redis check-ins to MySQL.
+    Poll GET /jobs/{job_id} for progress and the result.
+    """
+    # --- VALIDATE EVENT EXISTS ---
+    try:
+        event = find_event(cnx, event_id)
+        if not event:
+            raise HTTPException(status_code=404, detail="Event not found")
+    except HTTPException:
+        raise
+    except mysql.connector.Error as err:
+        raise HTTPException(status_code=500, detail=f"MySQL error: {err}")
+
+    if redisClient is None:
+        raise HTTPException(status_code=503, detail="Redis connection not available")
+
+    try:
+        job_id = enqueue_finalize(event_id)
     except redis.RedisError as e:
         raise HTTPException(status_code=500, detail=f"Redis error: {e}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Unexpected error in finalize: {type(e).__name__}: {e}")
+
+    return {
+        "message": "Finalize job queued",
+        "event_id": event_id,
+        "job_id": job_id,
+        "status_url": f"/jobs/{job_id}"
+    }
+
+
+@app.get("/jobs/{job_id}")
+def get_job_status(job_id: str):
+    """
+    Returns the status and progress of a background job.
+    """
+    if redisClient is None:
+        raise HTTPException(status_code=503, detail="Redis connection not available")
+
+    try:
+        job = get_job(redisClient, job_id)
+        # A job still marked queued/running without its claim was orphaned when
+        # its process died (jobs record their outcome before releasing the claim)
+        if (job and job.get("type") == "finalize" and job["status"] in ("queued", "running")
+                and get_finalize_owner(redisClient, job["event_id"]) != job_id):
+            update_job(redisClient, job_id, status="failed", error="Finalize job was abandoned; start it again",
+                       finished_at=datetime.now().isoformat())
+            job = get_job(redisClient, job_id)
+    except redis.RedisError as e:
+        raise HTTPException(status_code=500, detail=f"Redis error: {e}")
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    for field in ("progress", "processed", "total", "event_id"):
+        if field in job:
+            job[field] = int(job[field])
+    if "result" in job:
+        job["result"] = json.loads(job["result"])
+    return job
 
 
 @app.get("/demo")
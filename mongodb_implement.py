@@ -11,7 +11,9 @@ This script:
 
 
 from pymongo.mongo_client import MongoClient
+from pymongo import AsyncMongoClient
 from pymongo.server_api import ServerApi
+from tracing import MongoCommandTracer
 import os
 from dotenv import load_dotenv
 load_dotenv("env")
@@ -28,7 +30,8 @@ def get_mongo_client():
     global mongo_client
     if mongo_client is None:
         try:
-            mongo_client = MongoClient(MONGO_URI, server_api=ServerApi('1'))
+            # the tracer charges each command to the GraphQL resolver that made it
+            mongo_client = MongoClient(MONGO_URI, server_api=ServerApi('1'), event_listeners=[MongoCommandTracer()])
             # Send a ping to confirm a successful connection
             mongo_client.admin.command('ping')
             print("Pinged your deployment. You successfully connected to MongoDB!")
@@ -40,6 +43,13 @@ def get_mongo_db():
     """Gets the MongoDB database instance."""
     client = get_mongo_client()
     return client[MONGO_DB_NAME]
+async_mongo_client = None
+def get_async_mongo_client():
+    """Initializes and returns the asyncio MongoDB client used by async endpoints."""
+    global async_mongo_client
+    if async_mongo_client is None:
+        async_mongo_client = AsyncMongoClient(MONGO_URI, server_api=ServerApi('1'))
+    return async_mongo_client
 db = get_mongo_db()
 
 
@@ -0,0 +1,895 @@
+# Westmont College CS 125 Database Design Fall 2025
+# Final Project
+# Assistant Professor Mike Ryu
+# Caleb Song & David Oyebade
+
+import mysql.connector
+import mysql.connector.aio
+import asyncio
+import base64
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from dotenv import load_dotenv
+from tracing import trace_mysql_connection
+from redis_implement import get_roster_state, get_student_names, cache_student_names, get_check_in_times
+
+load_dotenv("env")
+
+# --- Database Configuration ---
+DB_USER = "root"
+DB_PASSWORD = os.getenv("DB_PASS")
+DB_HOST = os.getenv("DB_HOST")
+DB_NAME = "FP_YG_app"
+
+# --- Pool Sizing ---
+# Sync endpoints and async endpoints each have their own pool, so the process
+# can hold up to POOL_MAX_SIZE + ASYNC_POOL_MAX_SIZE server connections; the
+# defaults split the old 40-connection budget 30/10. Requests beyond a pool's
+# maximum wait (in arrival order) instead of failing.
+# Check GET /metrics/mysql-pool (peak_in_use, waits, p95 wait) before changing these.
+POOL_MIN_SIZE = int(os.getenv("MYSQL_POOL_MIN", "5"))
+POOL_MAX_SIZE = int(os.getenv("MYSQL_POOL_MAX", "30"))
+ASYNC_POOL_MIN_SIZE = int(os.getenv("MYSQL_ASYNC_POOL_MIN", "2"))
+ASYNC_POOL_MAX_SIZE = int(os.getenv("MYSQL_ASYNC_POOL_MAX", "10"))
+POOL_TIMEOUT = float(os.getenv("MYSQL_POOL_TIMEOUT", "10"))  # seconds to wait for a connection
+POOL_IDLE_TIMEOUT = 300  # idle connections above the minimum are closed after this many seconds
+POOL_VALIDATE_AFTER = 30  # connections idle longer than this are pinged before reuse
+
+
+class MySQLPool:
+    """
+    Connection pool that grows from min_size to max_size on demand and shrinks
+    back when connections sit idle. When every connection is in use, callers
+    wait up to `timeout` seconds and are served first come, first served.
+    Keeps counters for checkout wait time, connections in use and waits so
+    the pool can be sized from real traffic (see metrics()).
+    """
+
+    def __init__(self, min_size, max_size, timeout, **cnx_config):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self._cnx_config = cnx_config
+        self._lock = threading.Lock()
+        self._idle = deque()      # (connection, time it was returned), most recent last
+        self._waiters = deque()   # callers waiting for a connection, oldest first
+        self._size = 0            # open connections, idle or in use
+        self._in_use = 0
+
+        # --- Metrics ---
+        self._checkouts = 0
+        self._waits = 0           # checkouts that found the pool exhausted and had to wait
+        self._timeouts = 0        # waits that gave up after `timeout`
+        self._peak_in_use = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._recent_waits = deque(maxlen=1000)
+
+        for _ in range(min_size):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._size += 1
+
+    def _connect(self):
+        return trace_mysql_connection(mysql.connector.connect(**self._cnx_config))
+
+    def get_connection(self):
+        """
+        Checks out a connection, opening a new one if the pool is below
+        max_size, otherwise waiting for one to be returned.
+        Raises PoolError if none is available within the timeout.
+        """
+        start = time.monotonic()
+        waiter = None
+        cnx = None
+        with self._lock:
+            if self._idle and not self._waiters:
+                cnx, idle_since = self._idle.pop()
+            elif self._size < self.max_size:
+                self._size += 1
+            else:
+                waiter = {"ready": threading.Event(), "cnx": None, "idle_since": None}
+                self._waiters.append(waiter)
+                self._waits += 1
+
+        if waiter is not None:
+            waiter["ready"].wait(self.timeout)
+            with self._lock:
+                if not waiter["ready"].is_set():
+                    self._waiters.remove(waiter)
+                    self._timeouts += 1
+                    raise mysql.connector.errors.PoolError(
+                        f"Failed getting connection; pool exhausted (waited {self.timeout}s)")
+            cnx, idle_since = waiter["cnx"], waiter["idle_since"]
+
+        try:
+            if cnx is None:
+                # A new slot, or the connection handed over was discarded
+                cnx = self._connect()
+            elif time.monotonic() - idle_since > POOL_VALIDATE_AFTER and not cnx.is_connected():
+                cnx.reconnect()
+                forget_prepared_statements(cnx)
+        except mysql.connector.Error:
+            with self._lock:
+                self._size -= 1
+            raise
+
+        waited = time.monotonic() - start
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            self._recent_waits.append(waited)
+        return cnx
+
+    def release(self, cnx):
+        """Returns a connection, handing it straight to the longest waiting caller if there is one."""
+        try:
+            if cnx.in_transaction:
+                cnx.rollback()
+        except mysql.connector.Error:
+            # Broken connection: drop it and let the next caller open a new one
+            try:
+                cnx.disconnect()
+            except mysql.connector.Error:
+                pass
+            cnx = None
+        self._return(cnx)
+
+    def discard(self, cnx):
+        """
+        Closes a checked-out connection that must not be reused, such as one
+        abandoned part way through an unbuffered result, and frees its slot.
+        """
+        try:
+            cnx.disconnect()
+        except mysql.connector.Error:
+            pass
+        self._return(None)
+
+    def _return(self, cnx):
+        """Puts a connection (or, if None, its free slot) back in the pool."""
+        now = time.monotonic()
+        with self._lock:
+            self._in_use -= 1
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter["cnx"], waiter["idle_since"] = cnx, now
+                waiter["ready"].set()
+                return
+            if cnx is None:
+                self._size -= 1
+                return
+            self._idle.append((cnx, now))
+            expired = []
+            while self._size > self.min_size and self._idle and now - self._idle[0][1] > POOL_IDLE_TIMEOUT:
+                expired.append(self._idle.popleft()[0])
+                self._size -= 1
+        for old in expired:
+            try:
+                old.disconnect()
+            except mysql.connector.Error:
+                pass
+
+    def metrics(self):
+        """Returns a snapshot of the pool's size, usage and checkout wait times."""
+        with self._lock:
+            recent = sorted(self._recent_waits)
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": len(self._waiters),
+                "peak_in_use": self._peak_in_use,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "wait_ms_avg": round(self._wait_total * 1000 / self._checkouts, 2) if self._checkouts else 0.0,
+                "wait_ms_p95": round(recent[int(len(recent) * 0.95) - 1] * 1000, 2) if recent else 0.0,
+                "wait_ms_max": round(self._wait_max * 1000, 2)
+            }
+
+
+mysql_pool = None
+def get_mysql_pool():
+    """Initializes and returns the MySQL connection pool."""
+    global mysql_pool
+    if mysql_pool is None:
+        try:
+            mysql_pool = MySQLPool(
+                POOL_MIN_SIZE,
+                POOL_MAX_SIZE,
+                POOL_TIMEOUT,
+                user=DB_USER,
+                password=DB_PASSWORD,
+                host=DB_HOST,
+                database=DB_NAME
+            )
+            print("Database connection pool created successfully.")
+        except mysql.connector.Error as err:
+            print(f"Error creating connection pool: {err}")
+            exit()
+    return mysql_pool
+
+
+# ========== REQUEST-SCOPED CONNECTIONS ==========
+# A request checks out at most one pooled connection and uses it for every
+# query it runs. Nothing is checked out until the first query, so requests
+# that are answered from Redis never touch the pool, and the connection is
+# handed straight back at the end without an is_connected() ping (the pool
+# only pings a connection that has been idle for POOL_VALIDATE_AFTER seconds).
+
+class RequestConnection:
+    """
+    One request's MySQL connection. Behaves like a normal connection
+    (cursor(), commit(), rollback(), ...) but only checks one out of the
+    pool on first use, and gives it back on release().
+    """
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._cnx = None
+
+    def get(self):
+        """Returns the request's connection, checking one out on first use."""
+        if self._cnx is None:
+            self._cnx = self._pool.get_connection()
+        return self._cnx
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+    def rollback(self):
+        """Rolls back the open transaction, if a connection was ever checked out."""
+        if self._cnx is not None:
+            self._cnx.rollback()
+
+    def close(self):
+        """Does nothing; the connection is returned to the pool by release()."""
+
+    def release(self):
+        """Returns the connection to the pool, if one was checked out."""
+        if self._cnx is None:
+            return
+        cnx, self._cnx = self._cnx, None
+        self._pool.release(cnx)
+
+    def discard(self):
+        """Closes the connection instead of returning it (see MySQLPool.discard)."""
+        if self._cnx is None:
+            return
+        cnx, self._cnx = self._cnx, None
+        self._pool.discard(cnx)
+
+
+def get_db():
+    """
+    FastAPI dependency giving each request one lazily checked-out MySQL
+    connection, returned to the pool once the request is done.
+    """
+    cnx = RequestConnection(get_mysql_pool())
+    try:
+        yield cnx
+    finally:
+        cnx.release()
+
+
+# ========== ASYNC CONNECTIONS ==========
+# async def endpoints use mysql.connector.aio through this pool, so while a
+# query is in flight the event loop keeps serving other requests instead of
+# tying up one of the threadpool's threads.
+
+class AsyncMySQLPool:
+    """
+    asyncio version of MySQLPool: grows from min_size to max_size on demand,
+    callers wait (first come, first served) up to `timeout` seconds when
+    every connection is busy, and metrics() reports the same numbers.
+    """
+
+    def __init__(self, min_size, max_size, timeout, **cnx_config):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self._cnx_config = cnx_config
+        self._slots = asyncio.Semaphore(max_size)  # one slot per connection, FIFO for waiters
+        self._idle = deque()      # (connection, time it was returned), most recent last
+        self._size = 0
+        self._in_use = 0
+        self._claimed = 0         # callers holding or waiting for a slot
+
+        # --- Metrics ---
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._peak_in_use = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._recent_waits = deque(maxlen=1000)
+
+    async def get_connection(self):
+        """
+        Checks out a connection, opening a new one if none is idle.
+        Raises PoolError if none is available within the timeout.
+        """
+        start = time.monotonic()
+        if self._claimed >= self.max_size:
+            self._waits += 1
+        self._claimed += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self._claimed -= 1
+            self._timeouts += 1
+            raise mysql.connector.errors.PoolError(
+                f"Failed getting connection; pool exhausted (waited {self.timeout}s)")
+
+        try:
+            if self._idle:
+                cnx, idle_since = self._idle.pop()
+                if time.monotonic() - idle_since > POOL_VALIDATE_AFTER and not await cnx.is_connected():
+                    await cnx.reconnect()
+                    forget_prepared_statements(cnx)
+            else:
+                cnx = await mysql.connector.aio.connect(**self._cnx_config)
+                self._size += 1
+        except BaseException:  # includes the request being cancelled mid-connect
+            self._claimed -= 1
+            self._slots.release()
+            raise
+
+        waited = time.monotonic() - start
+        self._in_use += 1
+        self._checkouts += 1
+        self._peak_in_use = max(self._peak_in_use, self._in_use)
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        self._recent_waits.append(waited)
+        return cnx
+
+    async def release(self, cnx):
+        """Returns a connection to the pool, dropping it if it is broken."""
+        now = time.monotonic()
+        try:
+            if cnx.in_transaction:
+                await cnx.rollback()
+            self._idle.append((cnx, now))
+        except mysql.connector.Error:
+            self._size -= 1
+            try:
+                await cnx.disconnect()
+            except mysql.connector.Error:
+                pass
+
+        expired = []
+        while self._size > self.min_size and self._idle and now - self._idle[0][1] > POOL_IDLE_TIMEOUT:
+            expired.append(self._idle.popleft()[0])
+            self._size -= 1
+        self._in_use -= 1
+        self._claimed -= 1
+        self._slots.release()
+        for old in expired:
+            try:
+                await old.close()
+            except mysql.connector.Error:
+                pass
+
+    def metrics(self):
+        """Returns a snapshot of the pool's size, usage and checkout wait times."""
+        recent = sorted(self._recent_waits)
+        return {
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "size": self._size,
+            "in_use": self._in_use,
+            "idle": len(self._idle),
+            "waiting": max(0, self._claimed - self.max_size),
+            "peak_in_use": self._peak_in_use,
+            "checkouts": self._checkouts,
+            "waits": self._waits,
+            "timeouts": self._timeouts,
+            "wait_ms_avg": round(self._wait_total * 1000 / self._checkouts, 2) if self._checkouts else 0.0,
+            "wait_ms_p95": round(recent[int(len(recent) * 0.95) - 1] * 1000, 2) if recent else 0.0,
+            "wait_ms_max": round(self._wait_max * 1000, 2)
+        }
+
+
+async_mysql_pool = None
+def get_async_mysql_pool():
+    """Initializes and returns the asyncio MySQL connection pool (connections open on first use)."""
+    global async_mysql_pool
+    if async_mysql_pool is None:
+        async_mysql_pool = AsyncMySQLPool(
+            ASYNC_POOL_MIN_SIZE,
+            ASYNC_POOL_MAX_SIZE,
+            POOL_TIMEOUT,
+            user=DB_USER,
+            password=DB_PASSWORD,
+            host=DB_HOST,
+            database=DB_NAME
+        )
+    return async_mysql_pool
+
+
+class AsyncRequestConnection:
+    """
+    async version of RequestConnection: checks a connection out of the async
+    pool on first use and keeps it for the rest of the request.
+    Usage: cursor = await cnx.cursor(dictionary=True)
+    """
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._cnx = None
+
+    async def get(self):
+        """Returns the request's connection, checking one out on first use."""
+        if self._cnx is None:
+            self._cnx = await self._pool.get_connection()
+        return self._cnx
+
+    async def cursor(self, **kwargs):
+        return await (await self.get()).cursor(**kwargs)
+
+    async def commit(self):
+        await (await self.get()).commit()
+
+    async def rollback(self):
+        """Rolls back the open transaction, if a connection was ever checked out."""
+        if self._cnx is not None:
+            await self._cnx.rollback()
+
+    async def release(self):
+        """Returns the connection to the pool, if one was checked out."""
+        if self._cnx is None:
+            return
+        cnx, self._cnx = self._cnx, None
+        await self._pool.release(cnx)
+
+
+async def get_async_db():
+    """FastAPI dependency giving an async endpoint one lazily checked-out MySQL connection."""
+    cnx = AsyncRequestConnection(get_async_mysql_pool())
+    try:
+        yield cnx
+    finally:
+        await cnx.release()
+
+
+# ========== SHARED QUERIES ==========
+# Lookups used by both the REST endpoints (main.py) and the GraphQL resolvers
+# (graphql_schema.py). They run as server-side prepared statements: each pooled
+# connection prepares a statement the first time it runs it and keeps the
+# cursor, so later calls on that connection skip parsing (and the ping that
+# cnx.cursor() does). The driver only reuses a statement when it is given the
+# same string object again, so always pass the module constants below.
+
+PERSON_BY_ID = "SELECT id, firstName, lastName FROM Person WHERE id = %s"
+# Event row key -> the column expression that produces it (id is always selected)
+EVENT_FIELDS = {
+    "name": "Name AS name",
+    "EventTypeID": "EventTypeID",
+    "PlaceID": "PlaceID",
+    "StartDateTime": "StartDateTime",
+    "EndDateTime": "EndDateTime"
+}
+EVENT_COLUMNS = "id, " + ", ".join(EVENT_FIELDS.values())
+ALL_EVENTS = f"SELECT {EVENT_COLUMNS} FROM Event ORDER BY Name"
+EVENT_BY_ID = f"SELECT {EVENT_COLUMNS} FROM Event WHERE id = %s"
+REGISTRATION_ID = "SELECT ID FROM Registration WHERE EventID = %s AND StudentID = %s"
+TOTALS = """SELECT (SELECT COUNT(*) FROM Event) AS events,
+                  (SELECT COUNT(*) FROM Person) AS people,
+                  (SELECT COUNT(*) FROM SmallGroup) AS smallGroups"""
+EVENT_TYPE_BY_ID = "SELECT id FROM EventType WHERE id = %s"
+EVENT_IDS_FOR_TYPE = "SELECT id FROM Event WHERE EventTypeID = %s"
+
+
+def event_fields(fields):
+    """Normalizes an event projection: the known row keys in fields, in EVENT_FIELDS order."""
+    fields = set(fields)
+    return tuple(f for f in EVENT_FIELDS if f in fields)
+
+
+@functools.lru_cache(maxsize=None)
+def _project_event_query(sql, fields):
+    return sql.replace(EVENT_COLUMNS, ", ".join(["id"] + [EVENT_FIELDS[f] for f in fields]), 1)
+
+
+def _event_query(sql, fields):
+    """
+    Returns sql (one of the event queries above) selecting only id and the
+    given row keys, or unchanged if fields is None. Each projection is built
+    once and then reused, so it stays the same string object and keeps its
+    prepared statement.
+    """
+    if fields is None:
+        return sql
+    return _project_event_query(sql, event_fields(fields))
+
+
+def _prepared_statements(raw):
+    """Returns the {sql: prepared cursor} cache kept on a pooled connection."""
+    statements = getattr(raw, "prepared_statements", None)
+    if statements is None:
+        statements = raw.prepared_statements = {}
+    return statements
+
+
+def forget_prepared_statements(cnx):
+    """Drops a connection's cached statements (a reconnect invalidates them on the server)."""
+    cnx.prepared_statements = {}
+
+
+def _run_prepared(cnx, sql, params=()):
+    """Runs sql as a prepared statement on the request's connection and returns all rows as dicts."""
+    raw = cnx.get() if isinstance(cnx, RequestConnection) else cnx
+    statements = _prepared_statements(raw)
+    cursor = statements.get(sql)
+    if cursor is None:
+        cursor = raw.cursor(prepared=True, dictionary=True)
+        statements[sql] = cursor
+    cursor.execute(sql, params)
+    return cursor.fetchall()
+
+
+async def _async_run_prepared(cnx, sql, params=()):
+    """async version of _run_prepared."""
+    raw = await cnx.get() if isinstance(cnx, AsyncRequestConnection) else cnx
+    statements = _prepared_statements(raw)
+    cursor = statements.get(sql)
+    if cursor is None:
+        cursor = await raw.cursor(prepared=True, dictionary=True)
+        statements[sql] = cursor
+    await cursor.execute(sql, params)
+    return await cursor.fetchall()
+
+
+def find_person(cnx, person_id):
+    """Returns {id, firstName, lastName} for a person, or None."""
+    rows = _run_prepared(cnx, PERSON_BY_ID, (person_id,))
+    return rows[0] if rows else None
+
+
+def list_events(cnx, fields=None):
+    """
+    Returns every event's base fields (see find_event), ordered by name.
+    fields limits the row to id and those keys.
+    """
+    return _run_prepared(cnx, _event_query(ALL_EVENTS, fields))
+
+
+def find_event(cnx, event_id, fields=None):
+    """
+    Returns an event's base fields (id, name, EventTypeID, PlaceID,
+    StartDateTime, EndDateTime), or None. Also used to check an event exists.
+    fields limits the row to id and those keys.
+    """
+    rows = _run_prepared(cnx, _event_query(EVENT_BY_ID, fields), (event_id,))
+    return rows[0] if rows else None
+
+
+def find_events(cnx, event_ids, fields=None):
+    """
+    Returns the base fields of several events in one query (missing IDs are
+    left out). Not prepared: the IN list changes length from call to call.
+    fields limits the rows to id and those keys.
+    """
+    event_ids = list(event_ids)
+    if not event_ids:
+        return []
+    format_strings = ",".join(["%s"] * len(event_ids))
+    columns = EVENT_COLUMNS if fields is None else _event_query(EVENT_COLUMNS, fields)
+    cursor = cnx.cursor(dictionary=True)
+    try:
+        cursor.execute(f"SELECT {columns} FROM Event WHERE id IN ({format_strings})", tuple(event_ids))
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def _fetch_grouped(cnx, query, keys, group_by):
+    """
+    Runs query (whose {keys} placeholders each take an IN list) for all keys
+    at once and returns {key: [rows]}. Used by the GraphQL batching loaders.
+    """
+    keys = list(keys)
+    if not keys:
+        return {}
+    cursor = cnx.cursor(dictionary=True)
+    try:
+        cursor.execute(query.format(keys=",".join(["%s"] * len(keys))), tuple(keys) * query.count("{keys}"))
+        groups = {}
+        for row in cursor.fetchall():
+            groups.setdefault(row.pop(group_by), []).append(row)
+        return groups
+    finally:
+        cursor.close()
+
+
+def find_registrations_for_events(cnx, event_ids):
+    """Returns {event_id: [{id, studentID, firstName, lastName, grade}]}."""
+    return _fetch_grouped(cnx, """
+        SELECT r.EventID, r.ID AS id, s.StudentID AS studentID, p.firstName, p.lastName, s.Grade AS grade
+        FROM Registration r
+        JOIN Student s ON r.StudentID = s.StudentID
+        JOIN Person p ON s.StudentID = p.id
+        WHERE r.EventID IN ({keys})
+        ORDER BY p.lastName, p.firstName;
+    """, event_ids, "EventID")
+
+
+def find_workers_for_events(cnx, event_ids):
+    """
+    Returns {event_id: [{shiftID, personID, firstName, lastName, leaderTitle,
+    taskID, taskDescription, role}]} for volunteers and leaders in one query.
+    A shift with both a volunteer and a leader gives one row for each, like
+    /events/{id}/workers: volunteers first, then leaders.
+    """
+    return _fetch_grouped(cnx, """
+        SELECT sc.EventID,
+               sc.ID AS shiftID,
+               p.ID AS personID,
+               p.firstName,
+               p.lastName,
+               NULL AS leaderTitle,
+               t.ID AS taskID,
+               t.Description AS taskDescription,
+               'volunteer' AS role
+        FROM ShiftCalender sc
+        JOIN Volunteer v ON sc.VolunteerID = v.VolunteerID
+        JOIN Person p ON p.ID = v.VolunteerID
+        JOIN Task t ON sc.TaskID = t.ID
+        WHERE sc.EventID IN ({keys})
+        UNION ALL
+        SELECT sc.EventID,
+               sc.ID AS shiftID,
+               p.ID AS personID,
+               p.firstName,
+               p.lastName,
+               l.Title AS leaderTitle,
+               t.ID AS taskID,
+               t.Description AS taskDescription,
+               'leader' AS role
+        FROM ShiftCalender sc
+        JOIN Leader l ON sc.LeaderID = l.LeaderID
+        JOIN Person p ON p.ID = l.LeaderID
+        JOIN Task t ON sc.TaskID = t.ID
+        WHERE sc.EventID IN ({keys})
+        ORDER BY role DESC, shiftID;
+    """, event_ids, "EventID")
+
+
+def find_parents_for_students(cnx, student_ids):
+    """Returns {student_id: [{id, firstName, lastName}]}."""
+    return _fetch_grouped(cnx, """
+        SELECT sp.StudentID, p.id, p.firstName, p.lastName
+        FROM StudentParent sp
+        JOIN Person p ON sp.ParentID = p.id
+        WHERE sp.StudentID IN ({keys})
+        ORDER BY p.lastName, p.firstName;
+    """, student_ids, "StudentID")
+
+
+def find_small_groups_for_people(cnx, person_ids):
+    """Returns {person_id: [{id, name}]}."""
+    return _fetch_grouped(cnx, """
+        SELECT pg.PersonID, sg.id, sg.Name AS name
+        FROM PersonGroup pg
+        JOIN SmallGroup sg ON pg.SmallGroupID = sg.id
+        WHERE pg.PersonID IN ({keys})
+        ORDER BY sg.Name;
+    """, person_ids, "PersonID")
+
+
+def find_members_for_small_groups(cnx, group_ids):
+    """Returns {small_group_id: [{id, firstName, lastName}]}."""
+    return _fetch_grouped(cnx, """
+        SELECT pg.SmallGroupID, p.id, p.firstName, p.lastName
+        FROM PersonGroup pg
+        JOIN Person p ON pg.PersonID = p.id
+        WHERE pg.SmallGroupID IN ({keys})
+        ORDER BY p.lastName, p.firstName;
+    """, group_ids, "SmallGroupID")
+
+
+def find_registration_id(cnx, event_id, student_id):
+    """Returns the Registration ID of a student for an event, or None if they are not registered."""
+    rows = _run_prepared(cnx, REGISTRATION_ID, (event_id, student_id))
+    return rows[0]["ID"] if rows else None
+
+
+def find_event_ids_for_type(cnx, event_type_id):
+    """Returns the IDs of every event of a type, or None if the event type does not exist."""
+    if not _run_prepared(cnx, EVENT_TYPE_BY_ID, (event_type_id,)):
+        return None
+    return [row["id"] for row in _run_prepared(cnx, EVENT_IDS_FOR_TYPE, (event_type_id,))]
+
+
+def load_live_roster(cnx, redis_client, event_id):
+    """
+    Merges an event's live roster from the Redis registration cache, presence,
+    check-in times and student-name hash. MySQL is only queried for the
+    registrations of an event that is not open and for names not cached yet.
+    Returns {registered_count, checked_in_count, students}, where students are
+    {student_id, name, registered, checked_in, check_in_time} ordered by ID.
+    """
+    registered_ids, checked_in_ids = get_roster_state(redis_client, event_id)
+
+    cursor = cnx.cursor(dictionary=True)
+    try:
+        if registered_ids is None:
+            # Event is not open: load the roster (with names) from MySQL
+            cursor.execute("""
+                SELECT Registration.StudentID, Person.firstName, Person.lastName
+                FROM Registration
+                JOIN Person ON Registration.StudentID = Person.id
+                WHERE Registration.EventID = %s;
+            """, (event_id,))
+            names = {row["StudentID"]: f"{row['firstName']} {row['lastName']}" for row in cursor.fetchall()}
+            registered_ids = set(names)
+            cache_student_names(redis_client, names)
+            names.update(get_student_names(redis_client, checked_in_ids - registered_ids))
+        else:
+            names = get_student_names(redis_client, registered_ids | checked_in_ids)
+
+        # Fill in any names that are not cached yet with one query
+        missing = {student_id for student_id in registered_ids | checked_in_ids if names.get(student_id) is None}
+        if missing:
+            format_strings = ",".join(["%s"] * len(missing))
+            cursor.execute(f"SELECT id, firstName, lastName FROM Person WHERE id IN ({format_strings});",
+                           tuple(missing))
+            found = {row["id"]: f"{row['firstName']} {row['lastName']}" for row in cursor.fetchall()}
+            names.update(found)
+            cache_student_names(redis_client, found)
+    finally:
+        cursor.close()
+
+    check_in_times = get_check_in_times(redis_client, event_id, checked_in_ids)
+    return {
+        "registered_count": len(registered_ids),
+        "checked_in_count": len(checked_in_ids),
+        "students": [
+            {
+                "student_id": student_id,
+                "name": names.get(student_id),
+                "registered": student_id in registered_ids,
+                "checked_in": student_id in checked_in_ids,
+                "check_in_time": check_in_times.get(student_id)
+            }
+            for student_id in sorted(registered_ids | checked_in_ids)
+        ]
+    }
+
+
+async def async_count_totals(cnx):
+    """Returns {events, people, smallGroups}: how many of each there are."""
+    return (await _async_run_prepared(cnx, TOTALS))[0]
+
+
+async def async_find_event(cnx, event_id):
+    rows = await _async_run_prepared(cnx, EVENT_BY_ID, (event_id,))
+    return rows[0] if rows else None
+
+
+async def async_find_registration_id(cnx, event_id, student_id):
+    rows = await _async_run_prepared(cnx, REGISTRATION_ID, (event_id, student_id))
+    return rows[0]["ID"] if rows else None
+
+
+# ========== KEYSET PAGINATION ==========
+# List endpoints page with keyset ("seek") pagination: a page is the next
+# `limit` rows in sort order after the last row the client saw, found with
+# WHERE (sort columns) > (that row's values), spelled out column by column
+# (see _seek_condition). Unlike OFFSET this costs the
+# same on page 100 as on page 1. The client only sees an opaque cursor, which
+# is the last row's sort values as base64 JSON.
+#
+# Each list below is (query, order): query has no WHERE or ORDER BY, order is
+# ((column, row key), ...) and ends in a unique column so the order is total.
+# Each order has a matching index in yg_create_tables.sql (PersonNameOrder,
+# EventNameOrder, SmallGroupNameOrder), so a page is an index range read.
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+NAME_ORDER = (("Person.lastName", "lastName"), ("Person.firstName", "firstName"))
+PEOPLE_PAGE = ("SELECT id, firstName, lastName FROM Person",
+               NAME_ORDER + (("Person.id", "id"),))
+STUDENTS_PAGE = ("SELECT id, firstName, lastName, grade FROM Person JOIN Student ON Student.studentID = Person.id",
+                 NAME_ORDER + (("Person.id", "id"),))
+PARENTS_PAGE = ("SELECT Parent.parentID, firstName, lastName FROM Parent JOIN Person ON Parent.parentID = Person.id",
+                NAME_ORDER + (("Person.id", "parentID"),))
+VOLUNTEERS_PAGE = ("SELECT volunteerID, firstName, lastName FROM Volunteer JOIN Person ON volunteerID = id",
+                   NAME_ORDER + (("Person.id", "volunteerID"),))
+LEADERS_PAGE = ("""SELECT Leader.leaderID, Person.firstName, Person.lastName, Leader.title
+                   FROM Leader JOIN Person ON Leader.leaderID = Person.id""",
+                NAME_ORDER + (("Person.id", "leaderID"),))
+EVENTS_PAGE = (f"SELECT {EVENT_COLUMNS} FROM Event", (("Name", "name"), ("id", "id")))
+SMALL_GROUPS_PAGE = ("SELECT id, name FROM SmallGroup", (("name", "name"), ("id", "id")))
+
+
+def encode_cursor(row, order):
+    """The opaque cursor pointing just after row."""
+    values = [row[key] for _, key in order]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, order):
+    """Returns the sort values in a cursor. Raises ValueError if it is not a cursor for this order."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(order):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def _seek_condition(columns, values):
+    """
+    WHERE condition for rows after values in columns order, written as
+    a >= ? AND (a > ? OR (a = ? AND (b > ? OR (b = ? AND c > ?)))) rather than
+    (a, b, c) > (?, ?, ?): MySQL does not reliably turn the row comparison
+    into a range scan on the matching index, this form it does.
+    Returns (sql, params).
+    """
+    sql, params = f"{columns[-1]} > %s", [values[-1]]
+    for column, value in zip(reversed(columns[:-1]), reversed(values[:-1])):
+        sql = f"{column} > %s OR ({column} = %s AND ({sql}))"
+        params = [value, value] + params
+    return f"{columns[0]} >= %s AND ({sql})", [values[0]] + params
+
+
+def _page_query(query, order, limit, after):
+    columns = ", ".join(column for column, _ in order)
+    params = []
+    if after is not None:
+        values = decode_cursor(after, order)
+        condition, condition_params = _seek_condition([column for column, _ in order], values)
+        query += f" WHERE {condition}"
+        params.extend(condition_params)
+    query += f" ORDER BY {columns}"
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit + 1)  # one extra row tells us whether there is a next page
+    return query, tuple(params)
+
+
+def _page_result(rows, order, limit):
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1], order)
+
+
+def fetch_page(cnx, query, order, limit, after=None):
+    """
+    Returns (rows, next_cursor) for up to limit rows of a list (see above)
+    after the cursor `after`, or from the start. next_cursor is None on the
+    last page. limit=None returns every remaining row.
+    Raises ValueError for a bad cursor.
+    """
+    sql, params = _page_query(query, order, limit, after)
+    cursor = cnx.cursor(dictionary=True)
+    try:
+        cursor.execute(sql, params)
+        return _page_result(cursor.fetchall(), order, limit)
+    finally:
+        cursor.close()
+
+
+async def async_fetch_page(cnx, query, order, limit, after=None):
+    """async version of fetch_page()."""
+    sql, params = _page_query(query, order, limit, after)
+    cursor = await cnx.cursor(dictionary=True)
+    try:
+        await cursor.execute(sql, params)
+        return _page_result(await cursor.fetchall(), order, limit)
+    finally:
+        await cursor.close()
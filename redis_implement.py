@@ -3,9 +3,16 @@
 # Assistant Professor Mike Ryu
 # Caleb Song & David Oyebade
 
+import asyncio
 import redis
+import redis.asyncio
+from redis.client import NEVER_DECODE
 import os
+import json
+import hashlib
+from datetime import datetime
 from dotenv import load_dotenv
+from tracing import trace_redis_client
 
 load_dotenv("env")
 
@@ -16,13 +23,13 @@ def get_redis_client():
     global redis_client
     if redis_client is None:
         try:
-            redis_client = redis.Redis(
+            redis_client = trace_redis_client(redis.Redis(
                 host= os.getenv("redis_host"),
                 port=16262,
                 decode_responses=True,
                 username="default",
                 password=os.getenv("redis_password"),
-            )
+            ))
             # Check connection
             redis_client.ping()
             print("Successfully connected to Redis!")
@@ -30,6 +37,19 @@ def get_redis_client():
             print(f"Error connecting to Redis: {e}")
             exit()
     return redis_client
+async_redis_client = None
+def get_async_redis_client():
+    """Initializes and returns the asyncio Redis client used for pub/sub streaming."""
+    global async_redis_client
+    if async_redis_client is None:
+        async_redis_client = redis.asyncio.Redis(
+            host=os.getenv("redis_host"),
+            port=16262,
+            decode_responses=True,
+            username="default",
+            password=os.getenv("redis_password"),
+        )
+    return async_redis_client
 def get_redis_conn():
     """Gets the Redis client instance."""
     return get_redis_client()
@@ -40,3 +60,1012 @@ def close_connections():
     # when used like this, but it's good practice if a close method is available.
     print("Connection cleanup finished.")
 
+
+
+# ========== CHECK-IN SCRIPTS ==========
+# Check-in state for an event lives in these keys:
+#   event:{id}:checkedIn      SET of student IDs currently checked in
+#   event:{id}:checkInTimes   HASH student ID -> ISO check-in timestamp
+#   event:{id}:checkOutTimes  HASH student ID -> ISO check-out timestamp
+#   event:{id}:registrations  HASH student ID -> Registration ID (filled by open_event)
+# With CHECKIN_STORAGE=bitmap the first three are replaced by compact
+# structures indexed by the integer student ID:
+#   event:{id}:checkedInBits    BITMAP, bit N set if student N is checked in
+#   event:{id}:checkInEpochs    BITFIELD of u32 epoch seconds, slot N for student N
+#   event:{id}:checkOutEpochs   BITFIELD of u32 epoch seconds, slot N for student N
+# In both modes check-ins are also indexed by time for window queries:
+#   event:{id}:arrivals       ZSET student ID scored by check-in epoch seconds
+# One global hash records where each student is right now, so a student can
+# never be checked in to two events at once:
+#   students:location         HASH student ID -> event ID
+# Every successful check-in or check-out is also appended to the
+# attendance:stream STREAM, which a background worker drains into MySQL,
+# and published as JSON on the event:{id}:activity channel for live views.
+# The scripts below do the membership test, the set change, the timestamp
+# write, the stream append and the count in one atomic call, so two kiosks
+# scanning the same student at the same time cannot both succeed.
+
+# Status codes returned by check_in()
+CHECKED_IN = 1
+ALREADY_CHECKED_IN = 0
+NOT_REGISTERED = -1
+REGISTRATIONS_NOT_CACHED = -2
+CHECKED_IN_ELSEWHERE = -3
+
+STUDENT_LOCATIONS = "students:location"
+
+# HASH of student ID -> "First Last", so rosters can show names without MySQL
+STUDENT_NAMES = "students:names"
+STUDENT_NAMES_TTL = 24 * 60 * 60
+
+# Cached registrations expire so edits made directly in MySQL are picked up
+REGISTRATION_CACHE_TTL = 24 * 60 * 60
+
+# "set" (default) or "bitmap"; only change between events, the two modes
+# use different keys and do not see each other's check-ins
+CHECKIN_STORAGE = os.getenv("CHECKIN_STORAGE", "set")
+
+# Approximate cap on the attendance stream; far more than a night of scans
+ATTENDANCE_STREAM_MAXLEN = 100000
+ATTENDANCE_STREAM = "attendance:stream"
+ATTENDANCE_GROUP = "attendance-writers"
+# Entries the worker gives up on are copied here with the reason, then acknowledged;
+# the events they belong to are remembered so finalize does not skip their write
+ATTENDANCE_DEAD_LETTER = "attendance:deadLetter"
+ATTENDANCE_DEAD_LETTER_EVENTS = "attendance:deadLetterEvents"
+
+# Bumped by every check-in/check-out (inside the scripts below) and GraphQL
+# mutation; cached GraphQL results are keyed by it, so bumping it retires them all.
+QUERY_CACHE_VERSION = "graphql:cache:version"
+
+CHECK_IN_LUA = """
+if ARGV[3] == '1' then
+    if redis.call('EXISTS', KEYS[3]) == 0 then
+        return {-2, 0}
+    end
+    if redis.call('HEXISTS', KEYS[3], ARGV[1]) == 0 then
+        return {-1, 0}
+    end
+end
+local location = redis.call('HGET', KEYS[6], ARGV[1])
+if location and location ~= ARGV[4] then
+    return {-3, tonumber(location)}
+end
+if redis.call('SADD', KEYS[1], ARGV[1]) == 0 then
+    return {0, redis.call('SCARD', KEYS[1])}
+end
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+redis.call('HSET', KEYS[6], ARGV[1], ARGV[4])
+redis.call('ZADD', KEYS[5], ARGV[6], ARGV[1])
+redis.call('XADD', KEYS[4], 'MAXLEN', '~', ARGV[5], '*',
+           'event', ARGV[4], 'student', ARGV[1], 'type', 'in', 'time', ARGV[2])
+redis.call('INCR', KEYS[7])
+local count = redis.call('SCARD', KEYS[1])
+redis.call('PUBLISH', ARGV[7], cjson.encode({type = 'check_in', event_id = tonumber(ARGV[4]),
+           student_id = tonumber(ARGV[1]), time = ARGV[2], count = count}))
+return {1, count}
+"""
+
+CHECK_OUT_LUA = """
+if redis.call('HGET', KEYS[4], ARGV[1]) == ARGV[3] then
+    redis.call('HDEL', KEYS[4], ARGV[1])
+end
+if redis.call('SREM', KEYS[1], ARGV[1]) == 0 then
+    return {0, redis.call('SCARD', KEYS[1])}
+end
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+redis.call('XADD', KEYS[3], 'MAXLEN', '~', ARGV[4], '*',
+           'event', ARGV[3], 'student', ARGV[1], 'type', 'out', 'time', ARGV[2])
+redis.call('INCR', KEYS[5])
+local count = redis.call('SCARD', KEYS[1])
+redis.call('PUBLISH', ARGV[6], cjson.encode({type = 'check_out', event_id = tonumber(ARGV[3]),
+           student_id = tonumber(ARGV[1]), time = ARGV[2], count = count}))
+return {1, count}
+"""
+
+BITMAP_CHECK_IN_LUA = """
+if ARGV[3] == '1' then
+    if redis.call('EXISTS', KEYS[3]) == 0 then
+        return {-2, 0}
+    end
+    if redis.call('HEXISTS', KEYS[3], ARGV[1]) == 0 then
+        return {-1, 0}
+    end
+end
+local location = redis.call('HGET', KEYS[6], ARGV[1])
+if location and location ~= ARGV[4] then
+    return {-3, tonumber(location)}
+end
+if redis.call('SETBIT', KEYS[1], ARGV[1], 1) == 1 then
+    return {0, redis.call('BITCOUNT', KEYS[1])}
+end
+redis.call('BITFIELD', KEYS[2], 'SET', 'u32', '#' .. ARGV[1], ARGV[6])
+redis.call('HSET', KEYS[6], ARGV[1], ARGV[4])
+redis.call('ZADD', KEYS[5], ARGV[6], ARGV[1])
+redis.call('XADD', KEYS[4], 'MAXLEN', '~', ARGV[5], '*',
+           'event', ARGV[4], 'student', ARGV[1], 'type', 'in', 'time', ARGV[2])
+redis.call('INCR', KEYS[7])
+local count = redis.call('BITCOUNT', KEYS[1])
+redis.call('PUBLISH', ARGV[7], cjson.encode({type = 'check_in', event_id = tonumber(ARGV[4]),
+           student_id = tonumber(ARGV[1]), time = ARGV[2], count = count}))
+return {1, count}
+"""
+
+BITMAP_CHECK_OUT_LUA = """
+if redis.call('HGET', KEYS[4], ARGV[1]) == ARGV[3] then
+    redis.call('HDEL', KEYS[4], ARGV[1])
+end
+if redis.call('SETBIT', KEYS[1], ARGV[1], 0) == 0 then
+    return {0, redis.call('BITCOUNT', KEYS[1])}
+end
+redis.call('BITFIELD', KEYS[2], 'SET', 'u32', '#' .. ARGV[1], ARGV[5])
+redis.call('XADD', KEYS[3], 'MAXLEN', '~', ARGV[4], '*',
+           'event', ARGV[3], 'student', ARGV[1], 'type', 'out', 'time', ARGV[2])
+redis.call('INCR', KEYS[5])
+local count = redis.call('BITCOUNT', KEYS[1])
+redis.call('PUBLISH', ARGV[6], cjson.encode({type = 'check_out', event_id = tonumber(ARGV[3]),
+           student_id = tonumber(ARGV[1]), time = ARGV[2], count = count}))
+return {1, count}
+"""
+
+# Releases the locations of everyone checked in to an event (in either
+# storage mode) and deletes the event's keys, so no check-in can land in between.
+# The bitmap is decoded by the caller, which passes the raw value it decoded
+# (ARGV[2]) and the student IDs found in it; if the bitmap has changed since,
+# nothing is done and -1 tells the caller to read it again.
+# KEYS: students:location, checkedIn set, checkedInBits, then every key to delete
+CLEAR_CHECK_IN_STATE_LUA = """
+if (redis.call('GET', KEYS[3]) or '') ~= ARGV[2] then
+    return -1
+end
+local function release(student)
+    if redis.call('HGET', KEYS[1], student) == ARGV[1] then
+        redis.call('HDEL', KEYS[1], student)
+    end
+end
+for _, student in ipairs(redis.call('SMEMBERS', KEYS[2])) do
+    release(student)
+end
+for i = 3, #ARGV do
+    release(ARGV[i])
+end
+return redis.call('DEL', unpack(KEYS, 4))
+"""
+
+CACHE_REGISTRATION_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+end
+return 1
+"""
+
+_scripts = {}
+_async_scripts = {}
+
+
+def checked_in_key(event_id):
+    """Key of the set of students currently checked in to an event."""
+    return f"event:{event_id}:checkedIn"
+
+
+def check_in_times_key(event_id):
+    """Key of the hash of check-in timestamps for an event."""
+    return f"event:{event_id}:checkInTimes"
+
+
+def check_out_times_key(event_id):
+    """Key of the hash of check-out timestamps for an event."""
+    return f"event:{event_id}:checkOutTimes"
+
+
+def registrations_key(event_id):
+    """Key of the cached hash of registrations for an event."""
+    return f"event:{event_id}:registrations"
+
+
+def checked_in_bits_key(event_id):
+    """Key of the check-in presence bitmap for an event (bitmap storage)."""
+    return f"event:{event_id}:checkedInBits"
+
+
+def check_in_epochs_key(event_id):
+    """Key of the packed check-in epoch array for an event (bitmap storage)."""
+    return f"event:{event_id}:checkInEpochs"
+
+
+def check_out_epochs_key(event_id):
+    """Key of the packed check-out epoch array for an event (bitmap storage)."""
+    return f"event:{event_id}:checkOutEpochs"
+
+
+def arrivals_key(event_id):
+    """Key of the sorted set of check-ins scored by epoch time."""
+    return f"event:{event_id}:arrivals"
+
+
+def activity_channel(event_id):
+    """Pub/sub channel on which check-in and check-out activity for an event is published."""
+    return f"event:{event_id}:activity"
+
+
+def check_in_state_keys(event_id):
+    """All keys holding live check-in state for an event, in either storage mode."""
+    return [checked_in_key(event_id), check_in_times_key(event_id), check_out_times_key(event_id),
+            checked_in_bits_key(event_id), check_in_epochs_key(event_id), check_out_epochs_key(event_id),
+            arrivals_key(event_id)]
+
+
+def _bitmap_storage():
+    return CHECKIN_STORAGE == "bitmap"
+
+
+def _to_epoch(timestamp):
+    """Converts an ISO timestamp to epoch seconds."""
+    return int(datetime.fromisoformat(timestamp).timestamp())
+
+
+def _from_epoch(epoch):
+    """Converts epoch seconds back to the ISO format used in set storage."""
+    return datetime.fromtimestamp(epoch).isoformat() if epoch else None
+
+
+def _get_raw(client, key):
+    """GETs a binary value (bitmap or packed array) without decoding it to str; also queues on a pipeline."""
+    return client.execute_command("GET", key, **{NEVER_DECODE: True})
+
+
+def _bitmap_members(bits):
+    """Returns the positions of the set bits in a raw bitmap value (None for a missing key)."""
+    if not bits:
+        return set()
+    return {i * 8 + b for i, byte in enumerate(bits) if byte for b in range(8) if byte & (0x80 >> b)}
+
+
+def _bitfield_entries(packed):
+    """Returns {slot: value} for every non-zero u32 slot of a raw packed array (None for a missing key)."""
+    if not packed:
+        return {}
+    values = (int.from_bytes(packed[i:i + 4], "big") for i in range(0, len(packed) - 3, 4))
+    return {slot: value for slot, value in enumerate(values) if value}
+
+
+def _get_script(client, source):
+    """Registers a Lua script once and returns the cached Script object."""
+    cache = _async_scripts if isinstance(client, redis.asyncio.Redis) else _scripts
+    script = cache.get(source)
+    if script is None:
+        script = client.register_script(source)
+        cache[source] = script
+    return script
+
+
+def _check_in_call(client, event_id, student_id, timestamp, use_registration_cache):
+    """Script, keys and args for one check-in in the configured storage mode."""
+    if _bitmap_storage():
+        script = _get_script(client, BITMAP_CHECK_IN_LUA)
+        keys = [checked_in_bits_key(event_id), check_in_epochs_key(event_id)]
+    else:
+        script = _get_script(client, CHECK_IN_LUA)
+        keys = [checked_in_key(event_id), check_in_times_key(event_id)]
+    keys += [registrations_key(event_id), ATTENDANCE_STREAM, arrivals_key(event_id), STUDENT_LOCATIONS,
+             QUERY_CACHE_VERSION]
+    args = [str(student_id), timestamp, "1" if use_registration_cache else "0",
+            str(event_id), ATTENDANCE_STREAM_MAXLEN, _to_epoch(timestamp), activity_channel(event_id)]
+    return script, keys, args
+
+
+def _check_out_call(client, event_id, student_id, timestamp):
+    """Script, keys and args for one check-out in the configured storage mode."""
+    if _bitmap_storage():
+        script = _get_script(client, BITMAP_CHECK_OUT_LUA)
+        keys = [checked_in_bits_key(event_id), check_out_epochs_key(event_id)]
+    else:
+        script = _get_script(client, CHECK_OUT_LUA)
+        keys = [checked_in_key(event_id), check_out_times_key(event_id)]
+    keys += [ATTENDANCE_STREAM, STUDENT_LOCATIONS, QUERY_CACHE_VERSION]
+    args = [str(student_id), timestamp, str(event_id), ATTENDANCE_STREAM_MAXLEN, _to_epoch(timestamp),
+            activity_channel(event_id)]
+    return script, keys, args
+
+
+def check_in(client, event_id, student_id, timestamp, use_registration_cache=False):
+    """
+    Atomically checks a student in to an event.
+    Returns (status, current_count) where status is one of CHECKED_IN,
+    ALREADY_CHECKED_IN, NOT_REGISTERED, REGISTRATIONS_NOT_CACHED or
+    CHECKED_IN_ELSEWHERE. For CHECKED_IN_ELSEWHERE the second value is the
+    ID of the event the student is currently checked in to instead.
+    With use_registration_cache the student is validated against the
+    registrations loaded by open_event(); if the event has not been opened
+    nothing is written and REGISTRATIONS_NOT_CACHED is returned so the
+    caller can validate against MySQL instead.
+    """
+    script, keys, args = _check_in_call(client, event_id, student_id, timestamp, use_registration_cache)
+    status, count = script(keys=keys, args=args, client=client)
+    return status, count
+
+
+def check_out(client, event_id, student_id, timestamp):
+    """
+    Atomically checks a student out of an event.
+    Returns (checked_out, current_count); checked_out is False if the student
+    was not checked in, in which case nothing is written beyond clearing
+    a location left pointing at this event.
+    """
+    script, keys, args = _check_out_call(client, event_id, student_id, timestamp)
+    removed, count = script(keys=keys, args=args, client=client)
+    return bool(removed), count
+
+
+def check_in_many(client, event_id, entries, use_registration_cache=False):
+    """
+    Checks in a batch of students in one pipelined round trip.
+    entries is a list of (student_id, timestamp) pairs; returns one
+    (status, current_count) pair per entry, in order.
+    """
+    pipe = client.pipeline(transaction=False)
+    for student_id, timestamp in entries:
+        script, keys, args = _check_in_call(client, event_id, student_id, timestamp, use_registration_cache)
+        script(keys=keys, args=args, client=pipe)
+    return [(status, count) for status, count in pipe.execute()]
+
+
+def check_out_many(client, event_id, entries):
+    """
+    Checks out a batch of students in one pipelined round trip.
+    entries is a list of (student_id, timestamp) pairs; returns one
+    (checked_out, current_count) pair per entry, in order.
+    """
+    pipe = client.pipeline(transaction=False)
+    for student_id, timestamp in entries:
+        script, keys, args = _check_out_call(client, event_id, student_id, timestamp)
+        script(keys=keys, args=args, client=pipe)
+    return [(bool(removed), count) for removed, count in pipe.execute()]
+
+
+# ========== CHECK-IN READS ==========
+# These read check-in state in whichever storage mode is configured, so
+# callers never touch the underlying keys directly.
+
+def get_check_in_count(client, event_id):
+    """Returns the number of students currently checked in to an event."""
+    if _bitmap_storage():
+        return client.bitcount(checked_in_bits_key(event_id))
+    return client.scard(checked_in_key(event_id))
+
+
+def get_check_in_counts(client, event_ids):
+    """Returns {event_id: check-in count} for several events in one pipeline."""
+    event_ids = list(event_ids)
+    pipe = client.pipeline(transaction=False)
+    for event_id in event_ids:
+        if _bitmap_storage():
+            pipe.bitcount(checked_in_bits_key(event_id))
+        else:
+            pipe.scard(checked_in_key(event_id))
+    return dict(zip(event_ids, pipe.execute()))
+
+
+def get_checked_in_ids(client, event_id):
+    """Returns the set of student IDs currently checked in to an event."""
+    if _bitmap_storage():
+        return _bitmap_members(_get_raw(client, checked_in_bits_key(event_id)))
+    return {int(s) for s in client.smembers(checked_in_key(event_id))}
+
+
+def get_check_in_times(client, event_id, student_ids):
+    """Returns {student_id: ISO check-in time or None} for the given students in one call."""
+    student_ids = list(student_ids)
+    if not student_ids:
+        return {}
+    if _bitmap_storage():
+        bitfield = client.bitfield(check_in_epochs_key(event_id))
+        for student_id in student_ids:
+            bitfield.get("u32", f"#{student_id}")
+        values = [_from_epoch(epoch) for epoch in bitfield.execute()]
+    else:
+        values = client.hmget(check_in_times_key(event_id), [str(s) for s in student_ids])
+    return dict(zip(student_ids, values))
+
+
+def get_checked_in_for_events(client, event_ids):
+    """
+    Returns {event_id: {student_id: ISO check-in time}} of the students currently
+    checked in to each of several events, with every read sent in one pipeline.
+    """
+    event_ids = list(event_ids)
+    pipe = client.pipeline(transaction=False)
+    if _bitmap_storage():
+        for event_id in event_ids:
+            _get_raw(pipe, checked_in_bits_key(event_id))
+            _get_raw(pipe, check_in_epochs_key(event_id))
+    else:
+        for event_id in event_ids:
+            pipe.smembers(checked_in_key(event_id))
+            pipe.hgetall(check_in_times_key(event_id))
+    replies = pipe.execute()
+
+    result = {}
+    for i, event_id in enumerate(event_ids):
+        members, times = replies[2 * i], replies[2 * i + 1]
+        if _bitmap_storage():
+            members = _bitmap_members(members)
+            times = {slot: _from_epoch(epoch) for slot, epoch in _bitfield_entries(times).items()}
+        else:
+            members = {int(s) for s in members}
+            times = {int(s): t for s, t in times.items()}
+        # Times outlive check-outs, so only report students still present
+        result[event_id] = {student_id: times.get(student_id) for student_id in members}
+    return result
+
+
+def get_attendance_times(client, event_id):
+    """
+    Returns (check_in_times, check_out_times), each {student_id: ISO time},
+    for everyone who has checked in or out of an event, in one round trip.
+    """
+    pipe = client.pipeline(transaction=False)
+    if _bitmap_storage():
+        _get_raw(pipe, check_in_epochs_key(event_id))
+        _get_raw(pipe, check_out_epochs_key(event_id))
+        check_ins, check_outs = pipe.execute()
+        return (
+            {slot: _from_epoch(epoch) for slot, epoch in _bitfield_entries(check_ins).items()},
+            {slot: _from_epoch(epoch) for slot, epoch in _bitfield_entries(check_outs).items()}
+        )
+    pipe.hgetall(check_in_times_key(event_id))
+    pipe.hgetall(check_out_times_key(event_id))
+    check_ins, check_outs = pipe.execute()
+    return (
+        {int(s): t for s, t in check_ins.items()},
+        {int(s): t for s, t in check_outs.items()}
+    )
+
+
+def get_arrivals(client, event_id, since_epoch=None, until_epoch=None):
+    """
+    Returns [(student_id, epoch_seconds)] for check-ins in a time window,
+    oldest first, with a single ZRANGEBYSCORE.
+    """
+    arrivals = client.zrangebyscore(
+        arrivals_key(event_id),
+        "-inf" if since_epoch is None else since_epoch,
+        "+inf" if until_epoch is None else until_epoch,
+        withscores=True
+    )
+    return [(int(student_id), int(score)) for student_id, score in arrivals]
+
+
+def get_arrival_histogram(client, event_id, bucket_seconds, since_epoch=None, until_epoch=None):
+    """
+    Returns [(bucket_start_epoch, count)] of check-ins per time bucket, with
+    buckets aligned to multiples of bucket_seconds. Empty buckets between the
+    first and last arrival are included.
+    """
+    arrivals = get_arrivals(client, event_id, since_epoch, until_epoch)
+    if not arrivals:
+        return []
+    counts = {}
+    for _, epoch in arrivals:
+        bucket = epoch - epoch % bucket_seconds
+        counts[bucket] = counts.get(bucket, 0) + 1
+    first, last = min(counts), max(counts)
+    return [(bucket, counts.get(bucket, 0)) for bucket in range(first, last + bucket_seconds, bucket_seconds)]
+
+
+def get_student_location(client, student_id):
+    """Returns the ID of the event a student is checked in to right now, or None."""
+    event_id = client.hget(STUDENT_LOCATIONS, str(student_id))
+    return int(event_id) if event_id is not None else None
+
+
+def clear_check_in_state(client, event_id):
+    """
+    Deletes all live check-in state and the registration cache for an event,
+    and releases the locations of students still checked in to it.
+    """
+    script = _get_script(client, CLEAR_CHECK_IN_STATE_LUA)
+    keys = [STUDENT_LOCATIONS, checked_in_key(event_id), checked_in_bits_key(event_id),
+            *check_in_state_keys(event_id), registrations_key(event_id)]
+    while True:
+        bits = _get_raw(client, checked_in_bits_key(event_id)) or b""
+        if script(keys=keys, args=[str(event_id), bits, *_bitmap_members(bits)], client=client) != -1:
+            return
+        # a check-in or check-out changed the bitmap after we read it; try again
+
+
+# ========== REGISTRATION CACHE ==========
+
+def open_event(client, event_id, registrations):
+    """
+    Loads an event's registrations into Redis so check-in can validate
+    students without going to MySQL.
+    registrations maps student ID -> registration ID.
+    """
+    key = registrations_key(event_id)
+    pipe = client.pipeline()
+    pipe.delete(key)
+    if registrations:
+        pipe.hset(key, mapping={str(s): str(r) for s, r in registrations.items()})
+        pipe.expire(key, REGISTRATION_CACHE_TTL)
+    pipe.execute()
+    return len(registrations)
+
+
+def close_event(client, event_id):
+    """Drops the cached registrations for an event."""
+    client.delete(registrations_key(event_id))
+
+
+def is_event_open(client, event_id):
+    """Returns True if the event's registrations are cached in Redis."""
+    return client.exists(registrations_key(event_id)) == 1
+
+
+def cache_registration(client, event_id, student_id, registration_id):
+    """Adds a new registration to the cache, but only if the event is open."""
+    script = _get_script(client, CACHE_REGISTRATION_LUA)
+    script(keys=[registrations_key(event_id)], args=[str(student_id), str(registration_id)], client=client)
+
+
+def uncache_registration(client, event_id, student_id):
+    """Removes a registration from the cache."""
+    client.hdel(registrations_key(event_id), str(student_id))
+
+
+def get_roster_state(client, event_id):
+    """
+    Returns (registered_ids, checked_in_ids) for an event in one round trip.
+    registered_ids is None if the event's registrations are not cached.
+    """
+    pipe = client.pipeline(transaction=False)
+    pipe.hkeys(registrations_key(event_id))
+    if _bitmap_storage():
+        _get_raw(pipe, checked_in_bits_key(event_id))
+    else:
+        pipe.smembers(checked_in_key(event_id))
+    registered, checked_in = pipe.execute()
+    return (
+        {int(s) for s in registered} if registered else None,
+        _bitmap_members(checked_in) if _bitmap_storage() else {int(s) for s in checked_in}
+    )
+
+
+# ========== STUDENT NAMES ==========
+
+def cache_student_names(client, names):
+    """Stores {student_id: full name} in the shared student-name hash."""
+    if not names:
+        return
+    pipe = client.pipeline()
+    pipe.hset(STUDENT_NAMES, mapping={str(s): name for s, name in names.items()})
+    pipe.expire(STUDENT_NAMES, STUDENT_NAMES_TTL)
+    pipe.execute()
+
+
+def get_student_names(client, student_ids):
+    """Returns {student_id: full name or None} for the given students with one HMGET."""
+    student_ids = list(student_ids)
+    if not student_ids:
+        return {}
+    return dict(zip(student_ids, client.hmget(STUDENT_NAMES, [str(s) for s in student_ids])))
+
+
+# ========== BACKGROUND JOBS ==========
+# Job state is kept in Redis (job:{id} HASH) so any API process can report
+# progress for a job started by another one.
+
+JOB_TTL = 24 * 60 * 60
+
+# The finalize lock expires quickly unless the process that owns the job keeps
+# renewing it, so a job orphaned by a crash stops blocking its event.
+FINALIZE_LOCK_TTL = 60
+
+RENEW_FINALIZE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_FINALIZE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def job_key(job_id):
+    """Key of the hash holding a background job's state."""
+    return f"job:{job_id}"
+
+
+def finalize_lock_key(event_id):
+    """Key holding the ID of the finalize job currently running for an event."""
+    return f"event:{event_id}:finalizeJob"
+
+
+def create_job(client, job_id, job_type, **fields):
+    """Records a new queued job."""
+    key = job_key(job_id)
+    pipe = client.pipeline()
+    pipe.hset(key, mapping={
+        "job_id": job_id,
+        "type": job_type,
+        "status": "queued",
+        "progress": 0,
+        "created_at": datetime.now().isoformat(),
+        **{name: str(value) for name, value in fields.items()}
+    })
+    pipe.expire(key, JOB_TTL)
+    pipe.execute()
+
+
+def update_job(client, job_id, **fields):
+    """Updates fields of a job's state."""
+    client.hset(job_key(job_id), mapping={name: str(value) for name, value in fields.items()})
+
+
+def get_job(client, job_id):
+    """Returns a job's state as a dict, or None if it does not exist or has expired."""
+    return client.hgetall(job_key(job_id)) or None
+
+
+def claim_finalize(client, event_id, job_id):
+    """
+    Marks a finalize job as running for an event.
+    Returns the ID of the job that owns the event: job_id if the claim
+    succeeded, or the job already queued or running for it.
+    The claim lasts FINALIZE_LOCK_TTL seconds; keep it with renew_finalize().
+    """
+    key = finalize_lock_key(event_id)
+    while True:
+        if client.set(key, job_id, nx=True, ex=FINALIZE_LOCK_TTL):
+            return job_id
+        owner = client.get(key)
+        if owner is not None:
+            return owner
+        # the other claim expired between SET and GET; try again
+
+
+def renew_finalize(client, event_id, job_id):
+    """Extends a finalize claim. Returns False if job_id no longer owns the event."""
+    script = _get_script(client, RENEW_FINALIZE_LUA)
+    return script(keys=[finalize_lock_key(event_id)], args=[job_id, FINALIZE_LOCK_TTL], client=client) == 1
+
+
+def get_finalize_owner(client, event_id):
+    """Returns the ID of the finalize job holding an event, or None."""
+    return client.get(finalize_lock_key(event_id))
+
+
+def release_finalize(client, event_id, job_id):
+    """Clears an event's finalize claim if job_id still holds it."""
+    script = _get_script(client, RELEASE_FINALIZE_LUA)
+    script(keys=[finalize_lock_key(event_id)], args=[job_id], client=client)
+
+
+# ========== ATTENDANCE STREAM ==========
+
+def ensure_attendance_group(client):
+    """Creates the attendance stream and its consumer group if they do not exist yet."""
+    try:
+        client.xgroup_create(ATTENDANCE_STREAM, ATTENDANCE_GROUP, id="0", mkstream=True)
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def read_attendance(client, consumer, count, block_ms):
+    """
+    Reads new attendance entries for a consumer of the attendance group,
+    waiting up to block_ms for entries to arrive.
+    Returns a list of (entry_id, fields) pairs.
+    """
+    response = client.xreadgroup(
+        ATTENDANCE_GROUP, consumer, {ATTENDANCE_STREAM: ">"}, count=count, block=block_ms
+    )
+    if not response:
+        return []
+    return response[0][1]
+
+
+def claim_stale_attendance(client, consumer, min_idle_ms, count):
+    """
+    Takes over entries that were delivered but not acknowledged for at least
+    min_idle_ms, e.g. because the process reading them crashed.
+    Returns a list of (entry_id, fields) pairs. Entries that were deleted
+    from the stream while pending are acknowledged and left out.
+    """
+    pending = client.xpending_range(ATTENDANCE_STREAM, ATTENDANCE_GROUP, min="-", max="+",
+                                    count=count, idle=min_idle_ms)
+    if not pending:
+        return []
+
+    # XAUTOCLAIM cannot be used here: Redis 6.2 returns deleted entries from it
+    # without fields, which redis-py fails to parse. Claim by ID instead.
+    pipe = client.pipeline(transaction=False)
+    for entry in pending:
+        pipe.xclaim(ATTENDANCE_STREAM, ATTENDANCE_GROUP, consumer, min_idle_ms, [entry["message_id"]],
+                    justid=True)
+        pipe.xrange(ATTENDANCE_STREAM, entry["message_id"], entry["message_id"])
+    results = pipe.execute()
+
+    entries, deleted = [], []
+    for entry, claimed, found in zip(pending, results[::2], results[1::2]):
+        if not claimed:
+            continue  # another consumer claimed it first
+        if not found:
+            deleted.append(entry["message_id"])
+        else:
+            entries.append((entry["message_id"], found[0][1]))
+    ack_attendance(client, deleted)
+    return entries
+
+
+def dead_letter_attendance(client, entries, reason):
+    """
+    Moves attendance entries the worker cannot persist to the dead-letter
+    stream, with the reason, and acknowledges them so they stop being retried.
+    """
+    if not entries:
+        return
+    pipe = client.pipeline()
+    for entry_id, fields in entries:
+        pipe.xadd(ATTENDANCE_DEAD_LETTER, {**fields, "entry_id": entry_id, "reason": reason},
+                  maxlen=ATTENDANCE_STREAM_MAXLEN, approximate=True)
+    event_ids = {fields["event"] for _, fields in entries if fields.get("event")}
+    if event_ids:
+        pipe.sadd(ATTENDANCE_DEAD_LETTER_EVENTS, *event_ids)
+    pipe.xack(ATTENDANCE_STREAM, ATTENDANCE_GROUP, *[entry_id for entry_id, _ in entries])
+    pipe.execute()
+
+
+def has_dead_lettered_attendance(client, event_id):
+    """Returns True if any of an event's attendance entries were dead-lettered since its last full write."""
+    return bool(client.sismember(ATTENDANCE_DEAD_LETTER_EVENTS, str(event_id)))
+
+
+def forget_dead_lettered_attendance(client, event_id):
+    """Clears an event's dead-letter flag once finalize has written its attendance in full."""
+    client.srem(ATTENDANCE_DEAD_LETTER_EVENTS, str(event_id))
+
+
+def ack_attendance(client, entry_ids):
+    """Acknowledges attendance entries once they are persisted."""
+    if entry_ids:
+        client.xack(ATTENDANCE_STREAM, ATTENDANCE_GROUP, *entry_ids)
+
+
+def attendance_backlog(client):
+    """
+    Returns the number of attendance entries not yet persisted by the worker:
+    entries never delivered plus entries delivered but not acknowledged.
+    Returns None if the consumer group does not exist.
+    """
+    try:
+        groups = client.xinfo_groups(ATTENDANCE_STREAM)
+    except redis.ResponseError:
+        return None
+    for group in groups:
+        if group["name"] == ATTENDANCE_GROUP:
+            # lag is missing before Redis 7 and None when Redis cannot compute it
+            if group.get("lag") is None:
+                return None
+            return group["lag"] + group["pending"]
+    return None
+
+
+# ========== GRAPHQL CACHE ==========
+# Persisted queries map the SHA-256 of a query's text to the text, so clients
+# can send only the hash. Read-only query results are cached under the
+# current QUERY_CACHE_VERSION; bumping it retires every cached result at once
+# and the old entries simply expire.
+
+PERSISTED_QUERY_TTL = 30 * 24 * 60 * 60
+QUERY_RESULT_TTL = int(os.getenv("GRAPHQL_CACHE_TTL", "30"))
+
+
+def persisted_query_key(query_hash):
+    """Key holding the text of a persisted GraphQL query."""
+    return f"graphql:persisted:{query_hash}"
+
+
+def query_result_key(version, query_hash, operation_name, variables):
+    """Key of a cached GraphQL result for one query, operation and set of variables."""
+    variables_hash = hashlib.sha256(json.dumps(variables or {}, sort_keys=True).encode()).hexdigest()
+    return f"graphql:result:{version}:{query_hash}:{operation_name or ''}:{variables_hash}"
+
+
+def invalidate_query_cache(client):
+    """Retires every cached GraphQL result."""
+    client.incr(QUERY_CACHE_VERSION)
+
+
+async def async_invalidate_query_cache(client):
+    await client.incr(QUERY_CACHE_VERSION)
+
+
+async def async_get_persisted_query(client, query_hash):
+    """Returns the text stored for a persisted query hash, or None."""
+    return await client.get(persisted_query_key(query_hash))
+
+
+async def async_save_persisted_query(client, query_hash, query):
+    await client.set(persisted_query_key(query_hash), query, ex=PERSISTED_QUERY_TTL)
+
+
+async def async_get_cached_result(client, query_hash, operation_name, variables):
+    """
+    Returns (key, data) for a query's cached result; data is None on a miss.
+    Store a fresh result under the returned key with async_cache_result().
+    """
+    version = await client.get(QUERY_CACHE_VERSION) or "0"
+    key = query_result_key(version, query_hash, operation_name, variables)
+    cached = await client.get(key)
+    return key, json.loads(cached) if cached is not None else None
+
+
+async def async_cache_result(client, key, data):
+    await client.set(key, json.dumps(data), ex=QUERY_RESULT_TTL)
+
+
+# ========== LIVE ACTIVITY ==========
+# Live views (the SSE stream and the GraphQL subscriptions) all listen through
+# one ActivityHub per process. The hub holds a single pub/sub connection and
+# subscribes to an event's channel only while somebody is listening to it, so
+# fifty dashboards watching the same event cost one upstream subscription.
+
+class ActivityHub:
+    """Fans activity messages from one Redis pub/sub connection out to local queues."""
+
+    QUEUE_SIZE = 100
+
+    def __init__(self):
+        self.listeners = {}  # channel -> set of asyncio.Queue
+        self.pubsub = None
+        self.reader = None
+        self.lock = asyncio.Lock()
+
+    async def add(self, channels):
+        """Registers a listener on channels and returns the queue its messages arrive on."""
+        queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        async with self.lock:
+            new_channels = [c for c in channels if c not in self.listeners]
+            if new_channels:
+                if self.pubsub is None:
+                    self.pubsub = get_async_redis_client().pubsub()
+                try:
+                    await self.pubsub.subscribe(*new_channels)
+                except BaseException:
+                    if not self.listeners:
+                        await self.pubsub.aclose()
+                        self.pubsub = None
+                    raise
+            # only after SUBSCRIBE succeeded, so a failed add leaves no channel
+            # marked as subscribed
+            for channel in channels:
+                self.listeners.setdefault(channel, set()).add(queue)
+            if self.pubsub is not None and (self.reader is None or self.reader.done()):
+                self.reader = asyncio.create_task(self._read())
+        return queue
+
+    async def remove(self, channels, queue):
+        """Drops a listener, unsubscribing from channels nobody else is listening to."""
+        async with self.lock:
+            idle_channels = []
+            for channel in channels:
+                queues = self.listeners.get(channel)
+                if queues is None:
+                    continue
+                queues.discard(queue)
+                if not queues:
+                    del self.listeners[channel]
+                    idle_channels.append(channel)
+            if self.pubsub is None:
+                return
+            if not self.listeners:
+                # last listener gone: release the connection until someone comes back
+                self.reader.cancel()
+                try:
+                    await self.reader
+                except asyncio.CancelledError:
+                    pass
+                await self.pubsub.aclose()
+                self.pubsub = None
+                self.reader = None
+            elif idle_channels:
+                await self.pubsub.unsubscribe(*idle_channels)
+
+    async def _read(self):
+        while True:
+            try:
+                message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except redis.RedisError as e:
+                # the client reconnects and resubscribes on the next read
+                print(f"Activity hub lost its Redis connection: {e}")
+                await asyncio.sleep(1)
+                continue
+            if message is None:
+                continue
+            activity = json.loads(message["data"])
+            for queue in self.listeners.get(message["channel"], ()):
+                if queue.full():
+                    queue.get_nowait()  # a listener that falls behind loses its oldest message
+                queue.put_nowait(activity)
+
+
+activity_hub = None
+def get_activity_hub():
+    """Returns the process-wide ActivityHub."""
+    global activity_hub
+    if activity_hub is None:
+        activity_hub = ActivityHub()
+    return activity_hub
+
+
+async def listen_events_activity(event_ids, idle_timeout=15):
+    """
+    Async generator yielding check-in and check-out activity for any of
+    event_ids as dicts, as they are published by the check-in scripts. Yields
+    None after idle_timeout seconds without activity so callers can send
+    keepalives.
+    """
+    channels = list(dict.fromkeys(activity_channel(event_id) for event_id in event_ids))
+    hub = get_activity_hub()
+    queue = await hub.add(channels)
+    try:
+        while True:
+            try:
+                activity = await asyncio.wait_for(queue.get(), idle_timeout)
+            except asyncio.TimeoutError:
+                activity = None
+            yield activity
+    finally:
+        await hub.remove(channels, queue)
+
+
+def listen_check_in_activity(event_id, idle_timeout=15):
+    """listen_events_activity() for a single event."""
+    return listen_events_activity([event_id], idle_timeout)
+
+
+# ========== ASYNC CHECK-IN ==========
+# Same operations as above for async endpoints, on the redis.asyncio client
+# from get_async_redis_client(). They share the scripts and key layout.
+
+async def async_check_in(client, event_id, student_id, timestamp, use_registration_cache=False):
+    """async version of check_in()."""
+    script, keys, args = _check_in_call(client, event_id, student_id, timestamp, use_registration_cache)
+    status, count = await script(keys=keys, args=args, client=client)
+    return status, count
+
+
+async def async_get_check_in_count(client, event_id):
+    """async version of get_check_in_count()."""
+    if _bitmap_storage():
+        return await client.bitcount(checked_in_bits_key(event_id))
+    return await client.scard(checked_in_key(event_id))
+
+
+async def async_get_checked_in_ids(client, event_id):
+    """async version of get_checked_in_ids()."""
+    if _bitmap_storage():
+        return _bitmap_members(await _get_raw(client, checked_in_bits_key(event_id)))
+    return {int(s) for s in await client.smembers(checked_in_key(event_id))}
+
+
+async def async_get_check_in_times(client, event_id, student_ids):
+    """async version of get_check_in_times()."""
+    student_ids = list(student_ids)
+    if not student_ids:
+        return {}
+    if _bitmap_storage():
+        bitfield = client.bitfield(check_in_epochs_key(event_id))
+        for student_id in student_ids:
+            bitfield.get("u32", f"#{student_id}")
+        values = [_from_epoch(epoch) for epoch in await bitfield.execute()]
+    else:
+        values = await client.hmget(check_in_times_key(event_id), [str(s) for s in student_ids])
+    return dict(zip(student_ids, values))
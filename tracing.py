@@ -0,0 +1,89 @@
+# Westmont College CS 125 Database Design Fall 2025
+# Final Project
+# Assistant Professor Mike Ryu
+# Caleb Song & David Oyebade
+
+"""
+Backend call tracing for GraphQL resolvers.
+
+While a resolver runs, current_span holds its ResolverSpan (set by the
+ResolverTracing extension in graphql_extensions.py). The MySQL pool, the
+Redis client and the MongoDB client report every call they make with
+record_call(), which charges it to that span. Outside a traced resolver
+nothing is recorded.
+"""
+
+import time
+from contextvars import ContextVar
+from pymongo import monitoring
+
+current_span = ContextVar("current_span", default=None)
+
+
+class ResolverSpan:
+    """Wall time and backend calls of one resolver call."""
+
+    def __init__(self, path, field):
+        self.path = path          # e.g. ["eventsWithCounts", 0, "roster"]
+        self.field = field        # "Type.field"
+        self.start = time.perf_counter()
+        self.duration = None
+        self.calls = {}           # backend -> number of calls
+        self.backend_time = {}    # backend -> seconds spent in those calls
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.start
+
+
+def record_call(backend, seconds):
+    """Charges one call to backend ("mysql", "redis" or "mongodb") to the running resolver, if any."""
+    span = current_span.get()
+    if span is not None:
+        span.calls[backend] = span.calls.get(backend, 0) + 1
+        span.backend_time[backend] = span.backend_time.get(backend, 0.0) + seconds
+
+
+def _timed(backend, method):
+    def call(*args, **kwargs):
+        if current_span.get() is None:
+            return method(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            record_call(backend, time.perf_counter() - start)
+    return call
+
+
+def trace_mysql_connection(cnx):
+    """Reports every statement run on a (sync) connection, plain or prepared. Returns cnx."""
+    cnx.cmd_query = _timed("mysql", cnx.cmd_query)
+    cnx.cmd_stmt_execute = _timed("mysql", cnx.cmd_stmt_execute)
+    return cnx
+
+
+def trace_redis_client(client):
+    """Reports every command sent by a (sync) Redis client; a pipeline counts as one call. Returns client."""
+    client.execute_command = _timed("redis", client.execute_command)
+    pipeline = client.pipeline
+
+    def traced_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        pipe.execute = _timed("redis", pipe.execute)
+        return pipe
+
+    client.pipeline = traced_pipeline
+    return client
+
+
+class MongoCommandTracer(monitoring.CommandListener):
+    """Reports every MongoDB command. Pass it to MongoClient(event_listeners=[...])."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        record_call("mongodb", event.duration_micros / 1_000_000)
+
+    def failed(self, event):
+        record_call("mongodb", event.duration_micros / 1_000_000)
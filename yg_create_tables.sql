@@ -14,7 +14,8 @@ CREATE TABLE Person(
     Address VARCHAR(100),
     DateOfBirth CHAR(10),
     PhoneNumber CHAR(12),
-    PRIMARY KEY(ID)
+    PRIMARY KEY(ID),
+    INDEX PersonNameOrder (LastName, FirstName, ID)
 );
 
 CREATE TABLE Student(
@@ -54,7 +55,8 @@ CREATE TABLE SmallGroup(
     ID INT AUTO_INCREMENT,
     Name VARCHAR(50) NOT NULL,
     MeetingTime Time NOT NULL,
-    PRIMARY KEY(ID)
+    PRIMARY KEY(ID),
+    INDEX SmallGroupNameOrder (Name, ID)
 );
 
 CREATE TABLE PersonGroup(
@@ -85,6 +87,7 @@ CREATE TABLE Event(
     StartDateTime DATETIME,
     EndDateTime DATETIME,
     PRIMARY KEY(ID),
+    INDEX EventNameOrder (Name, ID),
     FOREIGN KEY (PlaceID) REFERENCES Place(ID) ON DELETE CASCADE ON UPDATE CASCADE,
     FOREIGN KEY (EventTypeID) REFERENCES EventType(ID) ON DELETE CASCADE ON UPDATE CASCADE,
     CHECK ( EndDateTime > StartDateTime )
@@ -126,5 +129,6 @@ CREATE TABLE Attendee(
     RegistrationID INT NOT NULL,
     CheckInTime TIME,
     CheckOutTime TIME,
+    UNIQUE(RegistrationID),
 FOREIGN KEY (RegistrationID) REFERENCES Registration(ID) ON DELETE CASCADE ON UPDATE CASCADE
 );